@@ -1,64 +1,222 @@
 """api to the contract"""
-from typing import Tuple
+import os
+from concurrent.futures import Future
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
 from base64 import b64decode
 
-from pyteal import compileTeal, Mode, Expr
-from algosdk import encoding
-from algosdk.transaction import (StateSchema, ApplicationCreateTxn,
-                                 OnComplete, PaymentTxn, ApplicationCallTxn, assign_group_id,
-                                 AssetOptInTxn, AssetTransferTxn, ApplicationDeleteTxn)
+from algosdk.transaction import SignedTransaction, Transaction
 from algosdk.v2client.algod import AlgodClient
 from algosdk.logic import get_application_address
 
+# pylint: disable-next=unused-import
+from amm.transactions import MIN_BALANCE_REQUIREMENT
+from amm.transactions import (INNER_TXN_FEE, PendingGroup, sign_group,
+                              create_txns, setup_txns, opt_in_txns,
+                              supply_txns, swap_txns, withdraw_txns, redeem_txns,
+                              set_result_txns, close_txns)
+from amm.state import MarketState
 from amm.utils.account import Account
-from amm.contracts.amm import approval_program, clear_program
+from amm.utils.artifacts import load_artifact
+from amm.utils.assembler import assemble
+from amm.utils.confirmation import Confirmation, wait_for_confirmation
+from amm.utils.funding import funding_planner
+from amm.utils.params import params_provider
+from amm.utils.state_cache import state_cache
+from amm.utils.tracker import ConfirmationTracker, confirmation_tracker
+from amm.utils.program_cache import (ProgramCache, default_program_cache,
+                                     source_fingerprint)
 
-MIN_BALANCE_REQUIREMENT = (
-    # min account balance
-    110_000
-    # additional min balance for 4 assets
-    + 100_000 * 4
-)
+if TYPE_CHECKING:
+    from pyteal import Expr
+
+TEAL_VERSION = 6
+
+CONTRACT_SOURCES = [
+    os.path.join(os.path.dirname(__file__), "contracts", name)
+    for name in ("amm.py", "batched.py", "config.py", "helpers.py", "keys.py", "low_cost.py")
+]
+
+
+def _approval(low_cost: bool = False, batched: bool = False) -> "Expr":
+    # pyteal is imported only when a program is generated
+    from amm.contracts.amm import approval_program  # pylint: disable=import-outside-toplevel
+    return approval_program(low_cost=low_cost, batched=batched)
+
+
+def _clear() -> "Expr":
+    from amm.contracts.amm import clear_program  # pylint: disable=import-outside-toplevel
+    return clear_program()
+
+
+# every program by the name get_contracts and the shipped artifacts use
+PROGRAMS: Dict[str, Callable[[], "Expr"]] = {
+    "approval": _approval,
+    "approval_low_cost": partial(_approval, low_cost=True),
+    "approval_batched": partial(_approval, batched=True),
+    "approval_low_cost_batched": partial(_approval, low_cost=True, batched=True),
+    "clear": _clear,
+}
+
+
+def _generate(contract: "Expr") -> str:
+    from pyteal import Mode, compileTeal  # pylint: disable=import-outside-toplevel
+    return compileTeal(contract, mode=Mode.Application, version=TEAL_VERSION)
+
+
+def _artifact_fingerprint(name: str) -> str:
+    # shipped bytecode stays valid across pyteal releases, only the sources count
+    return source_fingerprint(CONTRACT_SOURCES, name, str(TEAL_VERSION))
 
 
 def fully_compile_contract(
-    client: AlgodClient, contract: Expr
+    client: Optional[AlgodClient], contract: "Expr"
 ) -> bytes:
     """
     Compiles teal.
     Args:
-        client: algorand client
+        client: algorand client, None assembles locally
         contract: teal contract
     Returns: bytecode
     """
-    teal = compileTeal(contract, mode=Mode.Application, version=6)
+    return compile_teal(client, _generate(contract))
+
+
+def compile_teal(client: Optional[AlgodClient], teal: str) -> bytes:
+    """
+    Assembles teal source with algod, or locally without a client.
+    Args:
+        client: algorand client, None assembles locally
+        teal: teal source
+    Returns: bytecode
+    """
+    if client is None:
+        return assemble(teal)
     response = client.compile(teal)
 
     return b64decode(response["result"])
 
 
-def get_contracts(client: AlgodClient) -> Tuple[bytes, bytes]:
+# compiler identity of every algod address asked so far
+_COMPILER_IDS: Dict[str, str] = {}
+
+
+def compiler_id(client: Optional[AlgodClient]) -> str:
+    """
+    Identity of the assembler behind a client, part of every program cache key.
+    Stand-ins that are not algod name themselves with a compiler_id attribute.
+    Args:
+        client: algorand client, None for the offline assembler
+    Returns: assembler, the client's compiler_id, or the genesis hash and build of its algod
+    """
+    if client is None:
+        return "assembler"
+    explicit = getattr(client, "compiler_id", None)
+    if explicit is not None:
+        return explicit
+    if client.algod_address not in _COMPILER_IDS:
+        versions = client.versions()
+        build = versions["build"]
+        _COMPILER_IDS[client.algod_address] = (
+            f"algod:{versions['genesis_hash_b64']}:"
+            f"{build['major']}.{build['minor']}.{build['build_number']}")
+    return _COMPILER_IDS[client.algod_address]
+
+
+def compile_cached(
+    client: Optional[AlgodClient], contract: Callable[[], "Expr"], name: str,
+    cache: Optional[ProgramCache] = None
+) -> bytes:
+    """
+    Compiles teal through the compiled program cache.
+    Without a client the algod compiled bytecode shipped in amm/compiled is
+    used while the contract sources match it, so pyteal is not imported. Programs are
+    cached per compiler, only algod output is written to disk.
+    Args:
+        client: algorand client, None assembles locally
+        contract: function building the pyteal contract
+        name: program name
+        cache: program cache, defaults to the process wide cache
+    Returns: bytecode
+    """
+    if client is None:
+        bytecode = load_artifact(name, _artifact_fingerprint(name))
+        if bytecode is not None:
+            return bytecode
+    if cache is None:
+        cache = default_program_cache()
+    from importlib.metadata import version  # pylint: disable=import-outside-toplevel
+    pyteal_version = version("pyteal")
+    compiler = compiler_id(client)
+
+    program = cache.get_or_compile(
+        generate=lambda: _generate(contract()),
+        assemble=lambda teal: compile_teal(client, teal),
+        teal_version=TEAL_VERSION,
+        compiler_version=pyteal_version,
+        fingerprint=source_fingerprint(
+            CONTRACT_SOURCES, name, str(TEAL_VERSION), pyteal_version, compiler),
+        compiler_id=compiler,
+        persist=compiler.startswith("algod:"),
+    )
+    return program.bytecode
+
+
+def get_contracts(
+    client: Optional[AlgodClient], cache: Optional[ProgramCache] = None,
+    low_cost: bool = False, batched: bool = False
+) -> Tuple[bytes, bytes]:
     """
     Get the compiled TEAL contracts for the AMM.
     Args:
-        client: An algod client that has the ability to compile TEAL programs.
+        client: An algod client that has the ability to compile TEAL programs,
+            None uses the shipped bytecode or assembles them locally.
+        cache: program cache, defaults to the process wide cache
+        low_cost: build the approval program with the scratch cached helpers
+        batched: build the approval program with one setup inner group
     Returns:
         The approval program and the clear state program.
     """
-
-    approval_program_compiled = fully_compile_contract(
-        client, approval_program())
-    clear_state_program_compiled = fully_compile_contract(
-        client, clear_program())
+    name = "approval" + ("_low_cost" if low_cost else "") + ("_batched" if batched else "")
+    approval_program_compiled = compile_cached(client, PROGRAMS[name], name, cache)
+    clear_state_program_compiled = compile_cached(
+        client, PROGRAMS["clear"], "clear", cache)
 
     return approval_program_compiled, clear_state_program_compiled
 
 
-class App:
-    """ Algorand App """
+def build_programs(
+    client: AlgodClient
+) -> Tuple[Dict[str, Tuple[bytes, str]], Dict[str, str]]:
+    """
+    Generates every program and compiles it with algod, for the shipped artifacts.
+    Args:
+        client: algorand client whose node compiles the programs
+    Returns:
+        Name to bytecode and source fingerprint, and the teal, pyteal and
+        compiler versions.
+    """
+    from importlib.metadata import version  # pylint: disable=import-outside-toplevel
+    programs = {name: (compile_teal(client, _generate(contract())), _artifact_fingerprint(name))
+                for name, contract in PROGRAMS.items()}
+    return programs, {"teal": str(TEAL_VERSION), "pyteal": version("pyteal"),
+                      "compiler": compiler_id(client)}
+
+
+class AppBase:  # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    """ build options, app id and token ids shared by App and AsyncApp """
 
-    def __init__(self, client: AlgodClient, app_id=0):
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self, client: Any, app_id=0,
+        program_cache: Optional[ProgramCache] = None, compact: bool = False,
+        low_cost: bool = False, batched: bool = False, local_assembly: bool = False
+    ):
         self.client = client
+        self.program_cache = program_cache
+        self.compact = compact
+        self.low_cost = low_cost
+        self.batched = batched
+        self.local_assembly = local_assembly
         self.app_id = app_id
         self.app_addr = get_application_address(app_id)
         self.stable_token: int
@@ -72,34 +230,47 @@ class App:
         """
         self.app_addr = get_application_address(self.app_id)
 
+
+class App(AppBase):  # pylint: disable=too-many-instance-attributes,too-many-public-methods
+    """ Algorand App """
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self, client: AlgodClient, app_id=0,
+        program_cache: Optional[ProgramCache] = None, compact: bool = False,
+        low_cost: bool = False, batched: bool = False, local_assembly: bool = False
+    ):
+        super().__init__(client, app_id, program_cache, compact, low_cost, batched,
+                         local_assembly)
+        self.params = params_provider(client)
+        self.funding = funding_planner(client)
+        self.state_cache = state_cache(client)
+
     def wait_for_transaction(
         self, tx_id: str, timeout: int = 10
-    ):
+    ) -> Confirmation:
         """
         Monitors transaction completion.
         Args:
             tx_id: transaction id
             timeout: timeout in rounds
+        Returns: confirmed transaction record with timing data
         """
 
-        last_status = self.client.status()
-        last_round = last_status["last-round"]
-        start_round = last_round
+        confirmation = wait_for_confirmation(
+            self.client, tx_id, timeout, on_round=self._observe_round)
+        self._confirmed(confirmation)
+        return confirmation
 
-        while last_round < start_round + timeout:
-            pending_txn = self.client.pending_transaction_info(tx_id)
+    def _observe_round(self, round_number: int) -> None:
+        self.params.observe_round(round_number)
+        self.state_cache.observe_round(round_number)
 
-            if pending_txn.get("confirmed-round", 0) > 0:
-                return pending_txn
+    def _confirmed(self, confirmation: Confirmation) -> None:
+        self.state_cache.confirmed(confirmation)
 
-            if pending_txn["pool-error"]:
-                raise RuntimeError("Pool error:")
-
-            last_round += 1
-
-        raise RuntimeError(
-            f"Transaction {tx_id} not confirmed after {timeout} rounds"
-        )
+    def _confirmed_future(self, future: Future) -> None:
+        if future.exception() is None:
+            self._confirmed(future.result())
 
     def create_amm_app(
         self,
@@ -117,34 +288,15 @@ class App:
             The ID of the newly created amm app.
         """
         self.stable_token = token
-        approval, clear = get_contracts(self.client)
-
-        global_schema = StateSchema(
-            num_uints=13, num_byte_slices=1)
-        local_schema = StateSchema(num_uints=0, num_byte_slices=0)
-
-        app_args = [
-            encoding.decode_address(deployer.public_key),
-            token.to_bytes(8, "big"),
-            min_increment.to_bytes(8, "big"),
-        ]
-
-        txn = ApplicationCreateTxn(
-            sender=deployer.public_key,
-            on_complete=OnComplete.NoOpOC,
-            approval_program=approval,
-            clear_program=clear,
-            global_schema=global_schema,
-            local_schema=local_schema,
-            app_args=app_args,
-            sp=self.client.suggested_params(),
-        )
-
-        signed_tx = txn.sign(deployer.private_key)
-
-        self.client.send_transaction(signed_tx)
-
-        response = self.wait_for_transaction(signed_tx.get_txid())
+        approval, clear = get_contracts(
+            None if self.local_assembly else self.client, self.program_cache,
+            self.low_cost, self.batched)
+
+        signed = self._send(create_txns(
+            approval, clear, token, min_increment, deployer.public_key,
+            self.params.get()), deployer)
+
+        response = self.wait_for_transaction(signed[0].get_txid())
         assert response["application-index"] is not None and response["application-index"] > 0
         self.app_id = response["application-index"]
         self.update_app_address()
@@ -153,57 +305,33 @@ class App:
     def setup_amm_app(
         self,
         funder: Account
-    ) -> dict:
+    ) -> MarketState:
         """
         Finish setting up an amm.
         This operation funds the pool account, creates pool token,
         and opts app into tokens A and B, all in one atomic transaction group.
         Args:
             funder: The account providing the funding for the escrow account.
-        Return: app asset ids.
+        Return: app state with the asset ids.
         """
+        signed = self._send(setup_txns(
+            self, funder.public_key, self.params.get()), funder)
 
-        fund_app_tx = PaymentTxn(
-            sender=funder.public_key,
-            receiver=self.app_addr,
-            amt=MIN_BALANCE_REQUIREMENT,
-            sp=self.client.suggested_params(),
-        )
-
-        setup_tx = ApplicationCallTxn(
-            sender=funder.public_key,
-            index=self.app_id,
-            on_complete=OnComplete.NoOpOC,
-            app_args=[b"setup"],
-            foreign_assets=[self.stable_token],
-            sp=self.client.suggested_params(),
-        )
-
-        assign_group_id([fund_app_tx, setup_tx])
-
-        signed_fund_spp_txn = fund_app_tx.sign(funder.private_key)
-        signed_setup_tx = setup_tx.sign(funder.private_key)
+        self.wait_for_transaction(signed[-1].get_txid())
 
-        self.client.send_transactions([signed_fund_spp_txn, signed_setup_tx])
+        state = self.get_state()
+        self.pool_token = state.pool_token_key
+        self.yes_token = state.yes_token_key
+        self.no_token = state.no_token_key
 
-        self.wait_for_transaction(signed_fund_spp_txn.get_txid())
-        glob_state = self.client.application_info(
-            self.app_id)['params']['global-state']
+        return state
 
-        ids = {}
-
-        for i, _ in enumerate(glob_state):
-            if b64decode(glob_state[i]['key']) == b"pool_token_key":
-                ids['pool_token_key'] = glob_state[i]['value']['uint']
-                self.pool_token = glob_state[i]['value']['uint']
-            elif b64decode(glob_state[i]['key']) == b"yes_token_key":
-                ids['yes_token_key'] = glob_state[i]['value']['uint']
-                self.yes_token = glob_state[i]['value']['uint']
-            elif b64decode(glob_state[i]['key']) == b"no_token_key":
-                ids['no_token_key'] = glob_state[i]['value']['uint']
-                self.no_token = glob_state[i]['value']['uint']
-
-        return ids
+    def get_state(self) -> MarketState:
+        """
+        Reads the global state of the app through the client's state cache.
+        Returns: market state, shared with other readers
+        """
+        return self.state_cache.get(self.app_id)
 
     def opt_in_to_pool_token(
         self,
@@ -215,14 +343,9 @@ class App:
             account: The account opting into the token.
         """
 
-        opt_in_tx = AssetOptInTxn(
-            sender=account.public_key, index=self.pool_token, sp=self.client.suggested_params()
-        )
-
-        signed_opt_in_tx = opt_in_tx.sign(account.private_key)
-
-        self.client.send_transaction(signed_opt_in_tx)
-        self.wait_for_transaction(signed_opt_in_tx.get_txid())
+        signed = self._send(opt_in_txns(
+            self.pool_token, account.public_key, self.params.get()), account)
+        self.wait_for_transaction(signed[0].get_txid())
 
     def opt_in_to_no_token(
         self,
@@ -234,14 +357,9 @@ class App:
             account: The account opting into the token.
         """
 
-        opt_in_tx = AssetOptInTxn(
-            sender=account.public_key, index=self.no_token, sp=self.client.suggested_params()
-        )
-
-        signed_opt_in_tx = opt_in_tx.sign(account.private_key)
-
-        self.client.send_transaction(signed_opt_in_tx)
-        self.wait_for_transaction(signed_opt_in_tx.get_txid())
+        signed = self._send(opt_in_txns(
+            self.no_token, account.public_key, self.params.get()), account)
+        self.wait_for_transaction(signed[0].get_txid())
 
     def opt_in_to_yes_token(
         self,
@@ -253,59 +371,64 @@ class App:
             account: The account opting into the token.
         """
 
-        opt_in_tx = AssetOptInTxn(
-            sender=account.public_key, index=self.yes_token, sp=self.client.suggested_params()
-        )
+        signed = self._send(opt_in_txns(
+            self.yes_token, account.public_key, self.params.get()), account)
+        self.wait_for_transaction(signed[0].get_txid())
+
+    @property
+    def tracker(self) -> ConfirmationTracker:
+        """confirmation tracker shared by the apps on this client"""
+        return confirmation_tracker(self.client)
+
+    def _send(self, txns: List[Transaction], account: Account) -> List[SignedTransaction]:
+        signed = sign_group(txns, account)
+        if len(signed) == 1:
+            self.client.send_transaction(signed[0])
+        else:
+            self.client.send_transactions(signed)
+        self.funding.invalidate(self.app_addr)
+        return signed
 
-        signed_opt_in_tx = opt_in_tx.sign(account.private_key)
+    def _submit(self, txns: List[Transaction], account: Account) -> PendingGroup:
+        signed = self._send(txns, account)
+        return PendingGroup(signed, self.tracker.track(
+            signed[-1].get_txid(), self._confirmed_future))
 
-        self.client.send_transaction(signed_opt_in_tx)
-        self.wait_for_transaction(signed_opt_in_tx.get_txid())
+    def _plan_funding(self) -> int:
+        """
+        Plans the app account top up sent with a supply.
+        Returns: microalgos covering the min balance and the inner transaction fee
+        """
+        return self.funding.shortfall(self.app_addr, INNER_TXN_FEE)
 
     def supply(
         self, quantity: int, supplier: Account
     ) -> None:
         """
         Supply liquidity to the pool.
+        The app account is only paid what it lacks above its min balance.
         Args:
             quantity: quantity
             supplier: supplier
         """
+        signed = self._send(supply_txns(
+            self, quantity, supplier.public_key, self.params.get(),
+            funding=self._plan_funding()), supplier)
+        self.wait_for_transaction(signed[-1].get_txid())
 
-        fee_tx = PaymentTxn(
-            sender=supplier.public_key,
-            receiver=self.app_addr,
-            amt=MIN_BALANCE_REQUIREMENT,
-            sp=self.client.suggested_params(),
-        )
-
-        token_tx = AssetTransferTxn(
-            sender=supplier.public_key,
-            receiver=self.app_addr,
-            index=self.stable_token,
-            amt=quantity,
-            sp=self.client.suggested_params(),
-        )
-
-        app_call_tx = ApplicationCallTxn(
-            sender=supplier.public_key,
-            index=self.app_id,
-            on_complete=OnComplete.NoOpOC,
-            app_args=[b"supply"],
-            foreign_assets=[self.stable_token, self.pool_token,
-                            self.yes_token, self.no_token],
-            sp=self.client.suggested_params(),
-        )
-
-        assign_group_id([fee_tx, token_tx, app_call_tx])
-        signed_fee_tx = fee_tx.sign(supplier.private_key)
-        signed_token_tx = token_tx.sign(supplier.private_key)
-        signed_app_call_tx = app_call_tx.sign(supplier.private_key)
-
-        self.client.send_transactions(
-            [signed_fee_tx, signed_token_tx, signed_app_call_tx]
-        )
-        self.wait_for_transaction(signed_app_call_tx.get_txid())
+    def submit_supply(
+        self, quantity: int, supplier: Account
+    ) -> PendingGroup:
+        """
+        Sends a liquidity supply without waiting for confirmation.
+        Args:
+            quantity: quantity
+            supplier: supplier
+        Returns: pending group
+        """
+        return self._submit(supply_txns(
+            self, quantity, supplier.public_key, self.params.get(),
+            funding=self._plan_funding()), supplier)
 
     def swap(
         self, option: str, quantity: int, supplier: Account
@@ -316,48 +439,30 @@ class App:
             option: string either yes or no option
             quantity: token amount
             supplier: account of the sender
+        Raises:
+            ValueError: option is neither yes nor no
         """
-        if option == 'yes':
-            second_argument = b"buy_yes"
-        elif option == 'no':
-            second_argument = b"buy_no"
-        else:
-            return
-
-        fee_tx = PaymentTxn(
-            sender=supplier.public_key,
-            receiver=self.app_addr,
-            amt=2_000,
-            sp=self.client.suggested_params(),
-        )
-
-        token_tx = AssetTransferTxn(
-            sender=supplier.public_key,
-            receiver=self.app_addr,
-            index=self.stable_token,
-            amt=quantity,
-            sp=self.client.suggested_params(),
-        )
-
-        app_call_tx = ApplicationCallTxn(
-            sender=supplier.public_key,
-            index=self.app_id,
-            on_complete=OnComplete.NoOpOC,
-            app_args=[b"swap", second_argument],
-            foreign_assets=[self.stable_token, self.pool_token,
-                            self.yes_token, self.no_token],
-            sp=self.client.suggested_params(),
-        )
-
-        assign_group_id([fee_tx, token_tx, app_call_tx])
-        signed_fee_tx = fee_tx.sign(supplier.private_key)
-        signed_token_tx = token_tx.sign(supplier.private_key)
-        signed_app_call_tx = app_call_tx.sign(supplier.private_key)
-
-        self.client.send_transactions(
-            [signed_fee_tx, signed_token_tx, signed_app_call_tx]
-        )
-        self.wait_for_transaction(signed_app_call_tx.get_txid())
+        signed = self._send(swap_txns(
+            self, option, quantity, supplier.public_key, self.params.get(),
+            compact=self.compact), supplier)
+        self.wait_for_transaction(signed[-1].get_txid())
+
+    def submit_swap(
+        self, option: str, quantity: int, supplier: Account
+    ) -> PendingGroup:
+        """
+        Sends a swap without waiting for confirmation.
+        Args:
+            option: string either yes or no option
+            quantity: token amount
+            supplier: account of the sender
+        Returns: pending group
+        Raises:
+            ValueError: option is neither yes nor no
+        """
+        return self._submit(swap_txns(
+            self, option, quantity, supplier.public_key, self.params.get(),
+            compact=self.compact), supplier)
 
     def withdraw(
         self, pool_token_amount: int,
@@ -371,39 +476,25 @@ class App:
             pool_token_amount: token amount
             withdrawal_account: account of the sender to withdraw stablecoins
         """
+        signed = self._send(withdraw_txns(
+            self, pool_token_amount, withdrawal_account.public_key,
+            self.params.get(), compact=self.compact), withdrawal_account)
+        self.wait_for_transaction(signed[-1].get_txid())
 
-        fee_tx = PaymentTxn(
-            sender=withdrawal_account.public_key,
-            receiver=self.app_addr,
-            amt=2_000,
-            sp=self.client.suggested_params(),
-        )
-
-        pool_token_tx = AssetTransferTxn(
-            sender=withdrawal_account.public_key,
-            receiver=self.app_addr,
-            index=self.pool_token,
-            amt=pool_token_amount,
-            sp=self.client.suggested_params(),
-        )
-
-        app_call_tx = ApplicationCallTxn(
-            sender=withdrawal_account.public_key,
-            index=self.app_id,
-            on_complete=OnComplete.NoOpOC,
-            app_args=[b"withdraw"],
-            foreign_assets=[self.stable_token, self.pool_token],
-            sp=self.client.suggested_params(),
-        )
-
-        assign_group_id([fee_tx, pool_token_tx, app_call_tx])
-        signed_fee_tx = fee_tx.sign(withdrawal_account.private_key)
-        signed_token_tx = pool_token_tx.sign(withdrawal_account.private_key)
-        signed_app_call_tx = app_call_tx.sign(withdrawal_account.private_key)
-
-        self.client.send_transactions(
-            [signed_fee_tx, signed_token_tx, signed_app_call_tx])
-        self.wait_for_transaction(signed_app_call_tx.get_txid())
+    def submit_withdraw(
+        self, pool_token_amount: int,
+        withdrawal_account: Account
+    ) -> PendingGroup:
+        """
+        Sends a liquidity withdrawal without waiting for confirmation.
+        Args:
+            pool_token_amount: token amount
+            withdrawal_account: account of the sender to withdraw stablecoins
+        Returns: pending group
+        """
+        return self._submit(withdraw_txns(
+            self, pool_token_amount, withdrawal_account.public_key,
+            self.params.get(), compact=self.compact), withdrawal_account)
 
     def redeem(
         self, token_in: int, token_amount: int,
@@ -419,39 +510,27 @@ class App:
             withdrawal_account: withdrawal account
             token_out: stablecoin
         """
+        signed = self._send(redeem_txns(
+            self, token_in, token_amount, withdrawal_account.public_key,
+            token_out, self.params.get(), compact=self.compact), withdrawal_account)
+        self.wait_for_transaction(signed[-1].get_txid())
 
-        fee_tx = PaymentTxn(
-            sender=withdrawal_account.public_key,
-            receiver=self.app_addr,
-            amt=2_000,
-            sp=self.client.suggested_params(),
-        )
-
-        token_tx = AssetTransferTxn(
-            sender=withdrawal_account.public_key,
-            receiver=self.app_addr,
-            index=token_in,
-            amt=token_amount,
-            sp=self.client.suggested_params(),
-        )
-
-        app_call_tx = ApplicationCallTxn(
-            sender=withdrawal_account.public_key,
-            index=self.app_id,
-            on_complete=OnComplete.NoOpOC,
-            app_args=[b"redeem"],
-            foreign_assets=[token_out, token_in],
-            sp=self.client.suggested_params(),
-        )
-
-        assign_group_id([fee_tx, token_tx, app_call_tx])
-        signed_fee_tx = fee_tx.sign(withdrawal_account.private_key)
-        signed_token_tx = token_tx.sign(withdrawal_account.private_key)
-        signed_app_call_tx = app_call_tx.sign(withdrawal_account.private_key)
-
-        self.client.send_transactions(
-            [signed_fee_tx, signed_token_tx, signed_app_call_tx])
-        self.wait_for_transaction(signed_app_call_tx.get_txid())
+    def submit_redeem(
+        self, token_in: int, token_amount: int,
+        withdrawal_account: Account, token_out: int
+    ) -> PendingGroup:
+        """
+        Sends a redemption without waiting for confirmation.
+        Args:
+            token_in: should be a winning token
+            token_amount: token amount
+            withdrawal_account: withdrawal account
+            token_out: stablecoin
+        Returns: pending group
+        """
+        return self._submit(redeem_txns(
+            self, token_in, token_amount, withdrawal_account.public_key,
+            token_out, self.params.get(), compact=self.compact), withdrawal_account)
 
     def set_result(
         self,
@@ -464,28 +543,26 @@ class App:
             funder: creator of the amm
             second_argument: result
         """
+        signed = self._send(set_result_txns(
+            self, funder.public_key, second_argument, self.params.get(),
+            compact=self.compact), funder)
+        self.wait_for_transaction(signed[-1].get_txid())
 
-        fee_tx = PaymentTxn(
-            sender=funder.public_key,
-            receiver=self.app_addr,
-            amt=2_000,
-            sp=self.client.suggested_params(),
-        )
-
-        call_tx = ApplicationCallTxn(
-            sender=funder.public_key,
-            index=self.app_id,
-            on_complete=OnComplete.NoOpOC,
-            app_args=[b"result", second_argument],
-            sp=self.client.suggested_params(),
-        )
-
-        assign_group_id([fee_tx, call_tx])
-        signed_fee_tx = fee_tx.sign(funder.private_key)
-        signed_app_call_tx = call_tx.sign(funder.private_key)
-
-        self.client.send_transactions([signed_fee_tx, signed_app_call_tx])
-        self.wait_for_transaction(signed_app_call_tx.get_txid())
+    def submit_set_result(
+        self,
+        funder: Account,
+        second_argument
+    ) -> PendingGroup:
+        """
+        Sends the result of the event without waiting for confirmation.
+        Args:
+            funder: creator of the amm
+            second_argument: result
+        Returns: pending group
+        """
+        return self._submit(set_result_txns(
+            self, funder.public_key, second_argument, self.params.get(),
+            compact=self.compact), funder)
 
     def close_amm(
         self,
@@ -497,14 +574,20 @@ class App:
             closing_account: closer account public address.
             Must be the original creator of the pool.
         """
+        signed = self._send(close_txns(
+            self, closing_account.public_key, self.params.get()), closing_account)
+        self.wait_for_transaction(signed[-1].get_txid())
 
-        delete_tx = ApplicationDeleteTxn(
-            sender=closing_account.public_key,
-            index=self.app_id,
-            sp=self.client.suggested_params(),
-        )
-        signed_tx = delete_tx.sign(closing_account.private_key)
-
-        self.client.send_transaction(signed_tx)
-
-        self.wait_for_transaction(signed_tx.get_txid())
+    def submit_close_amm(
+        self,
+        closing_account: Account
+    ) -> PendingGroup:
+        """
+        Sends the deletion of the AMM without waiting for confirmation.
+        Args:
+            closing_account: closer account public address.
+            Must be the original creator of the pool.
+        Returns: pending group
+        """
+        return self._submit(close_txns(
+            self, closing_account.public_key, self.params.get()), closing_account)
@@ -0,0 +1,234 @@
+"""asyncio api to the contract"""
+import asyncio
+from typing import List
+
+from algosdk.transaction import SignedTransaction, Transaction
+
+from amm.amm_app import AppBase, get_contracts
+from amm.state import MarketState
+from amm.transactions import (INNER_TXN_FEE, sign_group, create_txns, setup_txns, opt_in_txns,
+                              supply_txns, swap_txns, withdraw_txns, redeem_txns,
+                              set_result_txns, close_txns)
+from amm.utils.account import Account
+from amm.utils.async_client import AsyncAlgodClient
+from amm.utils.confirmation import Confirmation
+
+
+class _CompileBridge:  # pylint: disable=too-few-public-methods
+    """lets the synchronous program cache compile through the event loop"""
+
+    def __init__(self, client: AsyncAlgodClient, loop: asyncio.AbstractEventLoop):
+        self.client = client
+        self.loop = loop
+        self.algod_address = client.algod_address
+
+    def compile(self, teal: str) -> dict:
+        """compiles on the event loop and waits for the result"""
+        return asyncio.run_coroutine_threadsafe(
+            self.client.compile(teal), self.loop).result()
+
+    def versions(self) -> dict:
+        """algod versions, identifying the compiler in the program cache"""
+        return asyncio.run_coroutine_threadsafe(
+            self.client.versions(), self.loop).result()
+
+
+class AsyncApp(AppBase):
+    """ Algorand App driven by asyncio """
+
+    client: AsyncAlgodClient
+
+    async def wait_for_transaction(
+        self, tx_id: str, timeout: int = 10
+    ) -> Confirmation:
+        """
+        Awaits the transaction in the client's block follower task.
+        Args:
+            tx_id: transaction id
+            timeout: rounds before giving up
+        Returns: confirmation
+        """
+        return await self.client.tracker.track(tx_id, timeout)
+
+    async def _send(self, txns: List[Transaction], account: Account) -> List[SignedTransaction]:
+        signed = sign_group(txns, account)
+        await self.client.send_transactions(signed)
+        self.client.funding.invalidate(self.app_addr)
+        return signed
+
+    async def _execute(self, txns: List[Transaction], account: Account) -> Confirmation:
+        signed = await self._send(txns, account)
+        confirmation = await self.wait_for_transaction(signed[-1].get_txid())
+        self.client.state_cache.confirmed(confirmation)
+        return confirmation
+
+    async def create_amm_app(
+        self,
+        token: int,
+        min_increment: int,
+        deployer: Account
+    ) -> int:
+        """
+        Creates a new amm.
+        Args:
+            deployer: The account that will create the amm application.
+            token: The id of liquidity token in the liquidity pool,
+            min_increment: min int to fund the pool
+        Return:
+            The ID of the newly created amm app.
+        """
+        self.stable_token = token
+        bridge = None if self.local_assembly else _CompileBridge(
+            self.client, asyncio.get_running_loop())
+        approval, clear = await asyncio.to_thread(
+            get_contracts, bridge, self.program_cache, self.low_cost, self.batched)
+
+        response = await self._execute(create_txns(
+            approval, clear, token, min_increment, deployer.public_key,
+            await self.client.params.get()), deployer)
+        self.app_id = response["application-index"]
+        self.update_app_address()
+        return self.app_id
+
+    async def setup_amm_app(
+        self,
+        funder: Account
+    ) -> MarketState:
+        """
+        Finish setting up an amm.
+        Args:
+            funder: The account providing the funding for the escrow account.
+        Return: app state with the asset ids.
+        """
+        await self._execute(setup_txns(
+            self, funder.public_key, await self.client.params.get()), funder)
+
+        state = await self.get_state()
+        self.pool_token = state.pool_token_key
+        self.yes_token = state.yes_token_key
+        self.no_token = state.no_token_key
+        return state
+
+    async def get_state(self) -> MarketState:
+        """
+        Reads the global state of the app through the client's state cache.
+        Returns: market state, shared with other readers
+        """
+        return await self.client.state_cache.get(self.app_id)
+
+    async def opt_in(self, asset_id: int, account: Account) -> None:
+        """
+        Opts into one of the amm tokens.
+        Args:
+            asset_id: token to opt into
+            account: The account opting into the token.
+        """
+        await self._execute(opt_in_txns(
+            asset_id, account.public_key, await self.client.params.get()), account)
+
+    async def opt_in_to_pool_token(self, account: Account) -> None:
+        """Opts into Pool Token."""
+        await self.opt_in(self.pool_token, account)
+
+    async def opt_in_to_yes_token(self, account: Account) -> None:
+        """Opts into Yes Token."""
+        await self.opt_in(self.yes_token, account)
+
+    async def opt_in_to_no_token(self, account: Account) -> None:
+        """Opts into No Token."""
+        await self.opt_in(self.no_token, account)
+
+    async def supply(
+        self, quantity: int, supplier: Account
+    ) -> Confirmation:
+        """
+        Supply liquidity to the pool.
+        The app account is only paid what it lacks above its min balance.
+        Args:
+            quantity: quantity
+            supplier: supplier
+        Returns: confirmation
+        """
+        return await self._execute(supply_txns(
+            self, quantity, supplier.public_key, await self.client.params.get(),
+            funding=await self.client.funding.shortfall(self.app_addr, INNER_TXN_FEE)),
+            supplier)
+
+    async def swap(
+        self, option: str, quantity: int, supplier: Account
+    ) -> Confirmation:
+        """
+        Swap stable for an AMM option.
+        Args:
+            option: string either yes or no option
+            quantity: token amount
+            supplier: account of the sender
+        Returns: confirmation
+        """
+        return await self._execute(swap_txns(
+            self, option, quantity, supplier.public_key,
+            await self.client.params.get(), compact=self.compact), supplier)
+
+    async def withdraw(
+        self, pool_token_amount: int,
+        withdrawal_account: Account
+    ) -> Confirmation:
+        """
+        Withdraw liquidity  + rewards from the pool back to supplier.
+        Args:
+            pool_token_amount: token amount
+            withdrawal_account: account of the sender to withdraw stablecoins
+        Returns: confirmation
+        """
+        return await self._execute(withdraw_txns(
+            self, pool_token_amount, withdrawal_account.public_key,
+            await self.client.params.get(), compact=self.compact), withdrawal_account)
+
+    async def redeem(
+        self, token_in: int, token_amount: int,
+        withdrawal_account: Account, token_out: int
+    ) -> Confirmation:
+        """
+        Redeems winning token for stablecoin.
+        Args:
+            token_in: should be a winning token
+            token_amount: token amount
+            withdrawal_account: withdrawal account
+            token_out: stablecoin
+        Returns: confirmation
+        """
+        return await self._execute(redeem_txns(
+            self, token_in, token_amount, withdrawal_account.public_key,
+            token_out, await self.client.params.get(),
+            compact=self.compact), withdrawal_account)
+
+    async def set_result(
+        self,
+        funder: Account,
+        second_argument
+    ) -> Confirmation:
+        """
+        Sets result of the event.
+        Args:
+            funder: creator of the amm
+            second_argument: result
+        Returns: confirmation
+        """
+        return await self._execute(set_result_txns(
+            self, funder.public_key, second_argument,
+            await self.client.params.get(), compact=self.compact), funder)
+
+    async def close_amm(
+        self,
+        closing_account: Account
+    ) -> Confirmation:
+        """
+        Closes an AMM.
+        Args:
+            closing_account: closer account public address.
+            Must be the original creator of the pool.
+        Returns: confirmation
+        """
+        return await self._execute(close_txns(
+            self, closing_account.public_key, await self.client.params.get()),
+            closing_account)
@@ -1,5 +1,7 @@
 """main"""
-from pyteal import (App, Global, Assert, Seq, And, Not, Txn, Int,
+from typing import List, Tuple
+
+from pyteal import (App, Global, Assert, Seq, And, Not, Txn, Int, Expr, ScratchVar, TealType,
                     Approve, Gtxn, If, Bytes, Reject, Btoi, Cond, Or, OnComplete, compileTeal, Mode)
 
 from amm.contracts.helpers import (
@@ -8,6 +10,7 @@ from amm.contracts.helpers import (
     opt_in, create_pool_token, withdraw_lp_token,
     create_no_token, create_yes_token, redeem_token
 )
+from amm.contracts import batched as grouped, low_cost as cached
 
 from amm.contracts.config import (
     CREATOR_KEY, TOKEN_FUNDING_KEY,
@@ -19,7 +22,20 @@ from amm.contracts.config import (
 )
 
 
-def get_setup():
+def previous_txn_index(low_cost: bool = False) -> Tuple[List[Expr], Expr]:
+    """
+    Index of the transaction before the app call.
+    Args:
+        low_cost: compute it once into scratch
+    Returns: expressions to run first and the index
+    """
+    if not low_cost:
+        return [], Txn.group_index() - Int(1)
+    index = ScratchVar(TealType.uint64)
+    return [index.store(Txn.group_index() - Int(1))], index.load()
+
+
+def get_setup(batched: bool = False):
     """sets up contract"""
     pool_token_id = App.globalGetEx(
         Global.current_application_id(), POOL_TOKEN_KEY)
@@ -31,22 +47,26 @@ def get_setup():
         pool_tokens_outstanding,
         Assert(Not(pool_token_id.hasValue())),
         Assert(Not(pool_tokens_outstanding.hasValue())),
-        create_pool_token(TOKEN_DEFAULT_AMOUNT),
-        opt_in(TOKEN_FUNDING_KEY),
-        create_no_token(TOKEN_DEFAULT_AMOUNT),
-        opt_in(NO_TOKEN_KEY),
-        create_yes_token(TOKEN_DEFAULT_AMOUNT),
-        opt_in(YES_TOKEN_KEY),
+        grouped.create_tokens() if batched else Seq(
+            create_pool_token(TOKEN_DEFAULT_AMOUNT),
+            opt_in(TOKEN_FUNDING_KEY),
+            create_no_token(TOKEN_DEFAULT_AMOUNT),
+            opt_in(NO_TOKEN_KEY),
+            create_yes_token(TOKEN_DEFAULT_AMOUNT),
+            opt_in(YES_TOKEN_KEY),
+        ),
         Approve(),
     )
     return on_setup
 
 
-def get_supply():
+def get_supply(low_cost: bool = False):
     """liquidity supply"""
-    token_txn_index = Txn.group_index() - Int(1)
+    mint = cached.mint_and_send_pool_token if low_cost else mint_and_send_pool_token
+    store_index, token_txn_index = previous_txn_index(low_cost)
 
     on_supply = Seq(
+        *store_index,
         Assert(
             And(
                 validate_token_received(token_txn_index, TOKEN_FUNDING_KEY),
@@ -54,7 +74,7 @@ def get_supply():
                 >= App.globalGet(MIN_INCREMENT_KEY),
             )
         ),
-        mint_and_send_pool_token(
+        mint(
             Txn.sender(),
             Gtxn[token_txn_index].asset_amount(),
         ),
@@ -63,18 +83,21 @@ def get_supply():
     return on_supply
 
 
-def get_swap():
+def get_swap(low_cost: bool = False):
     """option swap"""
-    token_txn_index = Txn.group_index() - Int(1)
+    mint_yes = cached.mint_and_send_yes_token if low_cost else mint_and_send_yes_token
+    mint_no = cached.mint_and_send_no_token if low_cost else mint_and_send_no_token
+    store_index, token_txn_index = previous_txn_index(low_cost)
     option = Txn.application_args[1]
     on_swap = Seq(
+        *store_index,
         Assert(
             validate_token_received(token_txn_index, TOKEN_FUNDING_KEY),
         ),
         If(option == Bytes("buy_yes"))
         .Then(
             Seq(
-                mint_and_send_yes_token(
+                mint_yes(
                     Txn.sender(),
                     Gtxn[token_txn_index].asset_amount(),
                 ),
@@ -84,7 +107,7 @@ def get_swap():
         .ElseIf(option == Bytes("buy_no"))
         .Then(
             Seq(
-                mint_and_send_no_token(
+                mint_no(
                     Txn.sender(),
                     Gtxn[token_txn_index].asset_amount(),
                 ),
@@ -97,15 +120,17 @@ def get_swap():
     return on_swap
 
 
-def get_withdraw():
+def get_withdraw(low_cost: bool = False):
     """liquidity withdrawal"""
-    pool_token_txn_index = Txn.group_index() - Int(1)
+    withdraw = cached.withdraw_lp_token if low_cost else withdraw_lp_token
+    store_index, pool_token_txn_index = previous_txn_index(low_cost)
 
     on_withdraw = Seq(
+        *store_index,
         Assert(
             validate_token_received(pool_token_txn_index, POOL_TOKEN_KEY),
         ),
-        withdraw_lp_token(
+        withdraw(
             Txn.sender(),
             Gtxn[pool_token_txn_index].asset_amount(),
         ),
@@ -166,8 +191,14 @@ def get_redemption():
     return on_redemption
 
 
-def approval_program():
-    """main"""
+def approval_program(low_cost: bool = False, batched: bool = False):
+    """
+    main
+    Args:
+        low_cost: price supply, swap and withdraw with the helpers of
+            low_cost.py, which read each market key into scratch once
+        batched: set up in one inner group with create_tokens of batched.py
+    """
     on_create = Seq(
         App.globalPut(CREATOR_KEY, Txn.application_args[0]),
         App.globalPut(TOKEN_FUNDING_KEY, Btoi(Txn.application_args[1])),
@@ -178,22 +209,27 @@ def approval_program():
         Approve(),
     )
 
-    on_setup = get_setup()
-    on_supply = get_supply()
-    on_swap = get_swap()
-    on_withdraw = get_withdraw()
+    on_setup = get_setup(batched)
+    on_supply = get_supply(low_cost)
+    on_swap = get_swap(low_cost)
+    on_withdraw = get_withdraw(low_cost)
     on_redemption = get_redemption()
     on_result = get_result()
 
     on_call_method = Txn.application_args[0]
-    on_call = Cond(
+    methods = [
         [on_call_method == Bytes("setup"), on_setup],
         [on_call_method == Bytes("supply"), on_supply],
         [on_call_method == Bytes("withdraw"), on_withdraw],
         [on_call_method == Bytes("swap"), on_swap],
         [on_call_method == Bytes("redeem"), on_redemption],
         [on_call_method == Bytes("result"), on_result],
-    )
+    ]
+    if low_cost:
+        # the names are distinct, testing the frequent calls first skips
+        # comparisons without changing which branch runs
+        methods = [methods[index] for index in (3, 1, 2, 4, 5, 0)]
+    on_call = Cond(*methods)
 
     on_delete = Seq(
         Assert(
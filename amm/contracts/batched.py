@@ -0,0 +1,64 @@
+"""setup in one inner group, fewer inner transactions than helpers.py"""
+from pyteal import (App, Global, TxnType, Seq, TealType, Int, Expr, Bytes,
+                    InnerTxnBuilder, TxnField, Gitxn, Subroutine)
+
+from amm.contracts.config import (
+    POOL_TOKENS_OUTSTANDING_KEY, POOL_TOKEN_KEY,
+    YES_TOKEN_KEY, YES_TOKENS_OUTSTANDING_KEY, YES_TOKENS_RESERVES,
+    NO_TOKEN_KEY, NO_TOKENS_OUTSTANDING_KEY, NO_TOKENS_RESERVES,
+    TOKEN_FUNDING_KEY, TOKEN_DEFAULT_AMOUNT
+)
+
+
+def _transfer_fields(token_key: Expr, receiver: Expr, amount: Expr) -> Expr:
+    return InnerTxnBuilder.SetFields(
+        {
+            TxnField.type_enum: TxnType.AssetTransfer,
+            TxnField.xfer_asset: App.globalGet(token_key),
+            TxnField.asset_receiver: receiver,
+            TxnField.asset_amount: amount,
+        }
+    )
+
+
+@Subroutine(TealType.none)
+def _token_fields(name: Expr, unit_name: Expr) -> Expr:
+    # an empty unit name is left out of the transaction, as the pool token has none
+    return InnerTxnBuilder.SetFields(
+        {
+            TxnField.type_enum: TxnType.AssetConfig,
+            TxnField.config_asset_total: TOKEN_DEFAULT_AMOUNT,
+            TxnField.config_asset_name: name,
+            TxnField.config_asset_unit_name: unit_name,
+            TxnField.config_asset_default_frozen: Int(0),
+            TxnField.config_asset_decimals: Int(0),
+            TxnField.config_asset_reserve: Global.current_application_address(),
+        }
+    )
+
+
+def create_tokens() -> Expr:
+    """
+    Creates the pool, no and yes tokens and opts into the funding token
+    in one inner group. The application account holds the tokens it
+    creates, so they need no opt in.
+    """
+    return Seq(
+        InnerTxnBuilder.Begin(),
+        _token_fields(Bytes("PoolToken"), Bytes("")),
+        InnerTxnBuilder.Next(),
+        _token_fields(Bytes("NoToken"), Bytes("No")),
+        InnerTxnBuilder.Next(),
+        _token_fields(Bytes("YesToken"), Bytes("Yes")),
+        InnerTxnBuilder.Next(),
+        _transfer_fields(TOKEN_FUNDING_KEY, Global.current_application_address(), Int(0)),
+        InnerTxnBuilder.Submit(),
+        App.globalPut(POOL_TOKEN_KEY, Gitxn[0].created_asset_id()),
+        App.globalPut(POOL_TOKENS_OUTSTANDING_KEY, Int(0)),
+        App.globalPut(NO_TOKEN_KEY, Gitxn[1].created_asset_id()),
+        App.globalPut(NO_TOKENS_OUTSTANDING_KEY, Int(0)),
+        App.globalPut(NO_TOKENS_RESERVES, Int(0)),
+        App.globalPut(YES_TOKEN_KEY, Gitxn[2].created_asset_id()),
+        App.globalPut(YES_TOKENS_OUTSTANDING_KEY, Int(0)),
+        App.globalPut(YES_TOKENS_RESERVES, Int(0)),
+    )
@@ -1,26 +1,28 @@
 """globals"""
 from pyteal import Bytes, Int
 
-CREATOR_KEY = Bytes("creator_key")
+from amm.contracts import keys
 
-RESULT = Bytes("result")
+CREATOR_KEY = Bytes(keys.CREATOR_KEY)
 
-TOKEN_FUNDING_KEY = Bytes("token_funding_key")
-TOKEN_FUNDING_RESERVES = Bytes("token_funding_reserves")
+RESULT = Bytes(keys.RESULT)
 
-POOL_FUNDING_RESERVES = Bytes("pool_funding_reserves")
+TOKEN_FUNDING_KEY = Bytes(keys.TOKEN_FUNDING_KEY)
+TOKEN_FUNDING_RESERVES = Bytes(keys.TOKEN_FUNDING_RESERVES)
 
-POOL_TOKEN_KEY = Bytes("pool_token_key")
-POOL_TOKENS_OUTSTANDING_KEY = Bytes("pool_tokens_outstanding_key")
+POOL_FUNDING_RESERVES = Bytes(keys.POOL_FUNDING_RESERVES)
 
-YES_TOKEN_KEY = Bytes("yes_token_key")
-YES_TOKENS_OUTSTANDING_KEY = Bytes("yes_tokens_outstanding_key")
-YES_TOKENS_RESERVES = Bytes("yes_tokens_reserves")
+POOL_TOKEN_KEY = Bytes(keys.POOL_TOKEN_KEY)
+POOL_TOKENS_OUTSTANDING_KEY = Bytes(keys.POOL_TOKENS_OUTSTANDING_KEY)
 
-NO_TOKEN_KEY = Bytes("no_token_key")
-NO_TOKENS_OUTSTANDING_KEY = Bytes("no_tokens_outstanding_key")
-NO_TOKENS_RESERVES = Bytes("no_tokens_reserves")
+YES_TOKEN_KEY = Bytes(keys.YES_TOKEN_KEY)
+YES_TOKENS_OUTSTANDING_KEY = Bytes(keys.YES_TOKENS_OUTSTANDING_KEY)
+YES_TOKENS_RESERVES = Bytes(keys.YES_TOKENS_RESERVES)
 
-MIN_INCREMENT_KEY = Bytes("min_increment_key")
+NO_TOKEN_KEY = Bytes(keys.NO_TOKEN_KEY)
+NO_TOKENS_OUTSTANDING_KEY = Bytes(keys.NO_TOKENS_OUTSTANDING_KEY)
+NO_TOKENS_RESERVES = Bytes(keys.NO_TOKENS_RESERVES)
 
-TOKEN_DEFAULT_AMOUNT = Int(10 ** 13)
+MIN_INCREMENT_KEY = Bytes(keys.MIN_INCREMENT_KEY)
+
+TOKEN_DEFAULT_AMOUNT = Int(keys.TOKEN_DEFAULT_AMOUNT)
@@ -0,0 +1,25 @@
+"""global state key names, importable without pyteal"""
+
+CREATOR_KEY = "creator_key"
+
+RESULT = "result"
+
+TOKEN_FUNDING_KEY = "token_funding_key"
+TOKEN_FUNDING_RESERVES = "token_funding_reserves"
+
+POOL_FUNDING_RESERVES = "pool_funding_reserves"
+
+POOL_TOKEN_KEY = "pool_token_key"
+POOL_TOKENS_OUTSTANDING_KEY = "pool_tokens_outstanding_key"
+
+YES_TOKEN_KEY = "yes_token_key"
+YES_TOKENS_OUTSTANDING_KEY = "yes_tokens_outstanding_key"
+YES_TOKENS_RESERVES = "yes_tokens_reserves"
+
+NO_TOKEN_KEY = "no_token_key"
+NO_TOKENS_OUTSTANDING_KEY = "no_tokens_outstanding_key"
+NO_TOKENS_RESERVES = "no_tokens_reserves"
+
+MIN_INCREMENT_KEY = "min_increment_key"
+
+TOKEN_DEFAULT_AMOUNT = 10 ** 13
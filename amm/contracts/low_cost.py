@@ -0,0 +1,129 @@
+"""pricing helpers reading each market key into scratch once, same results as helpers.py"""
+from pyteal import (App, Global, Seq, TealType, Int, Expr, If, ScratchVar, AssetHolding)
+
+from amm.contracts.config import (
+    POOL_TOKENS_OUTSTANDING_KEY, POOL_TOKEN_KEY, POOL_FUNDING_RESERVES, RESULT,
+    YES_TOKEN_KEY, YES_TOKENS_OUTSTANDING_KEY, YES_TOKENS_RESERVES,
+    NO_TOKEN_KEY, NO_TOKENS_OUTSTANDING_KEY, NO_TOKENS_RESERVES,
+    TOKEN_FUNDING_KEY, TOKEN_FUNDING_RESERVES
+)
+from amm.contracts.helpers import send_token
+
+
+def mint_and_send_pool_token(receiver: TealType.bytes, amount: TealType.uint64) -> Expr:
+    """mintAndSendPoolToken"""
+    reserves = ScratchVar(TealType.uint64)
+    outstanding = ScratchVar(TealType.uint64)
+    no_reserves = ScratchVar(TealType.uint64)
+    yes_reserves = ScratchVar(TealType.uint64)
+    ratio = ScratchVar(TealType.uint64)
+    minted = ScratchVar(TealType.uint64)
+    supplied = ScratchVar(TealType.uint64)
+    return Seq(
+        supplied.store(amount),
+        reserves.store(App.globalGet(POOL_FUNDING_RESERVES)),
+        outstanding.store(App.globalGet(POOL_TOKENS_OUTSTANDING_KEY)),
+        no_reserves.store(App.globalGet(NO_TOKENS_RESERVES)),
+        yes_reserves.store(App.globalGet(YES_TOKENS_RESERVES)),
+        ratio.store((Int(1) + no_reserves.load()) / (Int(1) + yes_reserves.load())),
+        If(reserves.load() > Int(0))
+        .Then(minted.store(supplied.load() * outstanding.load() / reserves.load()))
+        .Else(minted.store(supplied.load())),
+        send_token(POOL_TOKEN_KEY, receiver, minted.load()),
+        App.globalPut(POOL_TOKENS_OUTSTANDING_KEY, outstanding.load() + minted.load()),
+        App.globalPut(NO_TOKENS_RESERVES,
+                      ratio.load() * (supplied.load() / Int(4)) + no_reserves.load()),
+        App.globalPut(YES_TOKENS_RESERVES,
+                      (Int(1) / ratio.load()) * (supplied.load() / Int(4)) + yes_reserves.load()),
+        App.globalPut(POOL_FUNDING_RESERVES, reserves.load() + supplied.load()),
+    )
+
+
+def _mint_and_send_option(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    token_key: TealType.bytes, outstanding_key: TealType.bytes,
+    reserves_key: TealType.bytes, other_outstanding_key: TealType.bytes,
+    other_reserves_key: TealType.bytes, receiver: TealType.bytes, amount: TealType.uint64
+) -> Expr:
+    funding = AssetHolding.balance(
+        Global.current_application_address(), App.globalGet(TOKEN_FUNDING_KEY)
+    )
+    reserves = ScratchVar(TealType.uint64)
+    tokens_out = ScratchVar(TealType.uint64)
+    outstanding = ScratchVar(TealType.uint64)
+    funding_reserves = ScratchVar(TealType.uint64)
+    paid = ScratchVar(TealType.uint64)
+    return Seq(
+        paid.store(amount),
+        reserves.store(App.globalGet(reserves_key)),
+        tokens_out.store(
+            reserves.load() * paid.load() / (App.globalGet(other_reserves_key) + paid.load())),
+        outstanding.store(App.globalGet(outstanding_key) + tokens_out.load()),
+        App.globalPut(outstanding_key, outstanding.load()),
+        App.globalPut(reserves_key, reserves.load() - tokens_out.load()),
+        send_token(token_key, receiver, tokens_out.load()),
+        If(outstanding.load() > App.globalGet(other_outstanding_key))
+        .Then(Seq(
+            funding_reserves.store(outstanding.load() * Int(2)),
+            App.globalPut(TOKEN_FUNDING_RESERVES, funding_reserves.load()),
+        ))
+        .Else(funding_reserves.store(App.globalGet(TOKEN_FUNDING_RESERVES))),
+        funding,
+        App.globalPut(POOL_FUNDING_RESERVES, funding.value() - funding_reserves.load()),
+    )
+
+
+def mint_and_send_no_token(
+    receiver: TealType.bytes, amount: TealType.uint64
+) -> Expr:
+    """mints no token"""
+    return _mint_and_send_option(
+        NO_TOKEN_KEY, NO_TOKENS_OUTSTANDING_KEY, NO_TOKENS_RESERVES,
+        YES_TOKENS_OUTSTANDING_KEY, YES_TOKENS_RESERVES, receiver, amount)
+
+
+def mint_and_send_yes_token(
+    receiver: TealType.bytes, amount: TealType.uint64
+) -> Expr:
+    """mints yes token"""
+    return _mint_and_send_option(
+        YES_TOKEN_KEY, YES_TOKENS_OUTSTANDING_KEY, YES_TOKENS_RESERVES,
+        NO_TOKENS_OUTSTANDING_KEY, NO_TOKENS_RESERVES, receiver, amount)
+
+
+def withdraw_lp_token(
+    receiver: TealType.bytes,
+    pool_token_amount: TealType.uint64,
+) -> Expr:
+    """withdraws lp token"""
+    reserves = ScratchVar(TealType.uint64)
+    outstanding = ScratchVar(TealType.uint64)
+    share = ScratchVar(TealType.uint64)
+    no_reserves = ScratchVar(TealType.uint64)
+    yes_reserves = ScratchVar(TealType.uint64)
+    ratio = ScratchVar(TealType.uint64)
+    withdrawn = ScratchVar(TealType.uint64)
+
+    return Seq(
+        withdrawn.store(pool_token_amount),
+        reserves.store(App.globalGet(POOL_FUNDING_RESERVES)),
+        outstanding.store(App.globalGet(POOL_TOKENS_OUTSTANDING_KEY)),
+        share.store(reserves.load() * withdrawn.load() / outstanding.load()),
+        send_token(TOKEN_FUNDING_KEY, receiver, share.load()),
+        reserves.store(reserves.load() - share.load()),
+        outstanding.store(outstanding.load() - withdrawn.load()),
+        App.globalPut(POOL_FUNDING_RESERVES, reserves.load()),
+        App.globalPut(POOL_TOKENS_OUTSTANDING_KEY, outstanding.load()),
+        If(App.globalGet(RESULT) == Int(0)).Then(
+            Seq(
+                no_reserves.store(App.globalGet(NO_TOKENS_RESERVES)),
+                yes_reserves.store(App.globalGet(YES_TOKENS_RESERVES)),
+                ratio.store((Int(1) + no_reserves.load()) / (Int(1) + yes_reserves.load())),
+                # helpers.py prices the option side on the reserves and
+                # outstanding tokens left after the withdrawal
+                share.store(reserves.load() * withdrawn.load() / outstanding.load() / Int(4)),
+                App.globalPut(NO_TOKENS_RESERVES,
+                              no_reserves.load() - share.load() * ratio.load()),
+                App.globalPut(YES_TOKENS_RESERVES,
+                              yes_reserves.load() - share.load() * (Int(1) / ratio.load())),
+            )),
+    )
@@ -0,0 +1,215 @@
+"""streams indexer transactions to jsonl files, resuming where the last run stopped"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from algosdk.v2client.indexer import IndexerClient
+
+PAGE_SIZE = 1000
+WORKERS = 4
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+def iter_transactions(
+    indexer: IndexerClient, page_size: int = PAGE_SIZE, **filters
+) -> Iterator[dict]:
+    """
+    Follows next-token pagination of search_transactions.
+    Args:
+        indexer: indexer client
+        page_size: transactions per request
+        filters: search_transactions filters, e.g. asset_id, min_round
+    Returns: transactions in round order, one page in memory at a time
+    """
+    next_page = None
+    while True:
+        page = indexer.search_transactions(
+            limit=page_size, next_page=next_page, **filters)
+        transactions = page.get("transactions", [])
+        yield from transactions
+        next_page = page.get("next-token")
+        if not transactions or not next_page:
+            return
+
+
+def flatten(txn: dict) -> Iterator[dict]:
+    """
+    A transaction followed by its inner transactions, which carry the
+    round, time and group of the outer one.
+    Args:
+        txn: indexer transaction record
+    Returns: records
+    """
+    yield txn
+    for inner in txn.get("inner-txns", ()):
+        inner = {"confirmed-round": txn["confirmed-round"],
+                 "round-time": txn.get("round-time", 0),
+                 "group": txn.get("group"), **inner}
+        yield from flatten(inner)
+
+
+def keyed_records(txn: dict) -> Iterator[Tuple[str, dict]]:
+    """
+    Flattens a transaction with a key per record. Inner transactions have
+    no id of their own, they are keyed by the outer id and their position,
+    e.g. <id>/0.
+    Args:
+        txn: indexer transaction record
+    Returns: keys and records
+    """
+    outer_id = txn["id"]
+    for position, record in enumerate(flatten(txn)):
+        yield (outer_id if position == 0
+               else record.get("id") or f"{outer_id}/{position - 1}"), record
+
+
+def round_ranges(first: int, last: int, parts: int) -> List[Tuple[int, int]]:
+    """
+    Splits rounds into disjoint contiguous ranges.
+    Args:
+        first: first round
+        last: last round, included
+        parts: number of ranges at most
+    Returns: (min_round, max_round) pairs in order
+    """
+    if last < first:
+        return []
+    size = -(-(last - first + 1) // max(parts, 1))
+    return [(start, min(start + size - 1, last))
+            for start in range(first, last + 1, size)]
+
+
+def read_checkpoint(path: str) -> dict:
+    """
+    Reads the progress of each export.
+    Args:
+        path: checkpoint file
+    Returns: last round and output size by export name, empty on the first run
+    """
+    try:
+        with open(path, encoding="utf8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def write_checkpoint(path: str, checkpoint: dict) -> None:
+    """
+    Replaces the checkpoint atomically.
+    Args:
+        path: checkpoint file
+        checkpoint: last round and output size by export name
+    """
+    directory = os.path.dirname(path) or "."
+    with tempfile.NamedTemporaryFile(
+            "w", dir=directory, delete=False, encoding="utf8") as file:
+        json.dump(checkpoint, file, sort_keys=True)
+    os.replace(file.name, path)
+
+
+def _progress(entry: Optional[dict]) -> Tuple[int, int]:
+    if entry is None:
+        return -1, 0
+    return entry["round"], entry["size"]
+
+
+def _export_range(
+    indexer: IndexerClient, path: str, rounds: Tuple[int, int],
+    page_size: int, filters: dict
+) -> int:
+    count = 0
+    with open(path, "w", encoding="utf8") as file:
+        for txn in iter_transactions(indexer, page_size, min_round=rounds[0],
+                                     max_round=rounds[1], **filters):
+            file.write(json.dumps(txn, separators=(",", ":")))
+            file.write("\n")
+            count += 1
+    return count
+
+
+def export(  # pylint: disable=too-many-arguments,too-many-locals
+    indexer: IndexerClient, name: str, directory: str, *,
+    workers: int = WORKERS, page_size: int = PAGE_SIZE,
+    last_round: Optional[int] = None, **filters
+) -> int:
+    """
+    Appends new transactions matching the filters to <directory>/<name>.jsonl.
+    Rounds after the checkpoint are split into one range per worker and
+    fetched in parallel into part files, which are appended in round order;
+    the checkpoint records the round and output size after each part, so an
+    interrupted run drops a part appended after the last checkpoint and
+    resumes from there.
+    Args:
+        indexer: indexer client
+        name: export name, used for the file and the checkpoint entry
+        directory: output directory
+        workers: parallel range fetches
+        page_size: transactions per request
+        last_round: last round to export, defaults to the indexer round
+        filters: search_transactions filters, e.g. asset_id
+    Returns: number of transactions appended
+    """
+    os.makedirs(directory, exist_ok=True)
+    checkpoint_path = os.path.join(directory, CHECKPOINT_FILE)
+    checkpoint = read_checkpoint(checkpoint_path)
+    exported, size = _progress(checkpoint.get(name))
+    output = os.path.join(directory, f"{name}.jsonl")
+    if os.path.exists(output) and os.path.getsize(output) > size:
+        # appended by an interrupted run before its checkpoint was written
+        with open(output, "r+b") as file:
+            file.truncate(size)
+    if last_round is None:
+        last_round = indexer.health()["round"]
+    ranges = round_ranges(exported + 1, last_round, workers)
+    if not ranges:
+        return 0
+
+    with tempfile.TemporaryDirectory(dir=directory) as parts_dir:
+        parts = [os.path.join(parts_dir, f"{index}.jsonl") for index in range(len(ranges))]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            counts = pool.map(
+                lambda part: _export_range(indexer, part[0], part[1], page_size, filters),
+                zip(parts, ranges))
+            total = 0
+            for part, rounds, count in zip(parts, ranges, counts):
+                with open(part, "rb") as source, open(output, "ab") as target:
+                    shutil.copyfileobj(source, target)
+                    target.flush()
+                    os.fsync(target.fileno())
+                    size = target.tell()
+                checkpoint[name] = {"round": rounds[1], "size": size}
+                write_checkpoint(checkpoint_path, checkpoint)
+                total += count
+    return total
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """command line entry point"""
+    parser = argparse.ArgumentParser(
+        description="Exports asset or application transactions to jsonl.")
+    parser.add_argument("--indexer", default=os.getenv(
+        "indexer_address", "https://testnet-algorand.api.purestake.io/idx2"))
+    parser.add_argument("--token", default=os.getenv("algod_token", ""))
+    parser.add_argument("--asset", type=int, action="append", default=[])
+    parser.add_argument("--app", type=int, action="append", default=[])
+    parser.add_argument("--out", default="data")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    args = parser.parse_args(argv)
+
+    indexer = IndexerClient(args.token, args.indexer, {"X-API-Key": args.token})
+    last_round = indexer.health()["round"]
+    jobs = ([(f"json_data_{asset}", {"asset_id": asset}) for asset in args.asset]
+            + [(f"app_{app}", {"application_id": app}) for app in args.app])
+    for name, filters in jobs:
+        count = export(indexer, name, args.out, workers=args.workers,
+                       page_size=args.page_size, last_round=last_round, **filters)
+        print(f"{name}: {count} new transactions up to round {last_round}")
+
+
+if __name__ == "__main__":
+    main()
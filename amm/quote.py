@@ -0,0 +1,72 @@
+"""vectorized swap quotes over many amounts and markets"""
+from typing import NamedTuple
+
+import numpy as np
+
+UINT64_MAX = np.uint64(2 ** 64 - 1)
+
+
+class Quotes(NamedTuple):
+    """batched swap quotes, all arrays share the broadcast shape"""
+    tokens_out: np.ndarray
+    effective_price: np.ndarray
+    price_impact: np.ndarray
+    valid: np.ndarray
+
+
+def quote_swaps(reserves_in, reserves_out, amounts) -> Quotes:
+    """
+    Quotes tokens_out = reserves_out * amount / (reserves_in + amount).
+    Inputs broadcast against each other. Where the contract would reject
+    the swap (zero amount, uint64 overflow, division by zero) valid is
+    False and tokens_out is 0.
+    Args:
+        reserves_in: reserves of the opposite token
+        reserves_out: reserves of the token bought
+        amounts: stablecoin amounts
+    Returns: tokens out, stablecoin paid per token, price impact
+        relative to the marginal price and the validity mask
+    """
+    reserves_in, reserves_out, amounts = np.broadcast_arrays(
+        np.asarray(reserves_in, dtype=np.uint64),
+        np.asarray(reserves_out, dtype=np.uint64),
+        np.asarray(amounts, dtype=np.uint64),
+    )
+
+    positive = amounts > 0
+    product_fits = reserves_out <= UINT64_MAX // np.where(positive, amounts, 1)
+    sum_fits = reserves_in <= UINT64_MAX - amounts
+    denominator = reserves_in + amounts
+    valid = positive & product_fits & sum_fits & (denominator > 0)
+
+    tokens_out = np.where(
+        valid, reserves_out * amounts // np.where(valid, denominator, 1), 0
+    ).astype(np.uint64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        effective_price = amounts / tokens_out.astype(np.float64)
+        marginal_price = reserves_in / reserves_out.astype(np.float64)
+        price_impact = effective_price / marginal_price - 1.0
+
+    return Quotes(tokens_out, effective_price, price_impact, valid)
+
+
+def quote_markets(yes_reserves, no_reserves, amounts, option: str) -> Quotes:
+    """
+    Quotes every amount against every market.
+    Args:
+        yes_reserves: yes token reserves, one per market
+        no_reserves: no token reserves, one per market
+        amounts: candidate stablecoin amounts
+        option: string either yes or no option
+    Returns: quotes of shape (markets, amounts)
+    """
+    yes_reserves = np.asarray(yes_reserves, dtype=np.uint64)[:, np.newaxis]
+    no_reserves = np.asarray(no_reserves, dtype=np.uint64)[:, np.newaxis]
+    amounts = np.asarray(amounts, dtype=np.uint64)[np.newaxis, :]
+
+    if option == "yes":
+        return quote_swaps(no_reserves, yes_reserves, amounts)
+    if option == "no":
+        return quote_swaps(yes_reserves, no_reserves, amounts)
+    raise ValueError(f"unknown option {option!r}")
@@ -0,0 +1,359 @@
+"""off-chain reference simulator of the amm state machine"""
+from typing import Dict, Optional, Union
+
+from amm.contracts import keys
+from amm.state import MarketState
+
+UINT64_MAX = 2 ** 64 - 1
+
+_STATE_FIELDS = (
+    keys.TOKEN_FUNDING_RESERVES, keys.POOL_FUNDING_RESERVES, keys.RESULT,
+    keys.POOL_TOKEN_KEY, keys.POOL_TOKENS_OUTSTANDING_KEY,
+    keys.YES_TOKEN_KEY, keys.YES_TOKENS_OUTSTANDING_KEY, keys.YES_TOKENS_RESERVES,
+    keys.NO_TOKEN_KEY, keys.NO_TOKENS_OUTSTANDING_KEY, keys.NO_TOKENS_RESERVES,
+)
+
+
+class SimulationError(Exception):
+    """raised where the approval program would reject the call"""
+
+
+def _add(left: int, right: int) -> int:
+    result = left + right
+    if result > UINT64_MAX:
+        raise SimulationError("+ overflowed")
+    return result
+
+
+def _sub(left: int, right: int) -> int:
+    if right > left:
+        raise SimulationError("- would result negative")
+    return left - right
+
+
+def _mul(left: int, right: int) -> int:
+    result = left * right
+    if result > UINT64_MAX:
+        raise SimulationError("* overflowed")
+    return result
+
+
+def _div(left: int, right: int) -> int:
+    if right == 0:
+        raise SimulationError("/ 0")
+    return left // right
+
+
+def swap_out(reserves_in: int, reserves_out: int, amount: int) -> int:
+    """
+    Tokens received for a swap, as computed by mint_and_send_*_token.
+    Args:
+        reserves_in: reserves of the opposite token
+        reserves_out: reserves of the token bought
+        amount: stablecoin amount
+    Returns: tokens out
+    """
+    return _div(_mul(reserves_out, amount), _add(reserves_in, amount))
+
+
+class MarketSimulator:  # pylint: disable=too-many-instance-attributes
+    """
+    Reproduces the global state transitions of approval_program.
+    Every call is atomic: when the contract would reject, SimulationError
+    is raised and the state is left untouched.
+    """
+
+    __slots__ = (
+        "creator", "token_funding_key", "min_increment_key",
+        "token_funding_reserves", "pool_funding_reserves", "result",
+        "pool_token_key", "pool_tokens_outstanding_key",
+        "yes_token_key", "yes_tokens_outstanding_key", "yes_tokens_reserves",
+        "no_token_key", "no_tokens_outstanding_key", "no_tokens_reserves",
+        "funding_balance", "pool_balance", "yes_balance", "no_balance",
+    )
+
+    def __init__(self, creator: str, funding_token: int, min_increment: int):
+        self.creator = creator
+        self.token_funding_key = funding_token
+        self.min_increment_key = min_increment
+        self.token_funding_reserves = 0
+        self.pool_funding_reserves = 0
+        self.result = 0
+        self.pool_token_key: Optional[int] = None
+        self.pool_tokens_outstanding_key = 0
+        self.yes_token_key: Optional[int] = None
+        self.yes_tokens_outstanding_key = 0
+        self.yes_tokens_reserves = 0
+        self.no_token_key: Optional[int] = None
+        self.no_tokens_outstanding_key = 0
+        self.no_tokens_reserves = 0
+        # asset holdings of the application account
+        self.funding_balance = 0
+        self.pool_balance = 0
+        self.yes_balance = 0
+        self.no_balance = 0
+
+    @classmethod
+    def from_global_state(
+        cls, state: Union[MarketState, Dict[str, Union[int, str]]],
+        funding_balance: int, supply: int = keys.TOKEN_DEFAULT_AMOUNT
+    ) -> "MarketSimulator":
+        """
+        Builds a simulator from decoded on-chain global state.
+        Args:
+            state: market state, or global state keyed by key name
+            funding_balance: stablecoin balance of the application account
+            supply: total supply of the pool, yes and no tokens
+        Returns: simulator
+        """
+        sim = cls(state[keys.CREATOR_KEY], state[keys.TOKEN_FUNDING_KEY],
+                  state[keys.MIN_INCREMENT_KEY])
+        # attributes are named after the global state keys
+        for name in _STATE_FIELDS:
+            if name in state:
+                setattr(sim, name, state[name])
+        sim.funding_balance = funding_balance
+        if sim.pool_token_key is not None:
+            sim.pool_balance = supply - sim.pool_tokens_outstanding_key
+            sim.yes_balance = supply - sim.yes_tokens_outstanding_key
+            sim.no_balance = supply - sim.no_tokens_outstanding_key
+        return sim
+
+    def copy(self) -> "MarketSimulator":
+        """returns an independent copy for what-if analysis"""
+        sim = MarketSimulator.__new__(MarketSimulator)
+        for name in self.__slots__:
+            setattr(sim, name, getattr(self, name))
+        return sim
+
+    def global_state(self) -> Dict[str, Union[int, str]]:
+        """
+        Global state as stored by the contract.
+        Returns: state keyed by key name
+        """
+        state = {
+            keys.CREATOR_KEY: self.creator,
+            keys.TOKEN_FUNDING_KEY: self.token_funding_key,
+            keys.MIN_INCREMENT_KEY: self.min_increment_key,
+            keys.TOKEN_FUNDING_RESERVES: self.token_funding_reserves,
+            keys.POOL_FUNDING_RESERVES: self.pool_funding_reserves,
+            keys.RESULT: self.result,
+        }
+        if self.pool_token_key is not None:
+            state.update({
+                keys.POOL_TOKEN_KEY: self.pool_token_key,
+                keys.POOL_TOKENS_OUTSTANDING_KEY: self.pool_tokens_outstanding_key,
+                keys.YES_TOKEN_KEY: self.yes_token_key,
+                keys.YES_TOKENS_OUTSTANDING_KEY: self.yes_tokens_outstanding_key,
+                keys.YES_TOKENS_RESERVES: self.yes_tokens_reserves,
+                keys.NO_TOKEN_KEY: self.no_token_key,
+                keys.NO_TOKENS_OUTSTANDING_KEY: self.no_tokens_outstanding_key,
+                keys.NO_TOKENS_RESERVES: self.no_tokens_reserves,
+            })
+        return state
+
+    def market_state(self) -> MarketState:
+        """
+        Global state as a typed snapshot.
+        Returns: market state
+        """
+        return MarketState(**self.global_state())
+
+    def _require_setup(self):
+        if self.pool_token_key is None:
+            raise SimulationError("amm is not set up")
+
+    def setup(
+        self, pool_token: int, yes_token: int, no_token: int,
+        supply: int = keys.TOKEN_DEFAULT_AMOUNT
+    ) -> None:
+        """
+        Creates pool, yes and no tokens.
+        Args:
+            pool_token: id of the created pool token
+            yes_token: id of the created yes token
+            no_token: id of the created no token
+            supply: total supply of each created token
+        """
+        if self.pool_token_key is not None:
+            raise SimulationError("amm is already set up")
+        self.pool_token_key = pool_token
+        self.yes_token_key = yes_token
+        self.no_token_key = no_token
+        self.pool_tokens_outstanding_key = 0
+        self.yes_tokens_outstanding_key = 0
+        self.yes_tokens_reserves = 0
+        self.no_tokens_outstanding_key = 0
+        self.no_tokens_reserves = 0
+        self.pool_balance = self.yes_balance = self.no_balance = supply
+
+    def supply(self, amount: int) -> int:
+        """
+        Supply liquidity to the pool.
+        Args:
+            amount: stablecoin amount
+        Returns: pool tokens sent to the supplier
+        """
+        self._require_setup()
+        if amount <= 0 or amount < self.min_increment_key:
+            raise SimulationError("assert failed")
+        funding_balance = _add(self.funding_balance, amount)
+
+        no_reserves = self.no_tokens_reserves
+        yes_reserves = self.yes_tokens_reserves
+        pool_reserves = self.pool_funding_reserves
+        outstanding = self.pool_tokens_outstanding_key
+
+        ratio = _div(_add(1, no_reserves), _add(1, yes_reserves))
+        if pool_reserves > 0:
+            minted = _div(_mul(amount, outstanding), pool_reserves)
+        else:
+            minted = amount
+        pool_balance = _sub(self.pool_balance, minted)
+        outstanding = _add(outstanding, minted)
+        quarter = amount // 4
+        no_reserves = _add(_mul(ratio, quarter), no_reserves)
+        yes_reserves = _add(_mul(_div(1, ratio), quarter), yes_reserves)
+        pool_reserves = _add(pool_reserves, amount)
+
+        self.funding_balance = funding_balance
+        self.pool_balance = pool_balance
+        self.pool_tokens_outstanding_key = outstanding
+        self.no_tokens_reserves = no_reserves
+        self.yes_tokens_reserves = yes_reserves
+        self.pool_funding_reserves = pool_reserves
+        return minted
+
+    def swap(self, option: str, amount: int) -> int:
+        """
+        Swap stable for an AMM option.
+        Args:
+            option: string either yes or no option
+            amount: stablecoin amount
+        Returns: option tokens sent to the buyer
+        """
+        self._require_setup()
+        if amount <= 0:
+            raise SimulationError("assert failed")
+        funding_balance = _add(self.funding_balance, amount)
+
+        if option == "yes":
+            tokens_out = swap_out(
+                self.no_tokens_reserves, self.yes_tokens_reserves, amount)
+            bought = _add(self.yes_tokens_outstanding_key, tokens_out)
+            reserves = _sub(self.yes_tokens_reserves, tokens_out)
+            balance = _sub(self.yes_balance, tokens_out)
+            other = self.no_tokens_outstanding_key
+        elif option == "no":
+            tokens_out = swap_out(
+                self.yes_tokens_reserves, self.no_tokens_reserves, amount)
+            bought = _add(self.no_tokens_outstanding_key, tokens_out)
+            reserves = _sub(self.no_tokens_reserves, tokens_out)
+            balance = _sub(self.no_balance, tokens_out)
+            other = self.yes_tokens_outstanding_key
+        else:
+            raise SimulationError("reject")
+
+        token_reserves = self.token_funding_reserves
+        if bought > other:
+            token_reserves = _mul(bought, 2)
+        pool_reserves = _sub(funding_balance, token_reserves)
+
+        if option == "yes":
+            self.yes_tokens_outstanding_key = bought
+            self.yes_tokens_reserves = reserves
+            self.yes_balance = balance
+        else:
+            self.no_tokens_outstanding_key = bought
+            self.no_tokens_reserves = reserves
+            self.no_balance = balance
+        self.funding_balance = funding_balance
+        self.token_funding_reserves = token_reserves
+        self.pool_funding_reserves = pool_reserves
+        return tokens_out
+
+    def withdraw(self, pool_token_amount: int) -> int:
+        """
+        Withdraw liquidity from the pool.
+        Args:
+            pool_token_amount: pool tokens returned to the amm
+        Returns: stablecoin sent to the supplier
+        """
+        self._require_setup()
+        if pool_token_amount <= 0:
+            raise SimulationError("assert failed")
+        pool_balance = _add(self.pool_balance, pool_token_amount)
+
+        reserves = self.pool_funding_reserves
+        total = self.pool_tokens_outstanding_key
+        stable_out = _div(_mul(reserves, pool_token_amount), total)
+        funding_balance = _sub(self.funding_balance, stable_out)
+        reserves = _sub(reserves, stable_out)
+        total = _sub(total, pool_token_amount)
+
+        no_reserves = self.no_tokens_reserves
+        yes_reserves = self.yes_tokens_reserves
+        if self.result == 0:
+            ratio = _div(_add(1, no_reserves), _add(1, yes_reserves))
+            # reserves and total are read again after they were updated
+            share = _div(_div(_mul(reserves, pool_token_amount), total), 4)
+            no_reserves = _sub(no_reserves, _mul(share, ratio))
+            yes_reserves = _sub(yes_reserves, _mul(share, _div(1, ratio)))
+
+        self.pool_balance = pool_balance
+        self.funding_balance = funding_balance
+        self.pool_funding_reserves = reserves
+        self.pool_tokens_outstanding_key = total
+        self.no_tokens_reserves = no_reserves
+        self.yes_tokens_reserves = yes_reserves
+        return stable_out
+
+    def set_result(self, sender: str, result: bytes) -> None:
+        """
+        Sets result of the event.
+        Args:
+            sender: caller, must be the creator
+            result: b"yes" or b"no"
+        """
+        if sender != self.creator:
+            raise SimulationError("assert failed")
+        if result == b"yes":
+            self.result = self.yes_token_key or 0
+        elif result == b"no":
+            self.result = self.no_token_key or 0
+        else:
+            raise SimulationError("reject")
+
+    def redeem(self, token_amount: int) -> int:
+        """
+        Redeems winning token for stablecoin.
+        Args:
+            token_amount: winning tokens returned to the amm
+        Returns: stablecoin sent to the holder
+        """
+        if self.result == 0 or token_amount <= 0:
+            raise SimulationError("assert failed")
+        stable_out = _mul(token_amount, 2)
+        funding_balance = _sub(self.funding_balance, stable_out)
+        token_reserves = _sub(self.token_funding_reserves, stable_out)
+
+        if self.result == self.yes_token_key:
+            self.yes_tokens_outstanding_key = _sub(
+                self.yes_tokens_outstanding_key, token_amount)
+            self.yes_balance += token_amount
+        else:
+            self.no_tokens_outstanding_key = _sub(
+                self.no_tokens_outstanding_key, token_amount)
+            self.no_balance += token_amount
+        self.funding_balance = funding_balance
+        self.token_funding_reserves = token_reserves
+        return stable_out
+
+    def delete(self, sender: str) -> None:
+        """
+        Checks that the amm may be closed.
+        Args:
+            sender: caller, must be the creator
+        """
+        if sender != self.creator or self.pool_tokens_outstanding_key != 0:
+            raise SimulationError("assert failed")
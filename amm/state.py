@@ -0,0 +1,166 @@
+"""typed snapshot of the amm global state"""
+import base64
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional
+
+from algosdk import encoding
+
+from amm.contracts import keys
+
+_UINT_FIELDS = (
+    keys.RESULT, keys.TOKEN_FUNDING_KEY, keys.TOKEN_FUNDING_RESERVES,
+    keys.POOL_FUNDING_RESERVES, keys.POOL_TOKEN_KEY, keys.POOL_TOKENS_OUTSTANDING_KEY,
+    keys.YES_TOKEN_KEY, keys.YES_TOKENS_OUTSTANDING_KEY, keys.YES_TOKENS_RESERVES,
+    keys.NO_TOKEN_KEY, keys.NO_TOKENS_OUTSTANDING_KEY, keys.NO_TOKENS_RESERVES,
+    keys.MIN_INCREMENT_KEY,
+)
+
+# algod returns keys base64 encoded, decoding the names once here saves
+# a b64decode per key and market
+_FIELD_BY_B64_KEY = {
+    base64.b64encode(name.encode()).decode(): name
+    for name in (keys.CREATOR_KEY,) + _UINT_FIELDS
+}
+_CREATOR_B64_KEY = base64.b64encode(keys.CREATOR_KEY.encode()).decode()
+
+# actions of a state delta entry
+DELTA_SET_BYTES = 1
+DELTA_SET_UINT = 2
+DELTA_DELETE = 3
+
+
+@lru_cache(maxsize=1024)
+def _address(raw: str) -> str:
+    # few accounts create markets, skip the checksum for known creators
+    return encoding.encode_address(base64.b64decode(raw))
+
+
+class MarketState:  # pylint: disable=too-many-instance-attributes
+    """
+    Global state of one amm, one attribute per key of contracts/config.py.
+    Keys the contract has not written yet, e.g. token ids before setup,
+    are None. Item access by key name is kept for code written against
+    the decoded dicts.
+    """
+
+    __slots__ = ("creator_key",) + _UINT_FIELDS
+
+    def __init__(self, **fields: Any):
+        self.creator_key: Optional[str] = fields.pop(keys.CREATOR_KEY, None)
+        self.result: Optional[int] = fields.pop(keys.RESULT, None)
+        self.token_funding_key: Optional[int] = fields.pop(keys.TOKEN_FUNDING_KEY, None)
+        self.token_funding_reserves: Optional[int] = fields.pop(
+            keys.TOKEN_FUNDING_RESERVES, None)
+        self.pool_funding_reserves: Optional[int] = fields.pop(
+            keys.POOL_FUNDING_RESERVES, None)
+        self.pool_token_key: Optional[int] = fields.pop(keys.POOL_TOKEN_KEY, None)
+        self.pool_tokens_outstanding_key: Optional[int] = fields.pop(
+            keys.POOL_TOKENS_OUTSTANDING_KEY, None)
+        self.yes_token_key: Optional[int] = fields.pop(keys.YES_TOKEN_KEY, None)
+        self.yes_tokens_outstanding_key: Optional[int] = fields.pop(
+            keys.YES_TOKENS_OUTSTANDING_KEY, None)
+        self.yes_tokens_reserves: Optional[int] = fields.pop(keys.YES_TOKENS_RESERVES, None)
+        self.no_token_key: Optional[int] = fields.pop(keys.NO_TOKEN_KEY, None)
+        self.no_tokens_outstanding_key: Optional[int] = fields.pop(
+            keys.NO_TOKENS_OUTSTANDING_KEY, None)
+        self.no_tokens_reserves: Optional[int] = fields.pop(keys.NO_TOKENS_RESERVES, None)
+        self.min_increment_key: Optional[int] = fields.pop(keys.MIN_INCREMENT_KEY, None)
+        if fields:
+            raise TypeError(f"unknown global state keys {sorted(fields)}")
+
+    @classmethod
+    def from_global_state(cls, global_state: Iterable[dict]) -> "MarketState":
+        """
+        Decodes the global state returned by algod.
+        Args:
+            global_state: global-state of application_info
+        Returns: market state
+        """
+        state = cls()
+        field_by_key = _FIELD_BY_B64_KEY
+        for entry in global_state:
+            key = entry["key"]
+            name = field_by_key.get(key)
+            if name is None:
+                continue
+            if key == _CREATOR_B64_KEY:
+                state.creator_key = _address(entry["value"]["bytes"])
+            else:
+                setattr(state, name, entry["value"]["uint"])
+        return state
+
+    @classmethod
+    def from_application_info(cls, info: dict) -> "MarketState":
+        """
+        Decodes the state of an application_info response.
+        Args:
+            info: application_info of the app
+        Returns: market state
+        """
+        return cls.from_global_state(info["params"].get("global-state", ()))
+
+    @property
+    def is_setup(self) -> bool:
+        """whether the pool, yes and no tokens were created"""
+        return self.pool_token_key is not None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Keys the contract has written.
+        Returns: values by key name
+        """
+        return {name: getattr(self, name) for name in self.__slots__
+                if getattr(self, name) is not None}
+
+    def copy(self) -> "MarketState":
+        """returns an independent copy"""
+        return MarketState(**self.as_dict())
+
+    def apply_delta(self, delta: Iterable[dict]) -> "MarketState":
+        """
+        Applies the global-state-delta of a confirmed app call.
+        Delta values are absolute, so only keys the call did not write
+        can be out of date afterwards.
+        Args:
+            delta: global-state-delta of the confirmation
+        Returns: updated copy, the state itself is left untouched
+        """
+        state = self.copy()
+        for entry in delta:
+            key = entry["key"]
+            name = _FIELD_BY_B64_KEY.get(key)
+            if name is None:
+                continue
+            value = entry["value"]
+            if value["action"] == DELTA_DELETE:
+                setattr(state, name, None)
+            elif key == _CREATOR_B64_KEY:
+                state.creator_key = _address(value["bytes"])
+            else:
+                setattr(state, name, value.get("uint", 0))
+        return state
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """value of a key, default when it is not set"""
+        value = getattr(self, name, None) if name in self.__slots__ else None
+        return default if value is None else value
+
+    def __getitem__(self, name: str) -> Any:
+        value = self.get(name)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, MarketState):
+            return NotImplemented
+        return self.as_dict() == other.as_dict()
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={value!r}" for name, value in self.as_dict().items())
+        return f"MarketState({fields})"
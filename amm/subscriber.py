@@ -0,0 +1,245 @@
+"""follows blocks and streams state changes of watched markets"""
+import asyncio
+import logging
+import threading
+from typing import (AsyncIterator, Callable, Dict, Iterable, List, NamedTuple,
+                    Optional, Tuple)
+
+from algosdk import encoding
+from algosdk.error import AlgodHTTPError, AlgodResponseError
+from algosdk.v2client.algod import AlgodClient
+
+from amm.state import MarketState
+from amm.utils.blocks import (BlockFollower, block_record, block_transactions,
+                              decode_block)
+from amm.utils.state_cache import StateCache
+
+# first application argument, as dispatched by approval_program
+METHODS = (b"setup", b"supply", b"swap", b"withdraw", b"redeem", b"result")
+
+_ON_COMPLETE_DELETE = 5
+
+# failures reading from algod, the polling thread retries the round after them
+_TRANSPORT_ERRORS = (AlgodHTTPError, AlgodResponseError, OSError)
+
+logger = logging.getLogger(__name__)
+
+
+class MarketEvent(NamedTuple):
+    """
+    A confirmed call to a watched market.
+    method is the approval_program branch: setup, supply, swap,
+    withdraw, redeem or result, delete when the market is deleted.
+    After a block that could not be decoded, each watched market is read
+    again and reported as resync, with an empty tx_id and sender.
+    """
+    app_id: int
+    round: int
+    tx_id: str
+    method: str
+    sender: str
+    args: Tuple[bytes, ...]
+    previous: MarketState
+    state: MarketState
+
+    @property
+    def changes(self) -> Dict[str, Tuple[Optional[object], Optional[object]]]:
+        """keys the call wrote, with their old and new values"""
+        before, after = self.previous.as_dict(), self.state.as_dict()
+        return {name: (before.get(name), after.get(name))
+                for name in before.keys() | after.keys()
+                if before.get(name) != after.get(name)}
+
+
+def _method(txn: dict) -> str:
+    if txn.get("apan") == _ON_COMPLETE_DELETE:
+        return "delete"
+    args = txn.get("apaa") or []
+    if args and args[0] in METHODS:
+        return args[0].decode()
+    return "call"
+
+
+class MarketSubscriber:  # pylint: disable=too-many-instance-attributes
+    """
+    Keeps the state of many markets current from the blocks alone.
+    Each round costs one block fetch whatever the number of watched
+    markets; application_info is only read when a market is watched.
+    Only top level app calls are followed, markets called by inner
+    transactions of other apps are not seen.
+    """
+
+    def __init__(
+        self, client: AlgodClient, app_ids: Iterable[int] = (),
+        cache: Optional[StateCache] = None, backoff: float = 1.0
+    ):
+        self.client = client
+        self.cache = cache
+        self.backoff = backoff
+        self.follower = BlockFollower(client)
+        self.states: Dict[int, MarketState] = {}
+        self._callbacks: List[Callable[[MarketEvent], None]] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        # markets to read again after an undecodable block, with its round
+        self._stale: Dict[int, int] = {}
+        for app_id in app_ids:
+            self.watch(app_id)
+
+    def watch(self, app_id: int) -> MarketState:
+        """
+        Starts following a market.
+        Args:
+            app_id: application id
+        Returns: its current state
+        """
+        if self.follower.next_round is None:
+            # blocks after the current round are not reflected in the read below
+            self.follower.next_round = self.client.status()["last-round"] + 1
+        state = MarketState.from_application_info(
+            self.client.application_info(app_id))
+        if self.cache is not None:
+            self.cache.put(app_id, state)
+        with self._lock:
+            self.states[app_id] = state
+        return state
+
+    def unwatch(self, app_id: int) -> None:
+        """
+        Stops following a market.
+        Args:
+            app_id: application id
+        """
+        with self._lock:
+            self.states.pop(app_id, None)
+
+    def subscribe(self, callback: Callable[[MarketEvent], None]) -> None:
+        """
+        Calls back with every event, from the polling thread.
+        A failing callback is logged and does not stop the others.
+        Args:
+            callback: event handler
+        """
+        self._callbacks.append(callback)
+
+    def poll(self) -> List[MarketEvent]:
+        """
+        Waits for the next round and applies its calls to watched markets.
+        When the block cannot be decoded, the failure is logged and every
+        watched market is read again instead, reported as resync events.
+        Returns: events of the round in block order
+        """
+        if not self._stale:
+            round_number, raw = self.follower.next_raw()
+            with self._lock:
+                try:
+                    events = self._block_events(round_number, decode_block(raw))
+                except Exception:  # pylint: disable=broad-exception-caught
+                    logger.exception("block %s could not be decoded, rereading %s watched "
+                                     "markets", round_number, len(self.states))
+                    self._stale = dict.fromkeys(self.states, round_number)
+                    events = None
+            if events is not None:
+                self._cache_round(round_number, events)
+                self._notify(events)
+                return events
+        return self._resync()
+
+    def _block_events(self, round_number: int, block: dict) -> List[MarketEvent]:
+        # called with the lock held; the states change only once the
+        # whole block was read
+        states = dict(self.states)
+        events = []
+        for tx_id, txn, stib in block_transactions(block):
+            app_id = txn.get("apid")
+            if txn.get("type") != "appl" or app_id not in states:
+                continue
+            record = block_record(txn, stib, round_number)
+            previous = states[app_id]
+            state = previous.apply_delta(record.get("global-state-delta", ()))
+            method = _method(txn)
+            if method == "delete":
+                del states[app_id]
+            else:
+                states[app_id] = state
+            events.append(MarketEvent(
+                app_id, round_number, tx_id, method,
+                encoding.encode_address(txn["snd"]),
+                tuple(txn.get("apaa") or ()), previous, state))
+        self.states = states
+        return events
+
+    def _cache_round(self, round_number: int, events: List[MarketEvent]) -> None:
+        if self.cache is None:
+            return
+        # every watched market is known as of this round, called or not
+        self.cache.observe_round(round_number)
+        with self._lock:
+            current = list(self.states.items())
+        for app_id, state in current:
+            self.cache.put(app_id, state)
+        for event in events:
+            if event.method == "delete":
+                self.cache.invalidate(event.app_id)
+
+    def _resync(self) -> List[MarketEvent]:
+        # a failed read leaves the remaining markets stale for the next poll
+        events = []
+        for app_id, round_number in list(self._stale.items()):
+            with self._lock:
+                previous = self.states.get(app_id)
+            if previous is not None:
+                event = MarketEvent(app_id, round_number, "", "resync", "", (),
+                                    previous, self.watch(app_id))
+                events.append(event)
+                self._notify([event])
+            del self._stale[app_id]
+        return events
+
+    def _notify(self, events: List[MarketEvent]) -> None:
+        for event in events:
+            for callback in self._callbacks:
+                try:
+                    callback(event)
+                except Exception:  # pylint: disable=broad-exception-caught
+                    logger.exception("market event callback %r failed on %s",
+                                     callback, event.tx_id)
+
+    def start(self) -> "MarketSubscriber":
+        """
+        Polls in a daemon thread, events reach the subscribed callbacks.
+        Returns: the subscriber
+        """
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="market-subscriber", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """stops the polling thread after the round in progress"""
+        self._stopped.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self.poll()
+            except _TRANSPORT_ERRORS:
+                # the block was not read, the follower retries the same round
+                logger.warning("reading the next block failed, retrying in %ss",
+                               self.backoff, exc_info=True)
+                self._stopped.wait(self.backoff)
+
+    async def events(self) -> AsyncIterator[MarketEvent]:
+        """
+        Streams events, polling in a worker thread.
+        Returns: async iterator of events
+        """
+        while True:
+            for event in await asyncio.to_thread(self.poll):
+                yield event
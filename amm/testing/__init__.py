@@ -0,0 +1 @@
+"""offline stand-ins for algorand services"""
@@ -0,0 +1,306 @@
+"""in-process algod answering the requests of the amm clients"""
+import base64
+import hashlib
+import re
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import msgpack
+from algosdk import account, encoding, logic
+from algosdk.error import AlgodHTTPError
+from algosdk.v2client.algod import AlgodClient
+
+from amm.testing.avm import AvmEvaluator
+from amm.testing.chain import pack_block
+from amm.testing.ledger import Ledger, LedgerError, app_global_state
+from amm.utils.account import Account
+from amm.utils.blocks import transaction_id
+
+GENESIS_ID = "local-v1"
+GENESIS_HASH = hashlib.sha256(GENESIS_ID.encode()).digest()
+CONSENSUS_VERSION = "future"
+
+# placeholder programs start with their teal version, then this marker
+PROGRAM_MARKER = b"local:"
+
+_ADDRESS_FIELDS = {"snd", "rcv", "close", "arcv", "aclose", "asnd", "rekey", "sgnr",
+                   "m", "r", "f", "c"}
+_ROUTES = [
+    ("GET", re.compile(r"/status"), "_status"),
+    ("GET", re.compile(r"/status/wait-for-block-after/(\d+)"), "_wait_for_block"),
+    ("GET", re.compile(r"/transactions/params"), "_params"),
+    ("POST", re.compile(r"/transactions"), "_send"),
+    ("GET", re.compile(r"/transactions/pending/(\w+)"), "_pending"),
+    ("POST", re.compile(r"/teal/compile"), "_compile"),
+    ("GET", re.compile(r"/accounts/(\w+)"), "_account"),
+    ("GET", re.compile(r"/applications/(\d+)"), "_application"),
+    ("GET", re.compile(r"/assets/(\d+)"), "_asset"),
+    ("GET", re.compile(r"/blocks/(\d+)"), "_block"),
+]
+
+
+def _json(value: Any, name: Optional[str] = None) -> Any:
+    """msgpack decoded fields as algod encodes them in json"""
+    if isinstance(value, dict):
+        return {key: _json(item, key) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_json(item, name) for item in value]
+    if isinstance(value, bytes):
+        if name in _ADDRESS_FIELDS and len(value) == 32:
+            return encoding.encode_address(value)
+        return base64.b64encode(value).decode()
+    return value
+
+
+def _eval_delta_json(delta: Dict[bytes, dict]) -> List[dict]:
+    return [{"key": base64.b64encode(key).decode(),
+             "value": {"action": value["at"],
+                       **({"bytes": base64.b64encode(value["bs"]).decode()}
+                          if "bs" in value else {}),
+                       **({"uint": value["ui"]} if "ui" in value else {})}}
+            for key, value in delta.items()]
+
+
+def _pending_record(applied: dict, round_number: Optional[int]) -> dict:
+    record = {"pool-error": "",
+              "txn": {"txn": _json(applied["txn"]),
+                      **({"sig": _json(applied["sig"])} if "sig" in applied else {})}}
+    if round_number is not None:
+        record["confirmed-round"] = round_number
+    if "apid" in applied:
+        record["application-index"] = applied["apid"]
+    if "caid" in applied:
+        record["asset-index"] = applied["caid"]
+    eval_delta = applied.get("dt") or {}
+    if eval_delta.get("gd"):
+        record["global-state-delta"] = _eval_delta_json(eval_delta["gd"])
+    if eval_delta.get("itx"):
+        record["inner-txns"] = [_pending_record(inner, round_number)
+                                for inner in eval_delta["itx"]]
+    return record
+
+
+def _block_txn(applied: dict) -> dict:
+    txn = {name: value for name, value in applied["txn"].items() if name not in ("gen", "gh")}
+    stib = {"txn": txn}
+    if "gen" in applied["txn"]:
+        stib["hgi"] = True
+    for name in ("sig", "apid", "caid"):
+        if name in applied:
+            stib[name] = applied[name]
+    eval_delta = applied.get("dt") or {}
+    if eval_delta:
+        stib["dt"] = dict(eval_delta)
+        if "itx" in eval_delta:
+            stib["dt"]["itx"] = [_block_txn(inner) for inner in eval_delta["itx"]]
+    return stib
+
+
+class LocalAlgod(AlgodClient):  # pylint: disable=too-many-instance-attributes
+    """
+    Stands in for algod without a network: algod_request is answered from
+    an in-memory Ledger. Every group sent is confirmed at once in a block
+    of its own; waiting for a round that has not come yet produces an
+    empty block after round_time seconds, so timeouts still elapse.
+    compile returns placeholder bytecode, programs keeps their sources;
+    the compiler_id of each node keeps cached placeholders to that node.
+    With avm, app calls run that source in the AVM interpreter instead
+    of following the contract through MarketSimulator.
+    """
+
+    def __init__(
+        self, round_time: float = 0.01, ledger: Optional[Ledger] = None, avm: bool = False
+    ):
+        super().__init__("", "http://localhost")
+        self.round_time = round_time
+        self.ledger = ledger if ledger is not None else Ledger()
+        self.round = 1
+        self.programs: Dict[bytes, str] = {}
+        # placeholders only run on the node holding their source, and are
+        # never written to disk or served to a real algod
+        self.compiler_id = f"local-algod:{uuid.uuid4().hex}"
+        if avm:
+            self.ledger.evaluate = AvmEvaluator(self.programs)
+        self.requests: Dict[str, int] = {}
+        self._blocks: Dict[int, dict] = {1: self._new_block(1, [])}
+        self._applied: Dict[str, dict] = {}
+        self._confirmed: Dict[str, int] = {}
+        self._last_round_at = time.monotonic()
+        self._condition = threading.Condition()
+
+    def cost(self, tx_id: str) -> Optional[int]:
+        """
+        Opcode cost of a confirmed app call, when it ran in the AVM.
+        Args:
+            tx_id: transaction id
+        Returns: cost, None for other transactions
+        """
+        with self._condition:
+            return (self._applied.get(tx_id) or {}).get("cost")
+
+    def create_account(self, amount: int = 100_000_000) -> Account:
+        """
+        Generates an account funded out of thin air.
+        Args:
+            amount: microalgos
+        Returns: account
+        """
+        private_key, address = account.generate_account()
+        with self._condition:
+            self.ledger.fund(address, amount)
+        return Account(private_key)
+
+    def algod_request(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self, method: str, requrl: str, params: Optional[dict] = None,
+        data: Optional[bytes] = None, headers: Optional[Dict[str, str]] = None,
+        response_format: Optional[str] = "json",
+    ) -> Any:
+        for route_method, pattern, handler in _ROUTES:
+            match = pattern.fullmatch(requrl)
+            if route_method == method and match:
+                self.requests[handler[1:]] = self.requests.get(handler[1:], 0) + 1
+                response = getattr(self, handler)(*match.groups(), data=data)
+                if handler != "_block":
+                    return response
+                if response_format == "msgpack":
+                    return pack_block(response["block"])
+                return _json(response)
+        raise AlgodHTTPError(f"{method} {requrl} is not served by LocalAlgod", 404)
+
+    def _new_block(self, round_number: int, txns: List[dict]) -> dict:
+        return {"rnd": round_number, "ts": int(time.time()), "gen": GENESIS_ID,
+                "gh": GENESIS_HASH, "txns": txns}
+
+    def _next_round(self, txns: List[dict]) -> int:
+        self.round += 1
+        self._blocks[self.round] = self._new_block(self.round, txns)
+        self._last_round_at = time.monotonic()
+        self._condition.notify_all()
+        return self.round
+
+    def _status(self, data=None) -> dict:  # pylint: disable=unused-argument
+        with self._condition:
+            return {"last-round": self.round, "last-version": CONSENSUS_VERSION,
+                    "next-version": CONSENSUS_VERSION, "next-version-round": self.round + 1,
+                    "next-version-supported": True, "stopped-at-unsupported-round": False,
+                    "catchup-time": 0, "time-since-last-round": int(
+                        (time.monotonic() - self._last_round_at) * 1e9)}
+
+    def _wait_for_block(self, round_number: str, data=None) -> dict:  # pylint: disable=unused-argument
+        with self._condition:
+            if self.round <= int(round_number):
+                self._condition.wait(self.round_time)
+            if self.round <= int(round_number):
+                self._next_round([])
+        return self._status()
+
+    def _params(self, data=None) -> dict:  # pylint: disable=unused-argument
+        with self._condition:
+            return {"consensus-version": CONSENSUS_VERSION, "fee": 0,
+                    "genesis-hash": base64.b64encode(GENESIS_HASH).decode(),
+                    "genesis-id": GENESIS_ID, "last-round": self.round,
+                    "min-fee": self.ledger.min_fee}
+
+    def _send(self, data: bytes) -> dict:
+        unpacker = msgpack.Unpacker(raw=False, strict_map_key=False)
+        unpacker.feed(data)
+        stxns = list(unpacker)
+        tx_ids = [transaction_id(stxn["txn"]) for stxn in stxns]
+        with self._condition:
+            try:
+                applied = self.ledger.apply_group(
+                    stxns, self.round + 1, GENESIS_HASH, int(time.time()))
+            except LedgerError as err:
+                raise AlgodHTTPError(
+                    f"TransactionPool.Remember: transaction {tx_ids[0]}: {err}", 400) from err
+            round_number = self._next_round([_block_txn(txn) for txn in applied])
+            for tx_id, txn in zip(tx_ids, applied):
+                self._applied[tx_id] = txn
+                self._confirmed[tx_id] = round_number
+        return {"txId": tx_ids[0]}
+
+    def _pending(self, tx_id: str, data=None) -> dict:  # pylint: disable=unused-argument
+        with self._condition:
+            applied = self._applied.get(tx_id)
+            if applied is None:
+                raise AlgodHTTPError("txn does not exist", 404)
+            return _pending_record(applied, self._confirmed.get(tx_id))
+
+    def _compile(self, data: bytes) -> dict:
+        source = data.decode("utf-8")
+        version = re.search(r"#pragma version (\d+)", source)
+        bytecode = (bytes([int(version.group(1)) if version else 1]) + PROGRAM_MARKER
+                    + hashlib.sha256(data).digest())
+        with self._condition:
+            self.programs[bytecode] = source
+        return {"hash": logic.address(bytecode),
+                "result": base64.b64encode(bytecode).decode()}
+
+    def _account(self, address: str, data=None) -> dict:  # pylint: disable=unused-argument
+        with self._condition:
+            ledger = self.ledger
+            record = ledger.accounts.get(address) or {
+                "amount": 0, "assets": {}, "created_assets": [], "created_apps": []}
+            return {
+                "address": address, "amount": record["amount"],
+                "amount-without-pending-rewards": record["amount"],
+                "min-balance": ledger.min_balance(address), "round": self.round,
+                "pending-rewards": 0, "rewards": 0, "status": "Offline",
+                "assets": [{"asset-id": asset_id, "amount": amount, "is-frozen": False}
+                           for asset_id, amount in sorted(record["assets"].items())],
+                "created-assets": [self._asset_record(asset_id)
+                                   for asset_id in record["created_assets"]],
+                "created-apps": [self._app_record(app_id) for app_id in record["created_apps"]],
+                "total-assets-opted-in": len(record["assets"]),
+                "total-created-assets": len(record["created_assets"]),
+                "total-created-apps": len(record["created_apps"]),
+                "total-apps-opted-in": 0,
+            }
+
+    def _app_record(self, app_id: int) -> dict:
+        app = self.ledger.apps[app_id]
+        return {"id": app_id, "params": {
+            "creator": app["creator"],
+            "approval-program": base64.b64encode(app["approval"]).decode(),
+            "clear-state-program": base64.b64encode(app["clear"]).decode(),
+            "global-state": app_global_state(app["global"]),
+            "global-state-schema": {"num-uint": app["global_schema"][0],
+                                    "num-byte-slice": app["global_schema"][1]},
+            "local-state-schema": {"num-uint": app["local_schema"][0],
+                                   "num-byte-slice": app["local_schema"][1]},
+        }}
+
+    def _asset_record(self, asset_id: int) -> dict:
+        asset = self.ledger.assets[asset_id]
+        params = asset["params"]
+        record = {"creator": asset["creator"], "total": params.get("t", 0),
+                  "decimals": params.get("dc", 0), "default-frozen": params.get("df", False)}
+        for field, name in (("an", "name"), ("un", "unit-name"), ("au", "url")):
+            if field in params:
+                record[name] = params[field]
+        for field, name in (("m", "manager"), ("r", "reserve"), ("f", "freeze"),
+                            ("c", "clawback")):
+            if field in params:
+                record[name] = encoding.encode_address(params[field])
+        return {"index": asset_id, "params": record}
+
+    def _application(self, app_id: str, data=None) -> dict:  # pylint: disable=unused-argument
+        with self._condition:
+            if int(app_id) not in self.ledger.apps:
+                raise AlgodHTTPError("application does not exist", 404)
+            return self._app_record(int(app_id))
+
+    def _asset(self, asset_id: str, data=None) -> dict:  # pylint: disable=unused-argument
+        with self._condition:
+            if int(asset_id) not in self.ledger.assets:
+                raise AlgodHTTPError("asset does not exist", 404)
+            return self._asset_record(int(asset_id))
+
+    def _block(self, round_number: str, data=None) -> dict:  # pylint: disable=unused-argument
+        with self._condition:
+            block = self._blocks.get(int(round_number))
+            if block is None:
+                raise AlgodHTTPError(f"ledger does not have entry {round_number}", 404)
+            return {"block": block}
@@ -0,0 +1,573 @@
+"""interpreter running teal source against the local ledger"""
+import hashlib
+from collections import Counter
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from algosdk import encoding
+
+from amm.testing.ledger import AppCall, LedgerError
+from amm.utils.assembler import parse_bytes, parse_int, split_teal
+
+Value = Union[int, bytes]
+
+UINT64_MAX = 2 ** 64 - 1
+APP_CALL_BUDGET = 700
+MAX_STACK_DEPTH = 1000
+MAX_CALLSTACK_DEPTH = 8
+MAX_KEY_LENGTH = 64
+MAX_KEY_VALUE_LENGTH = 128
+
+# everything else costs 1
+OPCODE_COSTS = {"sha256": 35, "sha512_256": 45}
+
+TYPE_ENUMS = {"pay": 1, "keyreg": 2, "acfg": 3, "axfer": 4, "afrz": 5, "appl": 6}
+_TYPES_BY_ENUM = {value: name for name, value in TYPE_ENUMS.items()}
+_ZERO_ADDRESS = bytes(32)
+
+# transaction fields readable with txn, gtxn and itxn: msgpack name and
+# whether the field holds an address, is an array or is a byte string
+_TXN_FIELDS = {
+    "Sender": ("snd", "address"), "Fee": ("fee", "uint"),
+    "FirstValid": ("fv", "uint"), "LastValid": ("lv", "uint"),
+    "Note": ("note", "bytes"), "Lease": ("lx", "bytes"),
+    "Receiver": ("rcv", "address"), "Amount": ("amt", "uint"),
+    "CloseRemainderTo": ("close", "address"), "RekeyTo": ("rekey", "address"),
+    "XferAsset": ("xaid", "uint"), "AssetAmount": ("aamt", "uint"),
+    "AssetSender": ("asnd", "address"), "AssetReceiver": ("arcv", "address"),
+    "AssetCloseTo": ("aclose", "address"), "ConfigAsset": ("caid", "uint"),
+    "ApplicationID": ("apid", "uint"), "OnCompletion": ("apan", "uint"),
+    "ApplicationArgs": ("apaa", "array"), "Assets": ("apas", "array"),
+    "Applications": ("apfa", "array"), "Accounts": ("apat", "array"),
+}
+_CONFIG_FIELDS = {
+    "ConfigAssetTotal": ("t", "uint"), "ConfigAssetDecimals": ("dc", "uint"),
+    "ConfigAssetDefaultFrozen": ("df", "uint"), "ConfigAssetUnitName": ("un", "string"),
+    "ConfigAssetName": ("an", "string"), "ConfigAssetURL": ("au", "string"),
+    "ConfigAssetMetadataHash": ("am", "bytes"), "ConfigAssetManager": ("m", "address"),
+    "ConfigAssetReserve": ("r", "address"), "ConfigAssetFreeze": ("f", "address"),
+    "ConfigAssetClawback": ("c", "address"),
+}
+
+
+class AvmError(LedgerError):
+    """the program failed or rejected the call"""
+
+
+class Instruction(NamedTuple):
+    """one parsed line of teal"""
+    op: str
+    args: Tuple
+    line: int
+
+
+class Program(NamedTuple):
+    """parsed teal, labels resolve to instruction indexes"""
+    version: int
+    instructions: List[Instruction]
+    labels: Dict[str, int]
+
+
+@lru_cache(maxsize=64)
+def parse(source: str) -> Program:
+    """
+    Parses teal source.
+    Args:
+        source: teal text as compileTeal produces it
+    Returns: program
+    """
+    version, statements, labels = split_teal(source)
+    instructions: List[Instruction] = []
+    for number, op, rest in statements:
+        if op in ("byte", "pushbytes"):
+            args: Tuple = (parse_bytes(rest),)
+        elif op in ("int", "pushint"):
+            args = (parse_int(rest),)
+        elif op == "addr":
+            args = (encoding.decode_address(rest),)
+        else:
+            args = tuple(rest.split()) if rest else ()
+        instructions.append(Instruction(op, args, number))
+    return Program(1 if version is None else version, instructions, labels)
+
+
+def _uint(value: Value) -> int:
+    if not isinstance(value, int):
+        raise AvmError("expected uint64, got bytes")
+    return value
+
+
+def _bytes(value: Value) -> bytes:
+    if not isinstance(value, bytes):
+        raise AvmError("expected bytes, got uint64")
+    return value
+
+
+def _check(value: int, op: str) -> int:
+    if value > UINT64_MAX:
+        raise AvmError(f"{op} overflowed")
+    if value < 0:
+        raise AvmError(f"{op} would result negative")
+    return value
+
+
+def _div(left: int, right: int) -> int:
+    if right == 0:
+        raise AvmError("/ 0")
+    return left // right
+
+
+def _mod(left: int, right: int) -> int:
+    if right == 0:
+        raise AvmError("% 0")
+    return left % right
+
+
+_ARITHMETIC: Dict[str, Callable[[int, int], int]] = {
+    "+": lambda a, b: _check(a + b, "+"), "-": lambda a, b: _check(a - b, "-"),
+    "*": lambda a, b: _check(a * b, "*"), "/": _div, "%": _mod,
+    "<": lambda a, b: int(a < b), ">": lambda a, b: int(a > b),
+    "<=": lambda a, b: int(a <= b), ">=": lambda a, b: int(a >= b),
+    "&&": lambda a, b: int(bool(a and b)), "||": lambda a, b: int(bool(a or b)),
+    "|": lambda a, b: a | b, "&": lambda a, b: a & b, "^": lambda a, b: a ^ b,
+}
+_HASHES = {"sha256": lambda data: hashlib.sha256(data).digest(),
+           "sha512_256": lambda data: hashlib.new("sha512_256", data).digest()}
+
+
+def _txn_field(  # pylint: disable=too-many-return-statements,too-many-branches
+    txn: dict, field: str, index: Optional[int], group_index: int,
+    applied: Optional[dict] = None
+) -> Value:
+    if field == "GroupIndex":
+        return group_index
+    if field == "TypeEnum":
+        return TYPE_ENUMS.get(txn.get("type", ""), 0)
+    if field == "Type":
+        return txn.get("type", "").encode()
+    if field == "NumAppArgs":
+        return len(txn.get("apaa") or [])
+    if field in ("NumAccounts", "NumAssets", "NumApplications"):
+        name = {"NumAccounts": "apat", "NumAssets": "apas", "NumApplications": "apfa"}[field]
+        return len(txn.get(name) or [])
+    if field == "CreatedAssetID":
+        return (applied or {}).get("caid", 0)
+    if field == "CreatedApplicationID":
+        return (applied or {}).get("apid", 0)
+    if field in _CONFIG_FIELDS:
+        name, kind = _CONFIG_FIELDS[field]
+        value = (txn.get("apar") or {}).get(name)
+        return _default(value, kind)
+    if field not in _TXN_FIELDS:
+        raise AvmError(f"unsupported txn field {field}")
+    name, kind = _TXN_FIELDS[field]
+    if kind == "array":
+        values = list(txn.get(name) or [])
+        if name == "apat":
+            values = [txn["snd"]] + values
+        elif name == "apfa":
+            values = [txn.get("apid", 0)] + values
+        if index is None or index >= len(values):
+            raise AvmError(f"invalid {field} index {index}")
+        return values[index]
+    return _default(txn.get(name), kind)
+
+
+def _default(value, kind: str) -> Value:
+    if kind == "uint":
+        return int(value or 0)
+    if kind == "address":
+        return value or _ZERO_ADDRESS
+    if kind == "string":
+        return (value or "").encode()
+    return value or b""
+
+
+def _set_inner_field(txn: dict, field: str, value: Value) -> None:
+    if field == "TypeEnum":
+        if _uint(value) not in _TYPES_BY_ENUM:
+            raise AvmError(f"unknown type enum {value}")
+        txn["type"] = _TYPES_BY_ENUM[value]
+        return
+    if field == "Type":
+        txn["type"] = _bytes(value).decode()
+        return
+    if field in _CONFIG_FIELDS:
+        name, kind = _CONFIG_FIELDS[field]
+        target = txn.setdefault("apar", {})
+        value = _bytes(value).decode() if kind == "string" else value
+    elif field in _TXN_FIELDS and _TXN_FIELDS[field][1] != "array":
+        name, kind = _TXN_FIELDS[field]
+        target = txn
+    else:
+        raise AvmError(f"unsupported itxn_field {field}")
+    if kind == "address" and len(_bytes(value)) != 32:
+        raise AvmError(f"{field} is not an address")
+    if kind == "uint":
+        _uint(value)
+    # msgpack omits empty fields
+    if value in (0, b"", ""):
+        target.pop(name, None)
+    else:
+        target[name] = value
+
+
+class _Frame:  # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    """execution state of one program run"""
+
+    def __init__(self, program: Program, call: AppCall, budget: int):
+        self.program = program
+        self.call = call
+        self.budget = budget
+        self.cost = 0
+        self.stack: List[Value] = []
+        self.scratch: List[Value] = [0] * 256
+        self.callstack: List[int] = []
+        self.inner_group: List[dict] = []
+        self.last_group: List[dict] = []
+
+
+def execute(
+    program: Program, call: AppCall, budget: int = APP_CALL_BUDGET,
+    opcodes: Optional[Counter] = None
+) -> int:
+    """
+    Runs a program for an application call.
+    Args:
+        program: parsed teal
+        call: application call, its global state and inner transactions are updated
+        budget: opcode budget left in the group
+        opcodes: counts the executed opcodes by name when given
+    Returns: opcode cost of the run
+    """
+    frame = _Frame(program, call, budget)
+    instructions = program.instructions
+    pc = 0
+    while pc < len(instructions):
+        instruction = instructions[pc]
+        frame.cost += OPCODE_COSTS.get(instruction.op, 1)
+        if opcodes is not None:
+            opcodes[instruction.op] += 1
+        if frame.cost > frame.budget:
+            raise AvmError(f"dynamic cost budget exceeded, line {instruction.line}")
+        try:
+            jump = _step(frame, instruction, pc)
+        except AvmError as err:
+            raise AvmError(f"{err}, line {instruction.line}: {instruction.op}") from err
+        if len(frame.stack) > MAX_STACK_DEPTH:
+            raise AvmError("stack overflow")
+        if jump == _RETURN:
+            break
+        pc = pc + 1 if jump is None else jump
+    if len(frame.stack) != 1:
+        raise AvmError(f"stack finished with {len(frame.stack)} values")
+    if not _uint(frame.stack[0]):
+        raise AvmError("rejected by logic")
+    return frame.cost
+
+
+_RETURN = -1
+
+
+def _pop(frame: _Frame, count: int = 1) -> List[Value]:
+    if len(frame.stack) < count:
+        raise AvmError("stack underflow")
+    values = frame.stack[len(frame.stack) - count:]
+    del frame.stack[len(frame.stack) - count:]
+    return values
+
+
+def _label(frame: _Frame, name: str) -> int:
+    if name not in frame.program.labels:
+        raise AvmError(f"unknown label {name}")
+    return frame.program.labels[name]
+
+
+def _asset(frame: _Frame, value: int) -> int:
+    assets = frame.call.txn.get("apas") or []
+    return assets[value] if value < len(assets) else value
+
+
+def _account(frame: _Frame, value: Value) -> str:
+    if isinstance(value, int):
+        accounts = [frame.call.txn["snd"]] + list(frame.call.txn.get("apat") or [])
+        if value >= len(accounts):
+            raise AvmError(f"invalid Accounts index {value}")
+        value = accounts[value]
+    return encoding.encode_address(value)
+
+
+def _global_state(frame: _Frame, app: int) -> Dict[bytes, Value]:
+    if app in (0, frame.call.app_id):
+        return frame.call.global_state
+    apps = frame.call.txn.get("apfa") or []
+    if app <= len(apps):
+        app = apps[app - 1]
+    if app not in frame.call.ledger.apps:
+        raise AvmError(f"application {app} does not exist")
+    return frame.call.ledger.apps[app]["global"]
+
+
+def _global(frame: _Frame, field: str) -> Value:
+    call = frame.call
+    values = {
+        "MinTxnFee": lambda: call.ledger.min_fee,
+        "MinBalance": lambda: 100_000,
+        "MaxTxnLife": lambda: 1000,
+        "ZeroAddress": lambda: _ZERO_ADDRESS,
+        "GroupSize": lambda: len(call.group),
+        "LogicSigVersion": lambda: 6,
+        "Round": lambda: call.ledger.round,
+        "LatestTimestamp": lambda: call.ledger.timestamp,
+        "CurrentApplicationID": lambda: call.app_id,
+        "CurrentApplicationAddress": lambda: encoding.decode_address(call.address),
+        "CreatorAddress": lambda: encoding.decode_address(call.app["creator"]),
+        "GroupID": lambda: call.txn.get("grp", bytes(32)),
+    }
+    if field not in values:
+        raise AvmError(f"unsupported global field {field}")
+    return values[field]()
+
+
+def _step(frame: _Frame, instruction: Instruction, pc: int) -> Optional[int]:  # pylint: disable=too-many-locals
+    # pylint: disable=too-many-return-statements,too-many-branches,too-many-statements
+    op, args = instruction.op, instruction.args
+    stack = frame.stack
+    if op in ("int", "pushint", "byte", "pushbytes", "addr"):
+        stack.append(args[0])
+    elif op in _ARITHMETIC:
+        left, right = _pop(frame, 2)
+        stack.append(_ARITHMETIC[op](_uint(left), _uint(right)))
+    elif op in ("==", "!="):
+        left, right = _pop(frame, 2)
+        if type(left) is not type(right):
+            raise AvmError(f"cannot compare {type(left).__name__} to {type(right).__name__}")
+        stack.append(int((left == right) == (op == "==")))
+    elif op == "!":
+        stack.append(int(_uint(_pop(frame)[0]) == 0))
+    elif op == "~":
+        stack.append(UINT64_MAX ^ _uint(_pop(frame)[0]))
+    elif op == "mulw":
+        left, right = _pop(frame, 2)
+        product = _uint(left) * _uint(right)
+        stack.extend((product >> 64, product & UINT64_MAX))
+    elif op == "addw":
+        left, right = _pop(frame, 2)
+        total = _uint(left) + _uint(right)
+        stack.extend((total >> 64, total & UINT64_MAX))
+    elif op == "btoi":
+        value = _bytes(_pop(frame)[0])
+        if len(value) > 8:
+            raise AvmError("btoi arg too long")
+        stack.append(int.from_bytes(value, "big"))
+    elif op == "itob":
+        stack.append(_uint(_pop(frame)[0]).to_bytes(8, "big"))
+    elif op == "len":
+        stack.append(len(_bytes(_pop(frame)[0])))
+    elif op == "concat":
+        left, right = _pop(frame, 2)
+        stack.append(_bytes(left) + _bytes(right))
+    elif op in _HASHES:
+        stack.append(_HASHES[op](_bytes(_pop(frame)[0])))
+    elif op in ("substring", "extract"):
+        value = _bytes(_pop(frame)[0])
+        start, second = int(args[0]), int(args[1])
+        end = second if op == "substring" else start + (second or len(value) - start)
+        if not start <= end <= len(value):
+            raise AvmError(f"{op} range beyond the value")
+        stack.append(value[start:end])
+    elif op in ("substring3", "extract3"):
+        value, start, second = _pop(frame, 3)
+        end = _uint(second) if op == "substring3" else _uint(start) + _uint(second)
+        if not _uint(start) <= end <= len(_bytes(value)):
+            raise AvmError(f"{op} range beyond the value")
+        stack.append(value[start:end])
+    elif op == "getbyte":
+        value, index = _pop(frame, 2)
+        if _uint(index) >= len(_bytes(value)):
+            raise AvmError("getbyte index beyond the value")
+        stack.append(value[index])
+    elif op == "pop":
+        _pop(frame)
+    elif op == "dup":
+        stack.extend(_pop(frame) * 2)
+    elif op == "dup2":
+        stack.extend(_pop(frame, 2) * 2)
+    elif op == "swap":
+        left, right = _pop(frame, 2)
+        stack.extend((right, left))
+    elif op == "select":
+        first, second, condition = _pop(frame, 3)
+        stack.append(second if _uint(condition) else first)
+    elif op == "dig":
+        depth = int(args[0])
+        if depth >= len(stack):
+            raise AvmError("dig beyond the stack")
+        stack.append(stack[-1 - depth])
+    elif op == "cover":
+        depth = int(args[0])
+        if depth >= len(stack):
+            raise AvmError("cover beyond the stack")
+        stack.insert(len(stack) - 1 - depth, stack.pop())
+    elif op == "uncover":
+        depth = int(args[0])
+        if depth >= len(stack):
+            raise AvmError("uncover beyond the stack")
+        stack.append(stack.pop(-1 - depth))
+    elif op == "load":
+        stack.append(frame.scratch[int(args[0])])
+    elif op == "store":
+        frame.scratch[int(args[0])] = _pop(frame)[0]
+    elif op == "loads":
+        stack.append(frame.scratch[_uint(_pop(frame)[0])])
+    elif op == "stores":
+        index, value = _pop(frame, 2)
+        frame.scratch[_uint(index)] = value
+    elif op == "b":
+        return _label(frame, args[0])
+    elif op in ("bz", "bnz"):
+        value = _uint(_pop(frame)[0])
+        if (value != 0) == (op == "bnz"):
+            return _label(frame, args[0])
+    elif op == "callsub":
+        if len(frame.callstack) >= MAX_CALLSTACK_DEPTH:
+            raise AvmError("callsub stack overflow")
+        frame.callstack.append(pc + 1)
+        return _label(frame, args[0])
+    elif op == "retsub":
+        if not frame.callstack:
+            raise AvmError("retsub with an empty call stack")
+        return frame.callstack.pop()
+    elif op == "return":
+        frame.stack[:] = _pop(frame)
+        return _RETURN
+    elif op == "assert":
+        if not _uint(_pop(frame)[0]):
+            raise AvmError("assert failed")
+    elif op == "err":
+        raise AvmError("err opcode executed")
+    else:
+        _state_step(frame, instruction)
+    return None
+
+
+def _state_step(frame: _Frame, instruction: Instruction) -> None:  # pylint: disable=too-many-locals
+    # pylint: disable=too-many-branches,too-many-statements
+    op, args = instruction.op, instruction.args
+    stack = frame.stack
+    call = frame.call
+    if op == "txn":
+        stack.append(_txn_field(call.txn, args[0], None, call.index))
+    elif op == "txna":
+        stack.append(_txn_field(call.txn, args[0], int(args[1]), call.index))
+    elif op in ("gtxn", "gtxna"):
+        index = int(args[0])
+        if index >= len(call.group):
+            raise AvmError(f"gtxn lookup {index} beyond the group")
+        stack.append(_txn_field(call.group[index], args[1],
+                                int(args[2]) if op == "gtxna" else None, index))
+    elif op in ("gtxns", "gtxnsa"):
+        index = _uint(_pop(frame)[0])
+        if index >= len(call.group):
+            raise AvmError(f"gtxns lookup {index} beyond the group")
+        stack.append(_txn_field(call.group[index], args[0],
+                                int(args[1]) if op == "gtxnsa" else None, index))
+    elif op == "global":
+        stack.append(_global(frame, args[0]))
+    elif op == "app_global_get":
+        key = _bytes(_pop(frame)[0])
+        stack.append(call.global_state.get(key, 0))
+    elif op == "app_global_get_ex":
+        app, key = _pop(frame, 2)
+        state = _global_state(frame, _uint(app))
+        found = _bytes(key) in state
+        stack.extend((state.get(key, 0), int(found)))
+    elif op == "app_global_put":
+        key, value = _pop(frame, 2)
+        if len(_bytes(key)) > MAX_KEY_LENGTH:
+            raise AvmError("key too long")
+        if isinstance(value, bytes) and len(key) + len(value) > MAX_KEY_VALUE_LENGTH:
+            raise AvmError("key and value too long")
+        call.global_state[key] = value
+    elif op == "app_global_del":
+        call.global_state.pop(_bytes(_pop(frame)[0]), None)
+    elif op == "asset_holding_get":
+        account, asset = _pop(frame, 2)
+        address = _account(frame, account)
+        asset_id = _asset(frame, _uint(asset))
+        holdings = (call.ledger.accounts.get(address) or {}).get("assets", {})
+        if args[0] == "AssetBalance":
+            stack.extend((holdings.get(asset_id, 0), int(asset_id in holdings)))
+        elif args[0] == "AssetFrozen":
+            stack.extend((0, int(asset_id in holdings)))
+        else:
+            raise AvmError(f"unsupported asset_holding_get field {args[0]}")
+    elif op == "balance":
+        address = _account(frame, _pop(frame)[0])
+        stack.append((call.ledger.accounts.get(address) or {}).get("amount", 0))
+    elif op == "min_balance":
+        stack.append(call.ledger.min_balance(_account(frame, _pop(frame)[0])))
+    elif op == "log":
+        _bytes(_pop(frame)[0])
+    elif op == "itxn_begin":
+        if frame.inner_group:
+            raise AvmError("itxn_begin without itxn_submit")
+        frame.inner_group = [{}]
+    elif op == "itxn_next":
+        if not frame.inner_group:
+            raise AvmError("itxn_next without itxn_begin")
+        frame.inner_group.append({})
+    elif op == "itxn_field":
+        if not frame.inner_group:
+            raise AvmError("itxn_field without itxn_begin")
+        _set_inner_field(frame.inner_group[-1], args[0], _pop(frame)[0])
+    elif op == "itxn_submit":
+        if not frame.inner_group:
+            raise AvmError("itxn_submit without itxn_begin")
+        group, frame.inner_group = frame.inner_group, []
+        if any("type" not in txn for txn in group):
+            raise AvmError("inner transaction without a type")
+        frame.last_group = [call.submit(txn) for txn in group]
+    elif op in ("itxn", "itxna", "gitxn", "gitxna"):
+        if not frame.last_group:
+            raise AvmError("no inner transaction submitted")
+        if op.startswith("g"):
+            position, args = int(args[0]), args[1:]
+            if position >= len(frame.last_group):
+                raise AvmError(f"gitxn lookup {position} beyond the inner group")
+        else:
+            position = len(frame.last_group) - 1
+        applied = frame.last_group[position]
+        stack.append(_txn_field(applied["txn"], args[0],
+                                int(args[1]) if op.endswith("a") else None,
+                                position, applied))
+    else:
+        raise AvmError(f"unsupported opcode {op}")
+
+
+class AvmEvaluator:  # pylint: disable=too-few-public-methods
+    """
+    Ledger evaluator running the teal source of each approval program.
+    Sources are looked up by bytecode, as LocalAlgod compiled them. The
+    opcode budget is pooled over the app calls of a group. observe, when
+    given, receives every successful call with its executed opcode counts.
+    """
+
+    def __init__(
+        self, programs: Dict[bytes, str],
+        observe: Optional[Callable[[AppCall, Counter], None]] = None
+    ):
+        self.programs = programs
+        self.observe = observe
+
+    def __call__(self, call: AppCall) -> None:
+        source = self.programs.get(call.app["approval"])
+        if source is None:
+            raise AvmError("approval program was not compiled by this node")
+        ledger = call.ledger
+        budget = APP_CALL_BUDGET * sum(txn.get("type") == "appl" for txn in call.group)
+        opcodes = None if self.observe is None else Counter()
+        call.cost = execute(parse(source), call, budget - ledger.budget_used, opcodes)
+        ledger.budget_used += call.cost
+        if self.observe is not None:
+            self.observe(call, opcodes)
@@ -0,0 +1,100 @@
+"""algod stand-in serving prepared blocks, for block following tests"""
+import base64
+
+import msgpack
+from algosdk import account
+from algosdk.transaction import PaymentTxn, SuggestedParams
+
+GENESIS_HASH = bytes(range(32))
+
+
+class Chain:
+    """algod stand-in serving prepared msgpack blocks"""
+
+    def __init__(self):
+        self.blocks = {1: []}
+        self.requests = 0
+
+    @property
+    def last_round(self):
+        """latest round"""
+        return max(self.blocks)
+
+    def add_block(self, signed_txns):
+        """appends a block with the given transactions"""
+        self.blocks[self.last_round + 1] = signed_txns
+
+    def status(self):
+        """current round"""
+        self.requests += 1
+        return {"last-round": self.last_round}
+
+    def status_after_block(self, round_number):
+        """returns at once, blocks are prepared up front"""
+        self.requests += 1
+        return {"last-round": max(self.last_round, round_number + 1)}
+
+    def block_info(self, round_number, response_format):
+        """msgpack encoded block"""
+        self.requests += 1
+        assert response_format == "msgpack"
+        txns = []
+        for signed in self.blocks.get(round_number, []):
+            if isinstance(signed, dict):
+                # already in block form, e.g. with an eval delta
+                txns.append(signed)
+                continue
+            txn = signed.transaction.dictify()
+            del txn["gh"], txn["gen"]
+            txns.append({"txn": txn, "sig": base64.b64decode(signed.signature),
+                         "hgi": True})
+        block = {"rnd": round_number, "gh": GENESIS_HASH,
+                 "gen": "testnet-v1.0", "txns": txns}
+        return pack_block(block)
+
+
+def _text(value):
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "surrogateescape")
+    return value
+
+
+def _algod_eval_delta(eval_delta: dict) -> dict:
+    encoded = dict(eval_delta)
+    if "gd" in eval_delta:
+        encoded["gd"] = {_text(key): {name: _text(field) for name, field in value.items()}
+                         for key, value in eval_delta["gd"].items()}
+    if "lg" in eval_delta:
+        encoded["lg"] = [_text(log) for log in eval_delta["lg"]]
+    if "itx" in eval_delta:
+        encoded["itx"] = [_algod_stib(inner) for inner in eval_delta["itx"]]
+    return encoded
+
+
+def _algod_stib(stib: dict) -> dict:
+    if "dt" not in stib:
+        return stib
+    return {**stib, "dt": _algod_eval_delta(stib["dt"])}
+
+
+def pack_block(block: dict) -> bytes:
+    """
+    Encodes a block response the way algod does: state keys, byte values
+    and logs go out as msgpack str even when they are not utf-8.
+    Args:
+        block: block with bytes in its eval deltas
+    Returns: body of /v2/blocks/{round}?format=msgpack
+    """
+    block = {**block, "txns": [_algod_stib(stib) for stib in block.get("txns") or []]}
+    return msgpack.packb({"block": block}, use_bin_type=True,
+                         unicode_errors="surrogateescape")
+
+
+def payments(count, first_round=1):
+    """signed payments with distinct ids"""
+    private_key, address = account.generate_account()
+    params = SuggestedParams(1000, first_round, first_round + 1000,
+                             base64.b64encode(GENESIS_HASH).decode(),
+                             "testnet-v1.0", False, min_fee=1000)
+    return [PaymentTxn(address, params, address, i).sign(private_key)
+            for i in range(count)]
@@ -0,0 +1,76 @@
+"""in-memory indexer answering search_transactions like the real one"""
+import base64
+from typing import Iterable, List, Optional
+
+
+class LocalIndexer:
+    """
+    Serves prepared transactions with next-token pagination.
+    Transactions are indexer records: a confirmed-round plus the fields
+    filtered on, asset-transfer-transaction.asset-id or application-id.
+    """
+
+    def __init__(self, transactions: Iterable[dict] = (), max_limit: int = 1000):
+        self.transactions: List[dict] = sorted(
+            transactions, key=lambda txn: txn["confirmed-round"])
+        self.max_limit = max_limit
+        self.requests = 0
+
+    @property
+    def round(self) -> int:
+        """last round holding a transaction"""
+        return self.transactions[-1]["confirmed-round"] if self.transactions else 0
+
+    def add(self, transactions: Iterable[dict]) -> None:
+        """
+        Indexes more transactions.
+        Args:
+            transactions: indexer records
+        """
+        self.transactions = sorted(
+            self.transactions + list(transactions), key=lambda txn: txn["confirmed-round"])
+
+    def health(self) -> dict:
+        """indexer status"""
+        return {"round": self.round, "is-migrating": False, "db-available": True}
+
+    def search_transactions(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self, limit: Optional[int] = None, next_page: Optional[str] = None,
+        min_round: Optional[int] = None, max_round: Optional[int] = None,
+        asset_id: Optional[int] = None, application_id: Optional[int] = None
+    ) -> dict:
+        """
+        Transactions matching the filters, in round order.
+        Args:
+            limit: page size, capped by max_limit
+            next_page: next-token of the previous page
+            min_round: first round
+            max_round: last round, included
+            asset_id: transferred or configured asset
+            application_id: called application
+        Returns: page with current-round, next-token and transactions
+        """
+        self.requests += 1
+        limit = min(limit or self.max_limit, self.max_limit)
+        start = int(base64.b64decode(next_page)) if next_page else 0
+        matches = [
+            txn for txn in self.transactions
+            if (min_round is None or txn["confirmed-round"] >= min_round)
+            and (max_round is None or txn["confirmed-round"] <= max_round)
+            and (asset_id is None or _asset(txn) == asset_id)
+            and (application_id is None
+                 or txn.get("application-transaction", {}).get("application-id")
+                 == application_id)
+        ]
+        page = matches[start:start + limit]
+        response = {"current-round": self.round, "transactions": page}
+        if page:
+            response["next-token"] = base64.b64encode(str(start + len(page)).encode()).decode()
+        return response
+
+
+def _asset(txn: dict) -> Optional[int]:
+    for field in ("asset-transfer-transaction", "asset-config-transaction"):
+        if field in txn:
+            return txn[field].get("asset-id")
+    return None
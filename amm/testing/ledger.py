@@ -0,0 +1,573 @@
+"""in-memory ledger applying transaction groups with the amm contract semantics"""
+import base64
+import copy
+from typing import Callable, Dict, List, Optional, Set, Union
+
+from algosdk import constants, encoding, logic
+from nacl.exceptions import BadSignatureError
+from nacl.signing import VerifyKey
+
+from amm.contracts import keys
+from amm.simulator import MarketSimulator, SimulationError
+from amm.state import MarketState
+
+MIN_BALANCE = 100_000
+ASSET_MIN_BALANCE = 100_000
+APP_MIN_BALANCE = 100_000
+UINT_MIN_BALANCE = 28_500
+BYTES_MIN_BALANCE = 50_000
+MAX_GROUP_SIZE = 16
+MAX_INNER_TXNS = 256
+
+NOOP, OPT_IN, CLOSE_OUT, CLEAR_STATE, UPDATE, DELETE = range(6)
+
+GlobalState = Dict[bytes, Union[int, bytes]]
+
+
+class LedgerError(Exception):
+    """transaction group rejected, the ledger is left untouched"""
+
+
+def _encode(raw: bytes) -> str:
+    return base64.b64encode(raw).decode()
+
+
+def _msgpack(fields: dict) -> bytes:
+    return base64.b64decode(encoding.msgpack_encode(fields))
+
+
+def group_id(txns: List[dict]) -> bytes:
+    """
+    Group id of transactions, as assign_group_id computes it.
+    Args:
+        txns: transaction fields as msgpack decoded
+    Returns: group id
+    """
+    hashes = [encoding.checksum(constants.txid_prefix + _msgpack(
+        {name: value for name, value in txn.items() if name != "grp"}))
+        for txn in txns]
+    return encoding.checksum(b"TG" + _msgpack({"txlist": hashes}))
+
+
+def verify_signature(stxn: dict) -> None:
+    """
+    Checks the single signature of a signed transaction.
+    Args:
+        stxn: signed transaction as msgpack decoded
+    """
+    txn = stxn["txn"]
+    if "sig" not in stxn:
+        raise LedgerError("only single signature transactions are supported")
+    if stxn.get("sgnr", txn["snd"]) != txn["snd"]:
+        # accounts are never rekeyed here
+        raise LedgerError("should have been authorized by the sender")
+    try:
+        VerifyKey(txn["snd"]).verify(constants.txid_prefix + _msgpack(txn), stxn["sig"])
+    except BadSignatureError as err:
+        raise LedgerError("invalid signature") from err
+
+
+def app_global_state(state: GlobalState) -> List[dict]:
+    """
+    Global state as application_info returns it.
+    Args:
+        state: values by raw key
+    Returns: key value entries
+    """
+    return [{"key": _encode(key),
+             "value": ({"type": 1, "bytes": _encode(value), "uint": 0}
+                       if isinstance(value, bytes) else
+                       {"type": 2, "bytes": "", "uint": value})}
+            for key, value in sorted(state.items())]
+
+
+def state_delta(before: GlobalState, after: GlobalState) -> Dict[bytes, dict]:
+    """
+    Eval delta of the keys a call changed, as blocks store it.
+    Args:
+        before: global state before the call
+        after: global state after the call
+    Returns: delta entries by raw key
+    """
+    delta = {}
+    for key in before.keys() | after.keys():
+        if key not in after:
+            delta[key] = {"at": 3}
+        elif before.get(key) != after[key]:
+            value = after[key]
+            delta[key] = ({"at": 1, "bs": value} if isinstance(value, bytes)
+                          else {"at": 2, "ui": value})
+    return delta
+
+
+def market_state(state: GlobalState) -> MarketState:
+    """
+    Decodes the raw global state of a market.
+    Args:
+        state: values by raw key
+    Returns: market state
+    """
+    return MarketState(**{
+        key.decode(): encoding.encode_address(value) if isinstance(value, bytes) else value
+        for key, value in state.items()})
+
+
+def raw_global_state(state: MarketState) -> GlobalState:
+    """
+    Encodes a market state like the contract stores it.
+    Args:
+        state: market state
+    Returns: values by raw key
+    """
+    return {name.encode(): encoding.decode_address(value) if isinstance(value, str) else value
+            for name, value in state.as_dict().items()}
+
+
+class AppCall:  # pylint: disable=too-many-instance-attributes
+    """
+    An application call being evaluated.
+    Evaluators read the group and the ledger through it, submit inner
+    transactions from the application account and replace global_state.
+    """
+
+    def __init__(self, ledger: "Ledger", group: List[dict], index: int, app_id: int):
+        self.ledger = ledger
+        self.group = group
+        self.index = index
+        self.txn = group[index]
+        self.app_id = app_id
+        self.app = ledger.apps[app_id]
+        self.address = logic.get_application_address(app_id)
+        self.global_state: GlobalState = dict(self.app["global"])
+        self.inner: List[dict] = []
+        self.cost: Optional[int] = None
+
+    @property
+    def sender(self) -> str:
+        """address of the caller"""
+        return encoding.encode_address(self.txn["snd"])
+
+    @property
+    def args(self) -> List[bytes]:
+        """application arguments"""
+        return list(self.txn.get("apaa") or [])
+
+    @property
+    def on_complete(self) -> int:
+        """on completion action"""
+        return self.txn.get("apan", NOOP)
+
+    @property
+    def creating(self) -> bool:
+        """whether the call creates the application"""
+        return not self.txn.get("apid")
+
+    def balance(self, asset_id: int, address: Optional[str] = None) -> int:
+        """
+        Asset holding of an account, 0 when it is not opted in.
+        Args:
+            asset_id: asset
+            address: account, the application account by default
+        Returns: amount held
+        """
+        account = self.ledger.accounts.get(address or self.address)
+        return 0 if account is None else account["assets"].get(asset_id, 0)
+
+    def submit(self, fields: dict) -> dict:
+        """
+        Executes an inner transaction sent by the application account.
+        Without a fee field the fee comes out of the group fee credit,
+        else the app account; a fee set below the minimum must be covered
+        by the credit.
+        Args:
+            fields: transaction fields as msgpack decoded, without sender
+        Returns: applied transaction
+        """
+        ledger = self.ledger
+        ledger.inner_count += 1
+        if ledger.inner_count > MAX_INNER_TXNS:
+            raise LedgerError("too many inner transactions")
+        txn = dict(fields, snd=encoding.decode_address(self.address))
+        if "fee" not in txn:
+            if ledger.fee_credit >= ledger.min_fee:
+                ledger.fee_credit -= ledger.min_fee
+            else:
+                txn["fee"] = ledger.min_fee
+        elif txn["fee"] < ledger.min_fee:
+            if ledger.fee_credit < ledger.min_fee - txn["fee"]:
+                raise LedgerError(f"fee too small: {txn['fee']}")
+            ledger.fee_credit -= ledger.min_fee - txn["fee"]
+        applied = self.ledger.apply_txn(txn, [txn], 0)
+        self.inner.append(applied)
+        return applied
+
+
+Evaluator = Callable[[AppCall], None]
+
+
+def _btoi(value: bytes) -> int:
+    if len(value) > 8:
+        raise LedgerError("btoi arg too long")
+    return int.from_bytes(value, "big")
+
+
+def _arg(call: AppCall, index: int) -> bytes:
+    args = call.args
+    if index >= len(args):
+        raise LedgerError(f"invalid ApplicationArgs index {index}")
+    return args[index]
+
+
+def _received(call: AppCall, asset_id: Optional[int]) -> int:
+    # validate_token_received on the transaction before the call
+    if call.index == 0:
+        raise LedgerError("invalid group index")
+    txn = call.group[call.index - 1]
+    if not (txn.get("type") == "axfer" and txn["snd"] == call.txn["snd"]
+            and txn.get("arcv") == encoding.decode_address(call.address)
+            and txn.get("xaid") == asset_id and txn.get("aamt", 0) > 0):
+        raise LedgerError("assert failed")
+    return txn["aamt"]
+
+
+def _send(call: AppCall, asset_id: int, receiver: str, amount: int) -> None:
+    fields = {"type": "axfer", "xaid": asset_id,
+              "arcv": encoding.decode_address(receiver)}
+    if amount:
+        fields["aamt"] = amount
+    call.submit(fields)
+
+
+def _create_token(call: AppCall, name: str, unit: Optional[str] = None) -> int:
+    params = {"t": keys.TOKEN_DEFAULT_AMOUNT, "an": name,
+              "r": encoding.decode_address(call.address)}
+    if unit is not None:
+        params["un"] = unit
+    return call.submit({"type": "acfg", "apar": params})["caid"]
+
+
+def evaluate_market(call: AppCall) -> None:
+    """
+    Evaluates approval_program of contracts/amm.py, state transitions come
+    from MarketSimulator and transfers are submitted as inner transactions.
+    Args:
+        call: application call
+    """
+    if call.creating:
+        sim = MarketSimulator(encoding.encode_address(_arg(call, 0)),
+                              _btoi(_arg(call, 1)), _btoi(_arg(call, 2)))
+        call.global_state = raw_global_state(sim.market_state())
+        return
+    state = market_state(call.global_state)
+    try:
+        if call.on_complete == DELETE:
+            MarketSimulator.from_global_state(state, 0).delete(call.sender)
+            return
+        if call.on_complete != NOOP:
+            raise LedgerError("reject")
+        _evaluate_method(call, state)
+    except SimulationError as err:
+        raise LedgerError(str(err)) from err
+
+
+def _evaluate_method(call: AppCall, state: MarketState) -> None:
+    method = _arg(call, 0)
+    funding = call.balance(state.token_funding_key)
+    if method == b"setup":
+        if state.pool_token_key is not None or state.pool_tokens_outstanding_key is not None:
+            raise LedgerError("assert failed")
+        pool_token = _create_token(call, "PoolToken")
+        _send(call, state.token_funding_key, call.address, 0)
+        no_token = _create_token(call, "NoToken", "No")
+        _send(call, no_token, call.address, 0)
+        yes_token = _create_token(call, "YesToken", "Yes")
+        _send(call, yes_token, call.address, 0)
+        sim = MarketSimulator.from_global_state(state, funding)
+        sim.setup(pool_token, yes_token, no_token)
+    elif method == b"supply":
+        amount = _received(call, state.token_funding_key)
+        sim = MarketSimulator.from_global_state(state, funding - amount)
+        _send(call, state.pool_token_key, call.sender, sim.supply(amount))
+    elif method == b"swap":
+        amount = _received(call, state.token_funding_key)
+        option = {b"buy_yes": "yes", b"buy_no": "no"}.get(_arg(call, 1))
+        if option is None:
+            raise LedgerError("reject")
+        sim = MarketSimulator.from_global_state(state, funding - amount)
+        tokens_out = sim.swap(option, amount)
+        _send(call, state.yes_token_key if option == "yes" else state.no_token_key,
+              call.sender, tokens_out)
+    elif method == b"withdraw":
+        amount = _received(call, state.pool_token_key)
+        sim = MarketSimulator.from_global_state(state, funding)
+        _send(call, state.token_funding_key, call.sender, sim.withdraw(amount))
+    elif method == b"redeem":
+        amount = _received(call, state.result)
+        sim = MarketSimulator.from_global_state(state, funding)
+        _send(call, state.token_funding_key, call.sender, sim.redeem(amount))
+    elif method == b"result":
+        sim = MarketSimulator.from_global_state(state, funding)
+        sim.set_result(call.sender, _arg(call, 1))
+    else:
+        raise LedgerError("no branch of the approval program matched")
+    call.global_state = raw_global_state(sim.market_state())
+
+
+def _new_account() -> dict:
+    return {"amount": 0, "assets": {}, "created_assets": [], "created_apps": []}
+
+
+class Ledger:  # pylint: disable=too-many-instance-attributes
+    """
+    Accounts, assets and applications of a local network.
+    Groups are applied atomically: on any failure the ledger is restored
+    and LedgerError is raised. Application calls are evaluated by
+    evaluate, the amm contract semantics by default. Reference arrays
+    (foreign assets, accounts, apps) are not enforced.
+    """
+
+    def __init__(self, min_fee: int = constants.MIN_TXN_FEE,
+                 evaluate: Evaluator = evaluate_market):
+        self.min_fee = min_fee
+        self.evaluate = evaluate
+        self.accounts: Dict[str, dict] = {}
+        self.assets: Dict[int, dict] = {}
+        self.apps: Dict[int, dict] = {}
+        self.next_id = 1000
+        self.round = 0
+        self.timestamp = 0
+        self.fee_credit = 0
+        self.inner_count = 0
+        self.budget_used = 0
+        self._touched: Set[str] = set()
+
+    def account(self, address: str) -> dict:
+        """
+        Account record, created empty on first use.
+        Args:
+            address: account address
+        Returns: amount, asset holdings and created ids
+        """
+        self._touched.add(address)
+        return self.accounts.setdefault(address, _new_account())
+
+    def min_balance(self, address: str) -> int:
+        """
+        Minimum balance of an account.
+        Args:
+            address: account address
+        Returns: microalgos
+        """
+        account = self.accounts.get(address)
+        if account is None:
+            return MIN_BALANCE
+        total = MIN_BALANCE + ASSET_MIN_BALANCE * len(account["assets"])
+        for app_id in account["created_apps"]:
+            uints, byte_slices = self.apps[app_id]["global_schema"]
+            total += APP_MIN_BALANCE + UINT_MIN_BALANCE * uints + BYTES_MIN_BALANCE * byte_slices
+        return total
+
+    def fund(self, address: str, amount: int) -> None:
+        """
+        Credits microalgos out of thin air, like a dispenser.
+        Args:
+            address: account address
+            amount: microalgos
+        """
+        self.account(address)["amount"] += amount
+
+    def apply_group(
+        self, stxns: List[dict], round_number: int, genesis_hash: bytes,
+        timestamp: int = 0
+    ) -> List[dict]:
+        """
+        Validates and applies a group of signed transactions.
+        Args:
+            stxns: signed transactions as msgpack decoded
+            round_number: round the group is confirmed in
+            genesis_hash: hash transactions must be bound to
+            timestamp: time of the block
+        Returns: applied transactions, with created ids, eval deltas and inner transactions
+        """
+        if not stxns or len(stxns) > MAX_GROUP_SIZE:
+            raise LedgerError(f"group size {len(stxns)} out of range")
+        txns = [stxn["txn"] for stxn in stxns]
+        for stxn in stxns:
+            self._check_txn(stxn, round_number, genesis_hash)
+        if len(txns) > 1 or txns[0].get("grp"):
+            expected = group_id(txns)
+            if any(txn.get("grp") != expected for txn in txns):
+                raise LedgerError("incomplete group")
+
+        fees = sum(txn.get("fee", 0) for txn in txns)
+        if fees < self.min_fee * len(txns):
+            raise LedgerError(f"fee too small: {fees} < {self.min_fee * len(txns)}")
+        saved = copy.deepcopy((self.accounts, self.assets, self.apps, self.next_id))
+        self.round, self.timestamp = round_number, timestamp
+        self.fee_credit = fees - self.min_fee * len(txns)
+        self.inner_count = 0
+        self.budget_used = 0
+        self._touched = set()
+        try:
+            applied = [self.apply_txn(txn, txns, index) for index, txn in enumerate(txns)]
+            for stxn, record in zip(stxns, applied):
+                record.update({name: value for name, value in stxn.items() if name != "txn"})
+            self._check_min_balances()
+        except Exception:
+            self.accounts, self.assets, self.apps, self.next_id = saved
+            raise
+        return applied
+
+    def _check_txn(self, stxn: dict, round_number: int, genesis_hash: bytes) -> None:
+        txn = stxn["txn"]
+        if txn.get("gh") != genesis_hash:
+            raise LedgerError("genesis hash mismatch")
+        if not txn.get("fv", 0) <= round_number <= txn.get("lv", 0):
+            raise LedgerError(f"round {round_number} outside of {txn.get('fv')}-{txn.get('lv')}")
+        verify_signature(stxn)
+
+    def _check_min_balances(self) -> None:
+        for address in self._touched:
+            account = self.accounts.get(address)
+            if account is None:
+                continue
+            if account["amount"] < self.min_balance(address):
+                raise LedgerError(
+                    f"account {address} balance {account['amount']} below min "
+                    f"{self.min_balance(address)}")
+
+    def apply_txn(self, txn: dict, group: List[dict], index: int) -> dict:
+        """
+        Applies one transaction, outer or inner.
+        Args:
+            txn: transaction fields as msgpack decoded
+            group: transactions of its group
+            index: position in the group
+        Returns: applied transaction
+        """
+        sender = self.account(encoding.encode_address(txn["snd"]))
+        fee = txn.get("fee", 0)
+        if sender["amount"] < fee:
+            raise LedgerError("overspend: fee")
+        sender["amount"] -= fee
+        handler = {"pay": self._pay, "axfer": self._asset_transfer,
+                   "acfg": self._asset_config, "appl": self._app_call}.get(txn.get("type"))
+        if handler is None:
+            raise LedgerError(f"unsupported transaction type {txn.get('type')}")
+        applied = {"txn": txn}
+        handler(txn, group, index, applied)
+        return applied
+
+    def _pay(self, txn: dict, _group: List[dict], _index: int, _applied: dict) -> None:
+        sender_address = encoding.encode_address(txn["snd"])
+        sender = self.account(sender_address)
+        amount = txn.get("amt", 0)
+        if sender["amount"] < amount:
+            raise LedgerError(f"overspend: {sender_address} has {sender['amount']}")
+        sender["amount"] -= amount
+        self.account(encoding.encode_address(txn["rcv"]))["amount"] += amount
+        if txn.get("close"):
+            if sender["assets"] or sender["created_apps"]:
+                raise LedgerError("cannot close an account holding assets or apps")
+            self.account(encoding.encode_address(txn["close"]))["amount"] += sender["amount"]
+            del self.accounts[sender_address]
+
+    def _asset_transfer(self, txn: dict, _group: List[dict], _index: int,
+                        _applied: dict) -> None:
+        asset_id = txn.get("xaid", 0)
+        if asset_id not in self.assets:
+            raise LedgerError(f"asset {asset_id} does not exist")
+        sender_address = encoding.encode_address(txn["snd"])
+        receiver_address = encoding.encode_address(txn.get("arcv", bytes(32)))
+        sender = self.account(sender_address)
+        amount = txn.get("aamt", 0)
+        if sender_address == receiver_address and asset_id not in sender["assets"]:
+            if amount:
+                raise LedgerError("opt in with a non zero amount")
+            sender["assets"][asset_id] = 0
+            return
+        receiver = self.account(receiver_address)
+        if asset_id not in sender["assets"]:
+            raise LedgerError(f"{sender_address} is not opted in to asset {asset_id}")
+        if asset_id not in receiver["assets"]:
+            raise LedgerError(f"{receiver_address} is not opted in to asset {asset_id}")
+        if sender["assets"][asset_id] < amount:
+            raise LedgerError(f"underflow on subtracting {amount} from asset {asset_id}")
+        sender["assets"][asset_id] -= amount
+        receiver["assets"][asset_id] += amount
+        if txn.get("aclose"):
+            remainder = sender["assets"].pop(asset_id)
+            self.account(encoding.encode_address(txn["aclose"]))["assets"][asset_id] += remainder
+
+    def _asset_config(self, txn: dict, _group: List[dict], _index: int, applied: dict) -> None:
+        creator_address = encoding.encode_address(txn["snd"])
+        params = txn.get("apar") or {}
+        asset_id = txn.get("caid", 0)
+        if asset_id == 0:
+            asset_id = self.next_id
+            self.next_id += 1
+            total = params.get("t", 0)
+            self.assets[asset_id] = {"index": asset_id, "creator": creator_address,
+                                     "params": dict(params)}
+            creator = self.account(creator_address)
+            creator["assets"][asset_id] = total
+            creator["created_assets"].append(asset_id)
+            applied["caid"] = asset_id
+            return
+        asset = self.assets.get(asset_id)
+        if asset is None:
+            raise LedgerError(f"asset {asset_id} does not exist")
+        if params:
+            asset["params"].update({name: params[name] for name in ("m", "r", "f", "c")
+                                    if name in params})
+            return
+        creator = self.account(asset["creator"])
+        if creator["assets"].get(asset_id) != asset["params"].get("t", 0):
+            raise LedgerError("cannot destroy an asset the creator does not fully hold")
+        del creator["assets"][asset_id]
+        creator["created_assets"].remove(asset_id)
+        del self.assets[asset_id]
+
+    def _app_call(self, txn: dict, group: List[dict], index: int, applied: dict) -> None:
+        app_id = txn.get("apid", 0)
+        creator_address = encoding.encode_address(txn["snd"])
+        if app_id == 0:
+            app_id = self.next_id
+            self.next_id += 1
+            schema = txn.get("apgs") or {}
+            self.apps[app_id] = {
+                "id": app_id, "creator": creator_address,
+                "approval": txn.get("apap", b""), "clear": txn.get("apsu", b""),
+                "global": {}, "global_schema": (schema.get("nui", 0), schema.get("nbs", 0)),
+                "local_schema": ((txn.get("apls") or {}).get("nui", 0),
+                                 (txn.get("apls") or {}).get("nbs", 0)),
+            }
+            self.account(creator_address)["created_apps"].append(app_id)
+            applied["apid"] = app_id
+        elif app_id not in self.apps:
+            raise LedgerError(f"application {app_id} does not exist")
+
+        call = AppCall(self, group, index, app_id)
+        if call.on_complete != CLEAR_STATE:
+            self.evaluate(call)
+        self._check_schema(app_id, call.global_state)
+        delta = state_delta(self.apps[app_id]["global"], call.global_state)
+        self.apps[app_id]["global"] = call.global_state
+        eval_delta = {}
+        if delta:
+            eval_delta["gd"] = delta
+        if call.inner:
+            eval_delta["itx"] = call.inner
+        if eval_delta:
+            applied["dt"] = eval_delta
+        if call.cost is not None:
+            applied["cost"] = call.cost
+        if call.on_complete == DELETE:
+            app = self.apps.pop(app_id)
+            self.account(app["creator"])["created_apps"].remove(app_id)
+
+    def _check_schema(self, app_id: int, state: GlobalState) -> None:
+        uints, byte_slices = self.apps[app_id]["global_schema"]
+        used_bytes = sum(isinstance(value, bytes) for value in state.values())
+        if used_bytes > byte_slices or len(state) - used_bytes > uints:
+            raise LedgerError("store exceeds the global state schema")
@@ -0,0 +1,27 @@
+"""one market taken from setup to redemption, shared by the avm tests and the profiler"""
+from amm.amm_app import App
+from amm.utils.account import Account
+
+
+def setup_trade_redeem(
+    app: App, deployer: Account, stable_token: int, redeemed: int
+) -> None:
+    """
+    Sets up a created market, supplies, swaps both ways, resolves it to
+    yes and redeems yes tokens, all by the deployer.
+    Args:
+        app: created market
+        deployer: creator of the market, holding stable tokens
+        stable_token: funding token of the market
+        redeemed: yes tokens to redeem
+    """
+    state = app.setup_amm_app(funder=deployer)
+    app.opt_in_to_pool_token(deployer)
+    app.opt_in_to_yes_token(deployer)
+    app.opt_in_to_no_token(deployer)
+    app.supply(quantity=2_000_000, supplier=deployer)
+    app.swap(option="yes", quantity=100_000, supplier=deployer)
+    app.swap(option="no", quantity=100_000, supplier=deployer)
+    app.set_result(funder=deployer, second_argument=b"yes")
+    app.redeem(token_in=state.yes_token_key, token_amount=redeemed,
+               withdrawal_account=deployer, token_out=stable_token)
@@ -0,0 +1,216 @@
+"""opcode cost and size of each approval program path, diffed against a baseline"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+from collections import Counter
+from functools import partial
+from typing import Callable, Dict, List, Optional, Sequence
+
+from pyteal import Expr, Mode, compileTeal
+
+from amm.amm_app import TEAL_VERSION, App, compile_teal
+from amm.contracts.amm import approval_program, clear_program
+from amm.testing.algod import LocalAlgod
+from amm.testing.avm import APP_CALL_BUDGET, AvmEvaluator
+from amm.testing.ledger import DELETE, AppCall
+from amm.testing.lifecycle import setup_trade_redeem
+from amm.transactions import create_txns, sign_group
+from amm.utils.assembler import assemble as assemble_teal
+from amm.utils.confirmation import wait_for_confirmation
+from amm.utils.program_cache import ProgramCache
+from amm.utils.purestake_client import AlgoClient
+
+BASELINE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))), "benchmarks", "contract_profile.json")
+
+# approval program builds, profiled and stored side by side in the baseline
+VARIANTS: Dict[str, Callable[[], Expr]] = {
+    "default": approval_program,
+    "low_cost": partial(approval_program, low_cost=True),
+    "batched": partial(approval_program, batched=True),
+    "low_cost_batched": partial(approval_program, low_cost=True, batched=True),
+}
+
+# per path metrics, higher is worse
+METRICS = ("cost", "app_global_get", "inner_txns", "instructions")
+
+MAX_PROGRAM_SIZE = 2048
+MAX_EXTRA_PAGES = 3
+
+
+def path_name(call: AppCall) -> str:
+    """
+    Dispatch path of approval_program an app call takes.
+    Args:
+        call: application call
+    Returns: create, delete, the method, or swap buy_yes / swap buy_no
+    """
+    if call.creating:
+        return "create"
+    if call.on_complete == DELETE:
+        return "delete"
+    args = call.args
+    name = args[0].decode() if args else "call"
+    if name == "swap" and len(args) > 1:
+        return f"{name} {args[1].decode()}"
+    return name
+
+
+def _run_lifecycle(node: LocalAlgod, approval: bytes, clear: bytes) -> None:
+    deployer = node.create_account()
+    stable_token = AlgoClient("", client=node).create_asset(deployer)
+    params = node.suggested_params()
+    signed = sign_group(create_txns(approval, clear, stable_token, 1000,
+                                    deployer.public_key, params), deployer)
+    node.send_transaction(signed[0])
+    created = wait_for_confirmation(node, signed[0].get_txid())
+
+    app = App(node, app_id=created["application-index"], program_cache=ProgramCache())
+    app.stable_token = stable_token
+    app.update_app_address()
+    setup_trade_redeem(app, deployer, stable_token, 83_333)
+    app.withdraw(pool_token_amount=2_000_000, withdrawal_account=deployer)
+    app.close_amm(closing_account=deployer)
+
+
+def profile(
+    approval: Callable[[], Expr] = approval_program,
+    clear: Callable[[], Expr] = clear_program,
+    assemble: Optional[Callable[[str], bytes]] = assemble_teal,
+) -> dict:
+    """
+    Runs every path of a contract through the local avm.
+    The contract is compiled offline, then a market is created, set up,
+    supplied, traded both ways, resolved, redeemed, withdrawn and deleted
+    on a LocalAlgod executing the teal.
+    Args:
+        approval: function building the approval program
+        clear: function building the clear state program
+        assemble: teal to bytecode, program sizes are left out without it
+    Returns: program sizes and per path metrics
+    """
+    approval_teal = compileTeal(approval(), mode=Mode.Application, version=TEAL_VERSION)
+    clear_teal = compileTeal(clear(), mode=Mode.Application, version=TEAL_VERSION)
+
+    paths: Dict[str, dict] = {}
+
+    def observe(call: AppCall, opcodes: Counter) -> None:
+        paths[path_name(call)] = {
+            "cost": call.cost,
+            "app_global_get": opcodes["app_global_get"] + opcodes["app_global_get_ex"],
+            "inner_txns": len(call.inner),
+            "instructions": sum(opcodes.values()),
+        }
+
+    node = LocalAlgod(round_time=0)
+    node.ledger.evaluate = AvmEvaluator(node.programs, observe)
+    with contextlib.redirect_stdout(io.StringIO()):
+        _run_lifecycle(node, compile_teal(node, approval_teal), compile_teal(node, clear_teal))
+
+    report: dict = {"teal_lines": {"approval": len(approval_teal.splitlines()),
+                                   "clear": len(clear_teal.splitlines())}}
+    if assemble is not None:
+        report["size"] = {"approval": len(assemble(approval_teal)),
+                          "clear": len(assemble(clear_teal))}
+    report["paths"] = dict(sorted(paths.items()))
+    return report
+
+
+def compare(report: dict, baseline: dict) -> List[str]:
+    """
+    Regressions of a report against a baseline.
+    Args:
+        report: profile output
+        baseline: earlier profile output
+    Returns: one line per path metric or program size that grew
+    """
+    regressions = []
+    for section in ("size", "teal_lines"):
+        for name, value in report.get(section, {}).items():
+            before = baseline.get(section, {}).get(name)
+            if before is not None and value > before:
+                regressions.append(f"{name} {section}: {before} -> {value}")
+    for path, metrics in report["paths"].items():
+        before = baseline.get("paths", {}).get(path)
+        if before is None:
+            continue
+        for metric in METRICS:
+            if metrics[metric] > before.get(metric, metrics[metric]):
+                regressions.append(f"{path} {metric}: {before[metric]} -> {metrics[metric]}")
+    for path in baseline.get("paths", {}):
+        if path not in report["paths"]:
+            regressions.append(f"{path}: path no longer runs")
+    return regressions
+
+
+def format_report(report: dict, baseline: Optional[dict] = None) -> str:
+    """
+    Table of the per path metrics, with the change against a baseline.
+    Args:
+        report: profile output
+        baseline: earlier profile output
+    Returns: text
+    """
+    lines = [f"{'path':<16}" + "".join(f"{metric:>16}" for metric in METRICS)
+             + f"{'budget left':>14}"]
+    for path, metrics in report["paths"].items():
+        before = (baseline or {}).get("paths", {}).get(path, {})
+        cells = []
+        for metric in METRICS:
+            cell = str(metrics[metric])
+            if metric in before and before[metric] != metrics[metric]:
+                cell += f" ({metrics[metric] - before[metric]:+d})"
+            cells.append(f"{cell:>16}")
+        lines.append(f"{path:<16}" + "".join(cells)
+                     + f"{APP_CALL_BUDGET - metrics['cost']:>14}")
+    for section in ("size", "teal_lines"):
+        for name, value in report.get(section, {}).items():
+            lines.append(f"{name} {section}: {value}")
+    if "size" in report:
+        limit = MAX_PROGRAM_SIZE * (1 + MAX_EXTRA_PAGES)
+        lines.append(f"approval and clear use {sum(report['size'].values())} of {limit} "
+                     "bytes with every extra page")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """command line entry point"""
+    parser = argparse.ArgumentParser(
+        description="Profiles each approval program path in the local avm.")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline json file")
+    parser.add_argument("--variant", action="append", choices=sorted(VARIANTS),
+                        help="approval program build, every build by default")
+    parser.add_argument("--update", action="store_true",
+                        help="write the reports as the new baseline")
+    args = parser.parse_args(argv)
+
+    baselines: Dict[str, dict] = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf8") as file:
+            baselines = json.load(file)
+
+    regressions = []
+    for variant in args.variant or VARIANTS:
+        report = profile(VARIANTS[variant])
+        baseline = baselines.get(variant)
+        print(f"{variant}\n{format_report(report, baseline)}\n")
+        if baseline:
+            regressions += [f"{variant} {line}" for line in compare(report, baseline)]
+        baselines[variant] = report
+
+    if args.update:
+        with open(args.baseline, "w", encoding="utf8") as file:
+            json.dump(baselines, file, indent=2)
+            file.write("\n")
+        print(f"baseline written to {args.baseline}")
+        return 0
+    for line in regressions:
+        print(f"regression: {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""tests for the precompiled programs shipped in the package"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from base64 import b64encode
+from unittest import TestCase, skipUnless
+
+from dotenv import load_dotenv
+
+from amm.amm_app import PROGRAMS, build_programs, get_contracts
+from amm.utils import artifacts
+from amm.utils.artifacts import (ArtifactError, load_artifact, read_manifest,
+                                 write_artifacts)
+from amm.utils.assembler import assemble
+from amm.utils.program_cache import ProgramCache
+from amm.utils.purestake_client import AlgoClient
+
+load_dotenv()
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StandInNode:  # pylint: disable=too-few-public-methods
+    """algod stand-in compiling with the offline assembler"""
+
+    def __init__(self, compiler_id="algod:stand-in"):
+        self.compiler_id = compiler_id
+
+    def compile(self, teal):
+        """assembled bytecode in the algod response format"""
+        return {"result": b64encode(assemble(teal)).decode()}
+
+
+def imports_pyteal(code, directory=None):
+    """whether running code in a fresh interpreter imports pyteal"""
+    setup = "" if directory is None else (
+        f"import amm.utils.artifacts\namm.utils.artifacts.ARTIFACTS_DIR = {directory!r}\n")
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys\n{setup}{code}\nprint('pyteal' in sys.modules)"],
+        cwd=ROOT, capture_output=True, text=True, check=True)
+    return result.stdout.split()[-1] == "True"
+
+
+class TestArtifacts(TestCase):
+    """Class for testing the shipped programs"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.programs, versions = build_programs(StandInNode())
+        write_artifacts(self.programs, versions, self.directory)
+        shipped = artifacts.ARTIFACTS_DIR
+        artifacts.ARTIFACTS_DIR = self.directory
+        self.addCleanup(setattr, artifacts, "ARTIFACTS_DIR", shipped)
+
+    def test_manifest(self):
+        """every program is stored with the compiler that produced it"""
+        manifest = read_manifest()
+        assert sorted(manifest["programs"]) == sorted(PROGRAMS)
+        assert manifest["compiler"] == "algod:stand-in"
+        for name, (bytecode, fingerprint) in self.programs.items():
+            assert load_artifact(name, fingerprint) == bytecode, name
+
+    def test_get_contracts(self):
+        """without a client the stored programs skip generation"""
+        cache = ProgramCache()
+        approval, clear = get_contracts(None, cache, low_cost=True)
+        assert approval == self.programs["approval_low_cost"][0]
+        assert clear == self.programs["clear"][0]
+        assert cache.misses == 0
+
+    def test_algod_only(self):
+        """programs not compiled by algod are never served"""
+        programs, versions = build_programs(StandInNode("assembler"))
+        write_artifacts(programs, versions, self.directory)
+        _, fingerprint = programs["clear"]
+        assert load_artifact("clear", fingerprint) is None
+
+    def test_checked(self):
+        """a changed file fails its hash, changed sources ignore the artifact"""
+        entry = read_manifest()["programs"]["clear"]
+        assert load_artifact("clear", "changed") is None
+        with open(os.path.join(self.directory, entry["file"]), "ab") as file:
+            file.write(b"\x00")
+        with self.assertRaises(ArtifactError):
+            load_artifact("clear", entry["fingerprint"])
+
+    def test_lazy_pyteal(self):
+        """trading and deploying from stored programs leave pyteal unimported"""
+        assert not imports_pyteal("import amm.amm_app")
+        assert not imports_pyteal(
+            "from amm.amm_app import get_contracts\nget_contracts(None)", self.directory)
+        assert imports_pyteal("import amm.contracts.amm")
+
+
+class TestShippedArtifacts(TestCase):
+    """Class for checking the shipped programs against algod"""
+
+    @skipUnless(os.getenv("algod_token"), "needs an algod node")
+    def test_algod_output(self):
+        """every shipped program is what algod compiles the current sources to"""
+        client = AlgoClient(os.getenv("algod_token")).client
+        programs, _ = build_programs(client)
+        for name, (bytecode, fingerprint) in programs.items():
+            assert load_artifact(name, fingerprint) in (None, bytecode), name
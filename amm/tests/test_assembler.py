@@ -0,0 +1,107 @@
+"""tests for the offline teal assembler"""
+import json
+import os
+from base64 import b64decode
+from unittest import TestCase
+
+from pyteal import Mode, compileTeal
+
+from amm.amm_app import TEAL_VERSION, compile_cached, compile_teal
+from amm.contracts.amm import approval_program, clear_program
+from amm.utils.assembler import OPCODES, AssemblerError, assemble
+from amm.utils.program_cache import ProgramCache
+
+GOLDENS = os.path.join(os.path.dirname(__file__), "goldens")
+
+# immediate bytes following each opcode, constant blocks and pushes aside
+_IMMEDIATES = {opcode: len(kinds) for opcode, kinds in OPCODES.values()}
+_BRANCHES = {OPCODES[op][0] for op in ("bnz", "bz", "b", "callsub")}
+
+
+def load_goldens():
+    """name, teal, golden bytecode and origin of every stored golden"""
+    with open(os.path.join(GOLDENS, "assembler.json"), encoding="utf8") as file:
+        goldens = json.load(file)
+    for name, golden in goldens.items():
+        with open(os.path.join(GOLDENS, f"{name}.teal"), encoding="utf8") as file:
+            yield name, file.read(), b64decode(golden["bytecode"]), golden["origin"]
+
+
+def _uvarint(code, pc):
+    value = shift = 0
+    while True:
+        byte = code[pc]
+        value |= (byte & 0x7f) << shift
+        pc += 1
+        shift += 7
+        if byte < 0x80:
+            return value, pc
+
+
+def walk(code):
+    """offsets of every instruction and branch target of a v6 program"""
+    pc = 1
+    if code[pc] == 0x20:
+        count, pc = _uvarint(code, pc + 1)
+        for _ in range(count):
+            _, pc = _uvarint(code, pc)
+    if code[pc] == 0x26:
+        count, pc = _uvarint(code, pc + 1)
+        for _ in range(count):
+            length, pc = _uvarint(code, pc)
+            pc += length
+    starts, targets = [], []
+    while pc < len(code):
+        starts.append(pc)
+        opcode = code[pc]
+        if opcode == 0x81:
+            _, pc = _uvarint(code, pc + 1)
+        elif opcode == 0x80:
+            length, pc = _uvarint(code, pc + 1)
+            pc += length
+        elif opcode in _BRANCHES:
+            pc += 3
+            targets.append(pc + int.from_bytes(code[pc - 2:pc], "big", signed=True))
+        else:
+            pc += 1 + _IMMEDIATES.get(opcode, 0)
+    return starts, targets
+
+
+class TestAssembler(TestCase):
+    """Class for testing the offline assembler"""
+
+    def test_goldens(self):
+        """every stored program assembles byte for byte to its golden"""
+        for name, teal, bytecode, origin in load_goldens():
+            assert origin in ("algod", "spec", "assembler")
+            assert assemble(teal) == bytecode, name
+
+    def test_contract_builds(self):
+        """every build decodes to its instructions, branches land on one"""
+        for build in ({}, {"low_cost": True}, {"batched": True},
+                      {"low_cost": True, "batched": True}):
+            teal = compileTeal(approval_program(**build), mode=Mode.Application,
+                               version=TEAL_VERSION)
+            instructions = [line for line in teal.splitlines()[1:] if line
+                            and not line.endswith(":") and not line.startswith("//")]
+            starts, targets = walk(assemble(teal))
+            assert len(starts) == len(instructions)
+            assert set(targets) <= set(starts)
+
+    def test_errors(self):
+        """unknown ops, fields, labels and other versions are rejected"""
+        for teal in ("#pragma version 6\nfoo\n", "#pragma version 6\ntxn Foo\n",
+                     "#pragma version 6\nb nowhere\n", "#pragma version 5\nint 1\n",
+                     "int 1\n", "#pragma version 6\nintcblock 1\n"):
+            with self.assertRaises(AssemblerError):
+                assemble(teal)
+
+    def test_no_client(self):
+        """without a client programs are assembled locally and cached apart"""
+        cache = ProgramCache()
+        # a name with no shipped artifact, so the program is generated
+        clear = compile_cached(None, clear_program, "clear_local", cache)
+        assert clear == compile_teal(None, "#pragma version 6\nint 1\nreturn")
+        assert compile_cached(None, clear_program, "clear_local", cache) == clear
+        assert cache.misses == 1
+        assert cache.hits == 1
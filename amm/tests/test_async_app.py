@@ -0,0 +1,221 @@
+"""tests for the asyncio app"""
+from unittest import IsolatedAsyncioTestCase
+import asyncio
+import base64
+
+import msgpack
+from algosdk import account
+from algosdk.error import AlgodHTTPError
+
+from amm.async_app import AsyncApp
+from amm.utils.account import Account
+from amm.utils.async_client import AsyncAlgodClient
+from amm.utils.confirmation import ConfirmationTimeout
+from amm.testing.chain import GENESIS_HASH, pack_block
+
+
+class AsyncChain(AsyncAlgodClient):  # pylint: disable=too-many-instance-attributes
+    """client whose requests are answered by an in-memory chain"""
+
+    def __init__(self):
+        super().__init__("", "http://localhost")
+        self.blocks = {1: []}
+        self.app_balance = 0
+        self.block_errors = 0
+        self.corrupt = set()
+        self.pending = {}
+        self.queued = []
+        self.requests = {}
+        self.new_block = asyncio.Condition()
+
+    @property
+    def last_round(self):
+        """latest round"""
+        return max(self.blocks)
+
+    async def produce_block(self):
+        """confirms every queued transaction"""
+        async with self.new_block:
+            self.blocks[self.last_round + 1], self.queued = self.queued, []
+            self.new_block.notify_all()
+
+    async def algod_request(  # pylint: disable=too-many-return-statements
+            self, method, path, params=None, data=None, response_format="json"):
+        endpoint = path.split("/")[1]
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+        if path == "/status":
+            return {"last-round": self.last_round}
+        if path.startswith("/status/wait-for-block-after/"):
+            round_number = int(path.rsplit("/", 1)[1])
+            async with self.new_block:
+                await self.new_block.wait_for(lambda: self.last_round > round_number)
+            return {"last-round": self.last_round}
+        if path.startswith("/blocks/") and self.block_errors:
+            self.block_errors -= 1
+            raise AlgodHTTPError("unavailable", 503)
+        if path.startswith("/blocks/") and int(path.rsplit("/", 1)[1]) in self.corrupt:
+            return b"\xc1"
+        if path.startswith("/blocks/"):
+            block = {"rnd": int(path.rsplit("/", 1)[1]), "gh": GENESIS_HASH,
+                     "gen": "testnet-v1.0",
+                     "txns": self.blocks[int(path.rsplit("/", 1)[1])]}
+            return pack_block(block)
+        if path.startswith("/transactions/pending/"):
+            record = self.pending.get(path.rsplit("/", 1)[1])
+            if record is None:
+                raise AlgodHTTPError("not found", 404)
+            return record
+        if path.startswith("/applications/"):
+            key = base64.b64encode(b"yes_tokens_reserves").decode()
+            return {"id": int(path.rsplit("/", 1)[1]), "params": {"global-state": [
+                {"key": key, "value": {"type": 2, "bytes": "", "uint": self.last_round}}]}}
+        if path.startswith("/accounts/"):
+            return {"amount": self.app_balance, "min-balance": 100_000}
+        if path == "/transactions/params":
+            return {"fee": 0, "last-round": self.last_round,
+                    "genesis-hash": base64.b64encode(GENESIS_HASH).decode(),
+                    "genesis-id": "testnet-v1.0",
+                    "consensus-version": "future", "min-fee": 1000}
+        if path == "/transactions":
+            unpacker = msgpack.Unpacker(raw=False, strict_map_key=False)
+            unpacker.feed(data)
+            for signed in unpacker:
+                txn = signed["txn"]
+                del txn["gh"], txn["gen"]
+                self.queued.append({"txn": txn, "sig": signed["sig"], "hgi": True})
+            return {"txId": ""}
+        raise AssertionError(path)
+
+
+class TestAsyncApp(IsolatedAsyncioTestCase):
+    """Class for testing concurrent trading on many markets"""
+
+    async def test_concurrent_swaps(self):
+        """one block fetch per round for every swap in flight"""
+        client = AsyncChain()
+        trader = Account(account.generate_account()[0])
+        markets = []
+        for app_id in range(100, 110):
+            market = AsyncApp(client, app_id)
+            market.stable_token, market.pool_token = 1, 2
+            market.yes_token, market.no_token = 3, 4
+            markets.append(market)
+
+        swaps = asyncio.gather(*[
+            market.swap("yes" if i % 2 else "no", 1_000 + i, trader)
+            for market in markets for i in range(20)
+        ])
+        while len(client.queued) < 3 * 200 and not swaps.done():
+            await asyncio.sleep(0)
+        await client.produce_block()
+        confirmations = await swaps
+        await client.close()
+
+        assert len(confirmations) == 200
+        assert {c.confirmed_round for c in confirmations} == {2}
+        assert client.requests["transactions"] == 200 + 1
+        # the round current when tracking started and the confirming one
+        assert client.requests["blocks"] == 2
+        assert client.params.requests == 1
+
+    async def test_supply_funding(self):
+        """supplies only pay the app account what it lacks"""
+        client = AsyncChain()
+        supplier = Account(account.generate_account()[0])
+        market = AsyncApp(client, 100)
+        market.stable_token, market.pool_token = 1, 2
+        market.yes_token, market.no_token = 3, 4
+
+        client.app_balance = 10**6
+        supply = asyncio.ensure_future(market.supply(1_000, supplier))
+        while not client.queued:
+            await asyncio.sleep(0)
+        assert len(client.queued) == 2
+        await client.produce_block()
+        await supply
+
+        client.app_balance = 0
+        supply = asyncio.ensure_future(market.supply(1_000, supplier))
+        while not client.queued:
+            await asyncio.sleep(0)
+        assert len(client.queued) == 3
+        assert client.queued[0]["txn"]["type"] == "pay"
+        await client.produce_block()
+        await supply
+        await client.close()
+        assert client.requests["accounts"] == 2
+
+    async def test_shared_state(self):
+        """markets share cached states until a confirmation touches the app"""
+        client = AsyncChain()
+        first, second = AsyncApp(client, 100), AsyncApp(client, 100)
+        first.stable_token, first.pool_token = 1, 2
+        first.yes_token, first.no_token = 3, 4
+        trader = Account(account.generate_account()[0])
+
+        states = await asyncio.gather(*[market.get_state() for market in (first, second) * 4])
+        assert all(state is states[0] for state in states)
+        assert client.requests["applications"] == 1
+
+        swap = asyncio.ensure_future(first.swap("yes", 1_000, trader))
+        while not client.queued:
+            await asyncio.sleep(0)
+        await client.produce_block()
+        await swap
+        assert (await second.get_state()).yes_tokens_reserves == 2
+        await client.close()
+        assert client.requests["applications"] == 2
+
+    async def test_block_errors_retried(self):
+        """failed block reads are retried without failing the swaps"""
+        client = AsyncChain()
+        client.tracker.backoff = 0
+        client.block_errors = client.tracker.retries
+        market = AsyncApp(client, 100)
+        market.stable_token, market.pool_token = 1, 2
+        market.yes_token, market.no_token = 3, 4
+        trader = Account(account.generate_account()[0])
+
+        swap = asyncio.ensure_future(market.swap("yes", 1_000, trader))
+        while not client.queued:
+            await asyncio.sleep(0)
+        await client.produce_block()
+        confirmation = await swap
+        await client.close()
+        assert confirmation.confirmed_round == 2
+
+    async def test_lookup_after_retries(self):
+        """past the retries only transactions whose own lookup fails are failed"""
+        client = AsyncChain()
+        client.tracker.backoff = 0
+        client.block_errors = 10 * client.tracker.retries
+        client.pending = {"CONFIRMED": {"confirmed-round": 2}, "QUEUED": {}}
+        waits = [asyncio.ensure_future(client.tracker.track(tx_id))
+                 for tx_id in ("CONFIRMED", "QUEUED", "LOST")]
+        while not waits[0].done():
+            await asyncio.sleep(0)
+        assert len(client.tracker) == 1 and not waits[1].done()
+        del client.pending["QUEUED"]
+        confirmed, queued, lost = await asyncio.gather(*waits, return_exceptions=True)
+        await client.close()
+
+        assert confirmed.confirmed_round == 2
+        assert isinstance(lost, AlgodHTTPError)
+        assert isinstance(queued, AlgodHTTPError)
+
+    async def test_undecodable_block(self):
+        """a block that cannot be decoded is looked up around, then passed"""
+        client = AsyncChain()
+        client.corrupt = {2}
+        client.pending = {"CONFIRMED": {"confirmed-round": 2}, "WAITING": {}}
+        confirmed = asyncio.ensure_future(client.tracker.track("CONFIRMED"))
+        waiting = asyncio.ensure_future(client.tracker.track("WAITING", timeout=2))
+        while len(client.tracker) < 2:
+            await asyncio.sleep(0)
+        await client.produce_block()
+        assert (await confirmed).confirmed_round == 2
+        await client.produce_block()
+        with self.assertRaises(ConfirmationTimeout):
+            await waiting
+        await client.close()
+        assert client.requests["blocks"] == 3
@@ -0,0 +1,82 @@
+"""tests running the compiled approval program in the local avm"""
+from unittest import TestCase
+
+from algosdk.error import AlgodHTTPError
+
+from amm.amm_app import App
+from amm.testing.algod import LocalAlgod
+from amm.testing.avm import (APP_CALL_BUDGET, AvmError, execute, parse, parse_bytes,
+                             parse_int)
+from amm.testing.lifecycle import setup_trade_redeem
+from amm.utils.program_cache import ProgramCache
+from amm.utils.purestake_client import AlgoClient
+
+
+def run_lifecycle(node):
+    """create, setup, supply, swap, result and redeem on a node"""
+    deployer = node.create_account()
+    stable_token = AlgoClient("", client=node).create_asset(deployer)
+    app = App(node, program_cache=ProgramCache())
+    app.create_amm_app(token=stable_token, min_increment=1000, deployer=deployer)
+    setup_trade_redeem(app, deployer, stable_token, 50_000)
+    return app, deployer
+
+
+class TestParser(TestCase):
+    """Class for testing the teal parser"""
+
+    def test_constants(self):
+        """byte and int literals of the assembler"""
+        assert parse_bytes('"a\\x01\\n"') == b"a\x01\n"
+        assert parse_bytes("0x0aff") == b"\x0a\xff"
+        assert parse_bytes("base64 AAE=") == b"\x00\x01"
+        assert parse_bytes("b32(AE======)") == b"\x01"
+        assert parse_int("0x10") == 16
+        assert parse_int("010") == 8
+        assert parse_int("DeleteApplication") == 5
+        assert parse_int("axfer") == 4
+
+    def test_comments_and_labels(self):
+        """comments are dropped outside strings, labels resolve to indexes"""
+        program = parse('#pragma version 6\nbyte "a // b" // note\nmain:\nlen\n')
+        assert program.version == 6
+        assert program.instructions[0].args == (b"a // b",)
+        assert program.labels == {"main": 1}
+
+
+class TestAvm(TestCase):
+    """Class for testing the approval program in the avm"""
+
+    def test_matches_simulator(self):
+        """the interpreted program ends in the state the simulator predicts"""
+        results = []
+        for node in (LocalAlgod(), LocalAlgod(avm=True)):
+            app, deployer = run_lifecycle(node)
+            # fresh nodes number apps and assets alike, only the accounts differ
+            holdings = {asset["asset-id"]: asset["amount"]
+                        for asset in node.account_info(deployer.public_key)["assets"]}
+            state = app.get_state().as_dict()
+            state.pop("creator_key")
+            results.append((state, holdings))
+        assert results[0] == results[1]
+
+    def test_cost(self):
+        """every evaluated call reports a cost within the pooled budget"""
+        node = LocalAlgod(avm=True)
+        run_lifecycle(node)
+        costs = [node.cost(tx_id) for tx_id in list(node._applied)]  # pylint: disable=protected-access
+        costs = [cost for cost in costs if cost is not None]
+        assert len(costs) == 7
+        assert all(0 < cost <= 2 * APP_CALL_BUDGET for cost in costs)
+
+    def test_rejected(self):
+        """a rejecting branch and a budget overrun fail the call"""
+        node = LocalAlgod(avm=True)
+        app, deployer = run_lifecycle(node)
+        with self.assertRaises(AlgodHTTPError) as err:
+            app.set_result(funder=deployer, second_argument=b"maybe")
+        assert err.exception.code == 400
+
+        loop = parse("#pragma version 6\nloop:\nint 1\nbnz loop\nint 1\n")
+        with self.assertRaises(AvmError):
+            execute(loop, None, budget=APP_CALL_BUDGET)
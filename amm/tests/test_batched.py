@@ -0,0 +1,40 @@
+"""tests for the batched setup build"""
+from functools import partial
+from unittest import TestCase
+
+from pyteal import Mode, compileTeal
+
+from amm.amm_app import TEAL_VERSION
+from amm.contracts.amm import approval_program
+from amm.testing.profiler import profile
+from amm.tests.test_low_cost import trade
+
+
+class TestBatched(TestCase):
+    """Class for testing the batched build"""
+
+    def test_same_results(self):
+        """every step ends in the same state, alone or with the low cost helpers"""
+        default = trade()
+        assert trade(batched=True) == default
+        assert trade(low_cost=True, batched=True) == default
+
+    def test_setup(self):
+        """setup submits one inner group without opting into its own tokens"""
+        default = profile()["paths"]["setup"]
+        batched = profile(partial(approval_program, batched=True))["paths"]["setup"]
+        assert batched["inner_txns"] == 4 < default["inner_txns"]
+        assert batched["cost"] < default["cost"]
+
+    def test_trading_unchanged(self):
+        """transfers on the trading paths stay inline and cost the same"""
+        for low_cost in (False, True):
+            default = profile(partial(approval_program, low_cost=low_cost))["paths"]
+            batched = profile(partial(approval_program, low_cost=low_cost,
+                                      batched=True))["paths"]
+            for path, metrics in default.items():
+                if path != "setup":
+                    assert batched[path]["cost"] == metrics["cost"], path
+        teal = compileTeal(approval_program(batched=True), mode=Mode.Application,
+                           version=TEAL_VERSION)
+        assert "sendtoken" not in teal
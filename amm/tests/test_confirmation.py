@@ -0,0 +1,81 @@
+"""tests for the confirmation waiter"""
+from unittest import TestCase
+
+from algosdk.error import AlgodHTTPError
+
+from amm.utils.confirmation import ConfirmationTimeout, wait_for_confirmation
+
+
+class BlockClock:
+    """algod stand-in confirming a transaction at a given round"""
+
+    def __init__(self, confirm_at=None, failures=0):
+        self.round = 10
+        self.confirm_at = confirm_at
+        self.failures = failures
+        self.requests = 0
+
+    def status(self):
+        """current round"""
+        self.requests += 1
+        return {"last-round": self.round}
+
+    def status_after_block(self, round_number):
+        """advances one block"""
+        self.requests += 1
+        self.round = round_number + 1
+        return {"last-round": self.round}
+
+    def pending_transaction_info(self, tx_id):
+        """record confirmed once the round is reached"""
+        self.requests += 1
+        if self.failures:
+            self.failures -= 1
+            raise AlgodHTTPError("unavailable", 503)
+        if self.confirm_at is not None and self.round >= self.confirm_at:
+            return {"txn": tx_id, "confirmed-round": self.confirm_at, "pool-error": ""}
+        return {"txn": tx_id, "pool-error": ""}
+
+
+class TestConfirmation(TestCase):
+    """Class for testing round aware confirmation"""
+
+    def test_confirms_after_blocks(self):
+        """one pending check and one block wait per round"""
+        client = BlockClock(confirm_at=13)
+        seen = []
+
+        confirmation = wait_for_confirmation(
+            client, "TX", timeout=10, on_round=seen.append)
+
+        assert confirmation["confirmed-round"] == 13
+        assert confirmation.rounds_waited == 3
+        assert seen == [11, 12, 13]
+        assert client.requests == 1 + 4 + 3
+
+    def test_timeout_counts_rounds(self):
+        """times out only after the rounds have passed"""
+        client = BlockClock()
+
+        with self.assertRaises(ConfirmationTimeout):
+            wait_for_confirmation(client, "TX", timeout=4)
+
+        assert client.round == 14
+
+    def test_backoff(self):
+        """transient errors are retried with growing delays"""
+        client = BlockClock(confirm_at=10, failures=3)
+        delays = []
+
+        wait_for_confirmation(client, "TX", backoff=0.5,
+                              max_backoff=1.0, sleep=delays.append)
+
+        assert delays == [0.5, 1.0, 1.0]
+
+    def test_pool_error(self):
+        """pool errors are raised straight away"""
+        client = BlockClock()
+        client.pending_transaction_info = lambda tx_id: {"pool-error": "overspend"}
+
+        with self.assertRaises(RuntimeError):
+            wait_for_confirmation(client, "TX")
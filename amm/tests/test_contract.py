@@ -1,7 +1,6 @@
 """tests"""
 from unittest import TestCase
 import os
-from base64 import b64decode
 from dotenv import load_dotenv
 
 from amm.amm_app import App
@@ -40,12 +39,12 @@ class TestAmm(TestCase):
 
         assert isinstance(app_id, int), "Provide sufficient algo to deployer"
 
-        pool_tokens = self.app.setup_amm_app(
+        state = self.app.setup_amm_app(
             funder=self.deployer
         )
-        pool_token = pool_tokens['pool_token_key']
-        yes_token = pool_tokens['yes_token_key']
-        no_token = pool_tokens['no_token_key']
+        pool_token = state.pool_token_key
+        yes_token = state.yes_token_key
+        no_token = state.no_token_key
 
         assert isinstance(pool_token, int), "failed to create pool token"
         assert isinstance(yes_token, int), "failed to create yes token"
@@ -80,20 +79,9 @@ class TestAmm(TestCase):
             funder=self.deployer
         )
 
-        app = self.algo_client.client.application_info(app_id)
+        state = self.app.get_state()
 
-        glob_state = app['params']['global-state']
-
-        ids = {}
-        key = ""
-        for i, _ in enumerate(glob_state):
-            key = b64decode(glob_state[i]['key']).decode("utf-8")
-            if glob_state[i]['value']['uint'] != 0:
-                ids[key] = glob_state[i]['value']['uint']
-            else:
-                ids[key] = glob_state[i]['value']['bytes']
-
-        print(ids)
+        print(state)
 
         yes_token_amount = 83_333
 
@@ -0,0 +1,83 @@
+"""tests for the resumable indexer export"""
+from unittest import TestCase
+from unittest.mock import patch
+import json
+import os
+import tempfile
+
+from amm.export import export, iter_transactions, main, round_ranges
+from amm.testing.indexer import LocalIndexer
+
+
+def transfers(asset_id, rounds):
+    """one asset transfer per round"""
+    return [{"id": f"TX{asset_id}-{rnd}", "confirmed-round": rnd,
+             "asset-transfer-transaction": {"asset-id": asset_id, "amount": rnd}}
+            for rnd in rounds]
+
+
+class TestExport(TestCase):
+    """Class for testing paginated, parallel and resumable exports"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.out = self.directory.name
+        self.indexer = LocalIndexer(transfers(1, range(1, 2501)) + transfers(2, range(5, 50)),
+                                    max_limit=100)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self, name):
+        """exported records"""
+        with open(os.path.join(self.out, f"{name}.jsonl"), encoding="utf8") as file:
+            return [json.loads(line) for line in file]
+
+    def test_pagination(self):
+        """pages are followed past the indexer limit"""
+        txns = list(iter_transactions(self.indexer, asset_id=1))
+        assert len(txns) == 2500
+        assert self.indexer.requests == 26
+
+    def test_round_ranges(self):
+        """ranges are disjoint and cover every round"""
+        assert round_ranges(0, 9, 4) == [(0, 2), (3, 5), (6, 8), (9, 9)]
+        assert round_ranges(5, 5, 4) == [(5, 5)]
+        assert not round_ranges(6, 5, 4)
+
+    def test_resume(self):
+        """reruns only fetch rounds after the checkpoint"""
+        assert export(self.indexer, "asset_1", self.out, workers=4, asset_id=1) == 2500
+        records = self.read("asset_1")
+        assert [txn["confirmed-round"] for txn in records] == list(range(1, 2501))
+
+        self.indexer.add(transfers(1, range(2501, 2511)))
+        self.indexer.requests = 0
+        assert export(self.indexer, "asset_1", self.out, workers=4, asset_id=1) == 10
+        assert self.indexer.requests <= 8
+        assert len(self.read("asset_1")) == 2510
+        assert export(self.indexer, "asset_1", self.out, asset_id=1) == 0
+
+    def test_interrupted_append(self):
+        """a part appended without its checkpoint is dropped on resume"""
+        export(self.indexer, "asset_2", self.out, workers=1, last_round=20, asset_id=2)
+        with open(os.path.join(self.out, "asset_2.jsonl"), "a", encoding="utf8") as file:
+            file.write('{"id": "appended before the crash"}\n')
+
+        assert export(self.indexer, "asset_2", self.out, asset_id=2) == 29
+        records = self.read("asset_2")
+        assert [txn["confirmed-round"] for txn in records] == list(range(5, 50))
+
+    def test_cli(self):
+        """the command line exports every asset"""
+        with patch("amm.export.IndexerClient", return_value=self.indexer):
+            main(["--asset", "1", "--asset", "2", "--out", self.out])
+
+        assert len(self.read("json_data_1")) == 2500
+        assert len(self.read("json_data_2")) == 45
+        with open(os.path.join(self.out, "checkpoint.json"), encoding="utf8") as file:
+            checkpoint = json.load(file)
+        assert checkpoint["json_data_1"]["round"] == 2500
+        assert checkpoint["json_data_2"] == {
+            "round": 2500,
+            "size": os.path.getsize(os.path.join(self.out, "json_data_2.jsonl"))}
@@ -0,0 +1,100 @@
+"""tests for app account funding"""
+from unittest import TestCase
+import base64
+import gc
+import weakref
+
+from algosdk import account
+from algosdk.transaction import SuggestedParams, PaymentTxn
+
+from amm.amm_app import App
+from amm.transactions import INNER_TXN_FEE, MIN_BALANCE_REQUIREMENT, supply_txns
+from amm.utils.account import Account
+from amm.utils.funding import FundingPlanner, funding_planner
+from amm.testing.chain import GENESIS_HASH
+
+
+class Ledger:  # pylint: disable=too-few-public-methods
+    """algod stand-in with one app account"""
+
+    def __init__(self, amount):
+        self.amount = amount
+        self.reads = 0
+
+    def account_info(self, address):
+        """balance of the account"""
+        self.reads += 1
+        return {"address": address, "amount": self.amount,
+                "min-balance": MIN_BALANCE_REQUIREMENT}
+
+    def suggested_params(self):
+        """params for round 1"""
+        return SuggestedParams(1000, 1, 1001, base64.b64encode(GENESIS_HASH).decode(),
+                               "testnet-v1.0", False, min_fee=1000)
+
+
+
+class TestFunding(TestCase):
+    """Class for testing balance aware funding"""
+
+    def setUp(self):
+        self.now = 0.0
+
+    def test_shortfall(self):
+        """only the missing amount is paid"""
+        ledger = Ledger(MIN_BALANCE_REQUIREMENT + 10_000)
+        assert FundingPlanner(ledger).shortfall("addr", INNER_TXN_FEE) == 0
+
+        ledger = Ledger(MIN_BALANCE_REQUIREMENT - 500)
+        planner = FundingPlanner(ledger)
+        assert planner.shortfall("addr", INNER_TXN_FEE) == 500 + INNER_TXN_FEE
+
+    def test_cache(self):
+        """balances are read once per ttl"""
+        ledger = Ledger(0)
+        planner = FundingPlanner(ledger, ttl=5, clock=lambda: self.now)
+        planner.shortfall("addr")
+        self.now = 4.9
+        planner.shortfall("addr")
+        assert ledger.reads == 1
+
+        self.now = 5.0
+        planner.shortfall("addr")
+        assert ledger.reads == 2
+
+        planner.invalidate("addr")
+        planner.shortfall("addr")
+        assert ledger.reads == 3
+
+    def test_supply_group(self):
+        """a funded app account gets no payment in the group"""
+        ledger = Ledger(10**6)
+        app = App(ledger, 100)
+        app.stable_token, app.pool_token, app.yes_token, app.no_token = 1, 2, 3, 4
+        supplier = Account(account.generate_account()[0])
+        sp = ledger.suggested_params()
+
+        group = supply_txns(app, 10, supplier.public_key, sp,
+                            funding=app.funding.shortfall(app.app_addr, INNER_TXN_FEE))
+        assert len(group) == 2
+
+        ledger.amount = 0
+        app.funding.invalidate(app.app_addr)
+        group = supply_txns(app, 10, supplier.public_key, sp,
+                            funding=app.funding.shortfall(app.app_addr, INNER_TXN_FEE))
+        assert len(group) == 3
+        assert isinstance(group[0], PaymentTxn)
+        assert group[0].amt == MIN_BALANCE_REQUIREMENT + INNER_TXN_FEE
+
+    def test_client_released(self):
+        """the shared planner does not keep its client alive"""
+        ledger = Ledger(0)
+        planner = funding_planner(ledger)
+        planner.shortfall("addr")
+        ledger_ref = weakref.ref(ledger)
+        del ledger
+        gc.collect()
+        assert ledger_ref() is None
+        planner.invalidate()
+        with self.assertRaises(ReferenceError):
+            planner.shortfall("addr")
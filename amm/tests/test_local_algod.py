@@ -0,0 +1,139 @@
+"""tests running the amm lifecycle against the in-process algod"""
+from unittest import TestCase
+
+from algosdk.error import AlgodHTTPError
+from algosdk.transaction import AssetTransferTxn, PaymentTxn, assign_group_id
+
+from amm.amm_app import App, get_contracts
+from amm.state import MarketState
+from amm.subscriber import MarketSubscriber
+from amm.testing.algod import LocalAlgod
+from amm.utils.program_cache import ProgramCache
+from amm.utils.purestake_client import AlgoClient
+
+
+class TestLocalAlgod(TestCase):
+    """Class for testing the amm offline"""
+
+    def setUp(self):
+        self.node = LocalAlgod()
+        self.deployer = self.node.create_account()
+        self.stable_token = AlgoClient("", client=self.node).create_asset(self.deployer)
+        self.app = App(self.node, program_cache=ProgramCache())
+
+    def balance(self, address, asset_id):
+        """asset holding of an account"""
+        info = self.node.account_info(address)
+        return {asset["asset-id"]: asset["amount"] for asset in info["assets"]}.get(asset_id)
+
+    def create_market(self):
+        """creates, sets up and opts the deployer in"""
+        self.app.create_amm_app(token=self.stable_token, min_increment=1000,
+                                deployer=self.deployer)
+        state = self.app.setup_amm_app(funder=self.deployer)
+        self.app.opt_in_to_pool_token(self.deployer)
+        self.app.opt_in_to_yes_token(self.deployer)
+        self.app.opt_in_to_no_token(self.deployer)
+        return state
+
+    def test_lifecycle(self):
+        """create, setup, supply, swap, result, redeem, withdraw and close"""
+        state = self.create_market()
+        assert state.is_setup
+        address = self.deployer.public_key
+
+        self.app.supply(quantity=2_000_000, supplier=self.deployer)
+        assert self.balance(address, state.pool_token_key) == 2_000_000
+        self.app.swap(option="yes", quantity=100_000, supplier=self.deployer)
+        self.app.swap(option="no", quantity=100_000, supplier=self.deployer)
+        assert self.balance(address, state.yes_token_key) == 83_333
+        assert self.balance(address, state.no_token_key) == 96_774
+
+        self.app.set_result(funder=self.deployer, second_argument=b"yes")
+        self.app.redeem(token_in=state.yes_token_key, token_amount=83_333,
+                        withdrawal_account=self.deployer, token_out=self.stable_token)
+        self.app.withdraw(pool_token_amount=2_000_000, withdrawal_account=self.deployer)
+        state = self.app.get_state()
+        assert state.pool_tokens_outstanding_key == 0
+        assert state.yes_tokens_outstanding_key == 0
+        assert (self.balance(address, self.stable_token)
+                + self.balance(self.app.app_addr, self.stable_token)) == 1_000_000_000
+
+        self.app.close_amm(closing_account=self.deployer)
+        with self.assertRaises(AlgodHTTPError):
+            self.node.application_info(self.app.app_id)
+
+    def test_state_after_swap(self):
+        """own swaps keep the cached state current without a read"""
+        self.create_market()
+        self.app.supply(quantity=2_000_000, supplier=self.deployer)
+        self.app.get_state()
+        reads = self.node.requests["application"]
+
+        for option in ("yes", "no", "yes"):
+            self.app.swap(option=option, quantity=100_000, supplier=self.deployer)
+            state = self.app.get_state()
+        assert self.node.requests["application"] == reads
+        assert state == MarketState.from_application_info(
+            self.node.application_info(self.app.app_id))
+
+    def test_rejected_group(self):
+        """a failing group leaves the ledger untouched"""
+        state = self.create_market()
+        trader = self.node.create_account()
+        params = self.node.suggested_params()
+        self.node.send_transaction(
+            AssetTransferTxn(trader.public_key, params, trader.public_key, 0,
+                             self.stable_token).sign(trader.private_key))
+        self.node.send_transaction(
+            AssetTransferTxn(self.deployer.public_key, params, trader.public_key, 500_000,
+                             self.stable_token).sign(self.deployer.private_key))
+        before = self.node.account_info(trader.public_key)
+
+        # not opted in to the yes token, the inner transfer fails
+        with self.assertRaises(AlgodHTTPError) as err:
+            self.app.swap(option="yes", quantity=100_000, supplier=trader)
+        assert err.exception.code == 400
+        assert self.node.account_info(trader.public_key)["assets"] == before["assets"]
+        assert self.app.get_state().yes_tokens_outstanding_key == state.yes_tokens_outstanding_key
+
+    def test_signature_and_group(self):
+        """forged signatures and split groups are refused"""
+        other = self.node.create_account()
+        params = self.node.suggested_params()
+        address = self.deployer.public_key
+        forged = PaymentTxn(address, params, other.public_key, 1).sign(other.private_key)
+        with self.assertRaises(AlgodHTTPError):
+            self.node.send_transaction(forged)
+
+        group = assign_group_id([PaymentTxn(address, params, other.public_key, amount)
+                                 for amount in (1, 2)])
+        with self.assertRaises(AlgodHTTPError):
+            self.node.send_transaction(group[0].sign(self.deployer.private_key))
+
+    def test_compile(self):
+        """placeholder bytecode maps back to its source"""
+        result = self.node.compile("#pragma version 6\nint 1\n")
+        program = next(iter(self.node.programs.items()))
+        assert program[1].startswith("#pragma version 6")
+        assert program[0][0] == 6 and result["hash"]
+
+    def test_shared_program_cache(self):
+        """nodes sharing a program cache each compile their own placeholders"""
+        cache = ProgramCache()
+        get_contracts(self.node, cache)
+        other = LocalAlgod()
+        get_contracts(other, cache)
+        assert cache.misses == 4
+        assert set(self.node.programs) == set(other.programs)
+
+    def test_blocks(self):
+        """state changes reach block followers"""
+        self.create_market()
+        subscriber = MarketSubscriber(self.node, [self.app.app_id])
+        pending = self.app.submit_supply(quantity=2_000_000, supplier=self.deployer)
+        assert pending.result(5).confirmed_round == self.node.round
+
+        events = subscriber.poll()
+        assert [event.method for event in events] == ["supply"]
+        assert events[0].state == self.app.get_state()
@@ -0,0 +1,77 @@
+"""tests comparing the low cost approval program with the default build"""
+from functools import partial
+from unittest import TestCase
+
+from algosdk.error import AlgodHTTPError
+
+from amm.amm_app import App
+from amm.contracts.amm import approval_program
+from amm.testing.algod import LocalAlgod
+from amm.testing.profiler import profile
+from amm.utils.program_cache import ProgramCache
+from amm.utils.purestake_client import AlgoClient
+
+
+def trade(**build):
+    """
+    Runs the same supplies, swaps and withdrawals on a contract build.
+    Args:
+        build: approval_program options, e.g. low_cost
+    Returns: global state and deployer holdings after each step, None when rejected
+    """
+    node = LocalAlgod(avm=True)
+    deployer = node.create_account()
+    stable_token = AlgoClient("", client=node).create_asset(deployer)
+    app = App(node, program_cache=ProgramCache(), **build)
+    app.create_amm_app(token=stable_token, min_increment=1000, deployer=deployer)
+    app.setup_amm_app(funder=deployer)
+    app.opt_in_to_pool_token(deployer)
+    app.opt_in_to_yes_token(deployer)
+    app.opt_in_to_no_token(deployer)
+
+    steps = [
+        partial(app.supply, 2_000_000, deployer),
+        partial(app.swap, "yes", 150_000, deployer),
+        partial(app.supply, 700_001, deployer),
+        partial(app.swap, "no", 90_000, deployer),
+        partial(app.swap, "no", 333_333, deployer),
+        # with fewer no than yes reserves the price ratio rounds to 0 and
+        # withdrawing before the result divides by it in both builds
+        partial(app.withdraw, 500_000, deployer),
+        partial(app.swap, "yes", 1_000, deployer),
+        partial(app.withdraw, 2_200_001, deployer),
+        partial(app.set_result, deployer, b"no"),
+        partial(app.withdraw, 2_200_001, deployer),
+    ]
+    results = []
+    for step in steps:
+        try:
+            step()
+        except AlgodHTTPError:
+            results.append(None)
+            continue
+        state = app.get_state().as_dict()
+        state.pop("creator_key")
+        holdings = {asset["asset-id"]: asset["amount"]
+                    for asset in node.account_info(deployer.public_key)["assets"]}
+        results.append((state, holdings))
+    return results
+
+
+class TestLowCost(TestCase):
+    """Class for testing the scratch cached pricing helpers"""
+
+    def test_same_results(self):
+        """every step ends in the same state, failures included"""
+        default, low_cost = trade(), trade(low_cost=True)
+        assert default == low_cost
+        assert default[5] is None and default[7] is None
+        assert default[-1] is not None
+
+    def test_cost(self):
+        """trading paths cost fewer opcodes and read fewer keys"""
+        default = profile()["paths"]
+        low_cost = profile(partial(approval_program, low_cost=True))["paths"]
+        for path in ("supply", "swap buy_yes", "swap buy_no", "withdraw"):
+            assert low_cost[path]["cost"] < default[path]["cost"]
+            assert low_cost[path]["app_global_get"] < default[path]["app_global_get"]
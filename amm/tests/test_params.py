@@ -0,0 +1,85 @@
+"""tests for the shared suggested params provider"""
+import gc
+import weakref
+from unittest import TestCase
+
+from algosdk.transaction import SuggestedParams
+
+from amm.amm_app import App
+from amm.utils.params import ParamsProvider, params_provider
+
+
+class ParamsCounter:  # pylint: disable=too-few-public-methods
+    """algod stand-in counting params requests"""
+
+    def __init__(self):
+        self.calls = 0
+        self.round = 100
+
+    def suggested_params(self):
+        """returns params for the current round"""
+        self.calls += 1
+        return SuggestedParams(1000, self.round, self.round + 1000,
+                               "R2VuZXNpc0hhc2g=", "testnet-v1.0", False,
+                               min_fee=1000)
+
+
+class TestParams(TestCase):
+    """Class for testing suggested params reuse"""
+
+    def setUp(self):
+        self.client = ParamsCounter()
+        self.now = 0.0
+
+    def test_shared_between_apps(self):
+        """apps on the same client share one fetch"""
+        first = App(self.client, 1)
+        second = App(self.client, 2)
+
+        first.params.get()
+        second.params.get()
+
+        assert first.params is second.params
+        assert self.client.calls == 1
+
+    def test_ttl_and_round(self):
+        """params are refetched after the ttl or a new round"""
+        provider = ParamsProvider(self.client, ttl=5, clock=lambda: self.now)
+
+        provider.get()
+        self.now = 4.9
+        provider.get()
+        assert self.client.calls == 1
+
+        self.now = 5.0
+        provider.get()
+        assert self.client.calls == 2
+
+        provider.observe_round(100)
+        provider.get()
+        assert self.client.calls == 2
+
+        self.client.round = 101
+        provider.observe_round(101)
+        assert provider.get().first == 101
+        assert self.client.calls == 3
+
+    def test_copies(self):
+        """callers cannot change the shared params"""
+        provider = ParamsProvider(self.client)
+        params = provider.get()
+        params.flat_fee = True
+
+        assert not provider.get().flat_fee
+
+    def test_client_released(self):
+        """the shared provider does not keep its client alive"""
+        provider = params_provider(self.client)
+        provider.get()
+        client = weakref.ref(self.client)
+        del self.client
+        gc.collect()
+        assert client() is None
+        provider.invalidate()
+        with self.assertRaises(ReferenceError):
+            provider.get()
@@ -0,0 +1,46 @@
+"""tests for the approval program profiler"""
+import copy
+import json
+from unittest import TestCase
+
+from amm.testing.avm import APP_CALL_BUDGET
+from amm.testing.profiler import BASELINE, VARIANTS, compare, format_report, profile
+
+PATHS = ("create", "setup", "supply", "swap buy_yes", "swap buy_no", "withdraw",
+         "redeem", "result", "delete")
+
+
+class TestProfiler(TestCase):
+    """Class for testing the per path profile"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.report = profile()
+
+    def test_paths(self):
+        """every dispatch path runs within the single call budget"""
+        assert sorted(self.report["paths"]) == sorted(PATHS)
+        for metrics in self.report["paths"].values():
+            assert 0 < metrics["cost"] <= APP_CALL_BUDGET
+        assert self.report["paths"]["setup"]["inner_txns"] == 6
+        assert self.report["paths"]["swap buy_yes"]["inner_txns"] == 1
+
+    def test_baseline(self):
+        """every build of the contract costs no more than its stored baseline"""
+        with open(BASELINE, encoding="utf8") as file:
+            baselines = json.load(file)
+        for variant, approval in VARIANTS.items():
+            with self.subTest(variant=variant):
+                report = self.report if variant == "default" else profile(approval)
+                assert not compare(report, baselines[variant])
+
+    def test_compare(self):
+        """growing metrics and missing paths are regressions"""
+        grown = copy.deepcopy(self.report)
+        grown["paths"]["supply"]["cost"] += 5
+        del grown["paths"]["delete"]
+        regressions = compare(grown, self.report)
+        assert len(regressions) == 2
+        assert regressions[0].startswith("supply cost")
+        assert "(+5)" in format_report(grown, self.report)
+        assert not compare(self.report, grown)
@@ -0,0 +1,91 @@
+"""tests for the compiled program cache"""
+from unittest import TestCase
+from base64 import b64encode
+import tempfile
+
+from amm.amm_app import get_contracts
+from amm.testing.algod import LocalAlgod
+from amm.utils.program_cache import ProgramCache
+
+
+class CompileCounter:
+    """algod stand-in counting compile calls"""
+
+    def __init__(self, address="http://counter"):
+        self.calls = 0
+        self.algod_address = address
+
+    def versions(self):
+        """build of the pretend algod"""
+        return {"genesis_hash_b64": self.algod_address,
+                "build": {"major": 3, "minor": 0, "build_number": 1}}
+
+    def compile(self, teal):
+        """returns fake bytecode"""
+        self.calls += 1
+        return {"result": b64encode(teal.encode()[:32]).decode()}
+
+
+class TestProgramCache(TestCase):
+    """Class for testing the program cache"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.client = CompileCounter()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_memory_layer(self):
+        """second deployment skips algod"""
+        cache = ProgramCache()
+        first = get_contracts(self.client, cache)
+        second = get_contracts(self.client, cache)
+
+        assert first == second
+        assert self.client.calls == 2
+        assert cache.misses == 2
+        assert cache.hits == 2
+
+    def test_disk_layer(self):
+        """new process reuses programs stored on disk"""
+        first = get_contracts(self.client, ProgramCache(self.directory.name))
+
+        cache = ProgramCache(self.directory.name)
+        second = get_contracts(self.client, cache)
+
+        assert first == second
+        assert self.client.calls == 2
+        assert cache.disk_hits == 2
+        assert cache.misses == 0
+
+    def test_content_address(self):
+        """changed source or version gets compiled again"""
+        cache = ProgramCache()
+        generated = []
+
+        def generate():
+            generated.append(1)
+            return "#pragma version 6\nint 1\n"
+
+        cache.get_or_compile(generate, lambda teal: b"\x06", 6, "0.25.0")
+        cache.get_or_compile(generate, lambda teal: b"\x06", 6, "0.25.0")
+        cache.get_or_compile(generate, lambda teal: b"\x07", 7, "0.25.0")
+
+        assert len(generated) == 3
+        assert cache.hits == 1
+        assert cache.misses == 2
+
+    def test_compiler_identity(self):
+        """placeholder bytecode of the stand-in is never served to algod or stored"""
+        get_contracts(LocalAlgod(), ProgramCache(self.directory.name))
+        cache = ProgramCache(self.directory.name)
+        approval, _ = get_contracts(self.client, cache)
+
+        assert self.client.calls == 2
+        assert cache.disk_hits == 0
+        assert not approval.startswith(b"\x06local:")
+
+        other = CompileCounter("http://other")
+        get_contracts(other, cache)
+        assert other.calls == 2
@@ -0,0 +1,46 @@
+"""tests for the vectorized quote engine"""
+from unittest import TestCase
+
+import numpy as np
+
+from amm.quote import quote_markets, quote_swaps
+from amm.simulator import SimulationError, swap_out
+
+
+class TestQuote(TestCase):
+    """Class for testing batched quotes against the scalar path"""
+
+    def test_matches_scalar_path(self):
+        """every cell equals swap_out or is flagged invalid"""
+        rng = np.random.default_rng(7)
+        yes_reserves = rng.integers(0, 2 ** 40, 50, dtype=np.uint64)
+        no_reserves = rng.integers(0, 2 ** 40, 50, dtype=np.uint64)
+        amounts = rng.integers(0, 2 ** 26, 40, dtype=np.uint64)
+
+        quotes = quote_markets(yes_reserves, no_reserves, amounts, "no")
+
+        for i, (yes, no) in enumerate(zip(yes_reserves, no_reserves)):
+            for j, amount in enumerate(amounts):
+                try:
+                    expected = swap_out(int(yes), int(no), int(amount))
+                except SimulationError:
+                    expected = None
+                if amount == 0:
+                    expected = None
+                assert quotes.valid[i, j] == (expected is not None)
+                assert int(quotes.tokens_out[i, j]) == (expected or 0)
+
+    def test_overflow_is_invalid(self):
+        """products past uint64 are rejected instead of wrapping"""
+        quotes = quote_swaps(1, 2 ** 62, [1, 4, 0])
+
+        assert quotes.valid.tolist() == [True, False, False]
+        assert quotes.tokens_out.tolist() == [2 ** 61, 0, 0]
+
+    def test_price_impact(self):
+        """effective price and impact of the example swap"""
+        quotes = quote_swaps(500_000, 500_000, 100_000)
+
+        assert int(quotes.tokens_out) == 83_333
+        assert abs(float(quotes.effective_price) - 100_000 / 83_333) < 1e-12
+        assert abs(float(quotes.price_impact) - (100_000 / 83_333 - 1)) < 1e-12
@@ -0,0 +1,63 @@
+"""tests for the off-chain simulator"""
+from unittest import TestCase
+
+from amm.simulator import MarketSimulator, SimulationError, swap_out
+
+
+class TestSimulator(TestCase):
+    """Class for testing the simulated lifecycle of the amm"""
+
+    def setUp(self):
+        self.sim = MarketSimulator("creator", 1, 1000)
+        self.sim.setup(pool_token=2, yes_token=3, no_token=4)
+
+    def test_lifecycle(self):
+        """mirrors the example lifecycle"""
+        assert self.sim.supply(500_000) == 500_000
+        assert self.sim.supply(1_500_000) == 1_500_000
+        assert self.sim.yes_tokens_reserves == 500_000
+
+        assert self.sim.swap("yes", 100_000) == 83_333
+        assert self.sim.swap("no", 100_000) == 96_774
+        assert self.sim.token_funding_reserves == 96_774 * 2
+
+        self.sim.set_result("creator", b"yes")
+        assert self.sim.result == 3
+        assert self.sim.redeem(83_333) == 166_666
+        assert self.sim.withdraw(2_000_000) == 2_006_452
+
+        self.sim.delete("creator")
+
+    def test_rejections_are_atomic(self):
+        """failing calls leave the state untouched"""
+        self.sim.supply(2_000_000)
+        before = self.sim.global_state()
+
+        # the contract re-reads outstanding pool tokens after zeroing them
+        with self.assertRaises(SimulationError):
+            self.sim.withdraw(2_000_000)
+        with self.assertRaises(SimulationError):
+            self.sim.supply(999)
+        with self.assertRaises(SimulationError):
+            self.sim.set_result("other", b"yes")
+        with self.assertRaises(SimulationError):
+            self.sim.redeem(1)
+
+        assert self.sim.global_state() == before
+
+    def test_uint64_truncation(self):
+        """division truncates and products may not overflow"""
+        assert swap_out(3, 10, 2) == 4
+        with self.assertRaises(SimulationError):
+            swap_out(1, 2 ** 63, 2)
+
+    def test_from_global_state(self):
+        """a copy rebuilt from global state behaves the same"""
+        self.sim.supply(2_000_000)
+        self.sim.swap("yes", 50_000)
+        other = MarketSimulator.from_global_state(
+            self.sim.global_state(), self.sim.funding_balance)
+
+        assert other.swap("no", 70_000) == self.sim.swap("no", 70_000)
+        assert other.global_state() == self.sim.global_state()
+        assert other.market_state() == self.sim.market_state()
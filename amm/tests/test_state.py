@@ -0,0 +1,90 @@
+"""tests for the typed market state"""
+from unittest import TestCase
+import base64
+
+from algosdk import account, encoding
+
+from amm.simulator import MarketSimulator
+from amm.state import MarketState
+
+
+def algod_global_state(state: dict) -> list:
+    """encodes state keyed by name like application_info does"""
+    entries = []
+    for name, value in state.items():
+        key = base64.b64encode(name.encode()).decode()
+        if isinstance(value, str):
+            raw = base64.b64encode(encoding.decode_address(value)).decode()
+            entries.append({"key": key, "value": {"type": 1, "bytes": raw, "uint": 0}})
+        else:
+            entries.append({"key": key, "value": {"type": 2, "bytes": "", "uint": value}})
+    return entries
+
+
+class TestMarketState(TestCase):
+    """Class for testing global state decoding"""
+
+    def setUp(self):
+        creator = account.address_from_private_key(account.generate_account()[0])
+        self.sim = MarketSimulator(creator, 1, 1000)
+
+    def test_decode(self):
+        """every key decodes to its typed field"""
+        self.sim.setup(pool_token=2, yes_token=3, no_token=4)
+        self.sim.supply(2_000_000)
+        self.sim.swap("yes", 50_000)
+        entries = algod_global_state(self.sim.global_state())
+        entries.append({"key": base64.b64encode(b"other").decode(),
+                        "value": {"type": 2, "bytes": "", "uint": 7}})
+
+        state = MarketState.from_application_info({"params": {"global-state": entries}})
+
+        assert state == self.sim.market_state()
+        assert state.creator_key == self.sim.creator
+        assert state.yes_tokens_reserves == self.sim.yes_tokens_reserves
+        assert state["pool_token_key"] == 2
+        assert state.is_setup
+
+    def test_before_setup(self):
+        """keys written by setup are missing until then"""
+        state = MarketState.from_global_state(algod_global_state(self.sim.global_state()))
+
+        assert not state.is_setup
+        assert state.pool_token_key is None
+        assert "pool_token_key" not in state
+        assert state.get("pool_token_key", 0) == 0
+        with self.assertRaises(KeyError):
+            _ = state["pool_token_key"]
+        with self.assertRaises(TypeError):
+            MarketState(unknown=1)
+
+    def test_simulator_round_trip(self):
+        """the simulator rebuilds from a decoded state"""
+        self.sim.setup(pool_token=2, yes_token=3, no_token=4)
+        self.sim.supply(2_000_000)
+        state = MarketState.from_global_state(algod_global_state(self.sim.global_state()))
+
+        other = MarketSimulator.from_global_state(state, self.sim.funding_balance)
+
+        assert other.swap("no", 70_000) == self.sim.swap("no", 70_000)
+        assert other.market_state() == self.sim.market_state()
+
+    def test_apply_delta(self):
+        """deltas set, overwrite and delete keys on a copy"""
+        self.sim.setup(pool_token=2, yes_token=3, no_token=4)
+        state = self.sim.market_state()
+        before = self.sim.market_state()
+        self.sim.supply(2_000_000)
+
+        delta = algod_global_state(self.sim.global_state())
+        for entry in delta:
+            value = entry["value"]
+            value["action"] = value.pop("type")
+        delta.append({"key": base64.b64encode(b"result").decode(),
+                      "value": {"action": 3}})
+
+        updated = state.apply_delta(delta)
+        assert state == before
+        assert updated.pool_funding_reserves == 2_000_000
+        assert updated.creator_key == self.sim.creator
+        assert updated.result is None
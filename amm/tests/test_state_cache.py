@@ -0,0 +1,166 @@
+"""tests for the shared state cache"""
+from unittest import TestCase
+import base64
+import gc
+import threading
+import time
+import weakref
+
+from amm.amm_app import App
+from amm.utils.confirmation import Confirmation
+from amm.utils.state_cache import StateCache, state_cache
+
+
+class Node:  # pylint: disable=too-few-public-methods
+    """algod stand-in serving the state of any app"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.reads = []
+        self.last_round = 1
+
+    def status(self):
+        """current round"""
+        return {"last-round": self.last_round}
+
+    def application_info(self, app_id):
+        """global state holding the app id as reserves"""
+        self.reads.append(app_id)
+        time.sleep(self.delay)
+        key = base64.b64encode(b"yes_tokens_reserves").decode()
+        return {"id": app_id, "params": {"global-state": [
+            {"key": key, "value": {"type": 2, "bytes": "", "uint": app_id}}]}}
+
+
+class TestStateCache(TestCase):
+    """Class for testing cached global state reads"""
+
+    def setUp(self):
+        self.now = 0.0
+        self.node = Node()
+        self.cache = StateCache(self.node, maxsize=2, ttl=5, clock=lambda: self.now)
+
+    def test_one_read_per_round(self):
+        """reads are reused until the round moves or the ttl expires"""
+        self.cache.observe_round(10)
+        assert self.cache.get(1).yes_tokens_reserves == 1
+        self.cache.get(1)
+        self.cache.observe_round(9)
+        self.cache.get(1)
+        assert self.node.reads == [1]
+
+        self.cache.observe_round(11)
+        self.cache.get(1)
+        self.now = 5.0
+        self.cache.get(1)
+        assert self.node.reads == [1, 1, 1]
+        assert self.cache.hits == 2
+
+    def test_lru(self):
+        """least recently used apps are evicted"""
+        self.cache.get(1)
+        self.cache.get(2)
+        self.cache.get(1)
+        self.cache.get(3)
+        assert len(self.cache) == 2
+        self.cache.get(1)
+        self.cache.get(2)
+        assert self.node.reads == [1, 2, 3, 2]
+
+    def test_single_flight(self):
+        """concurrent readers of one app share a request"""
+        node = Node(delay=0.2)
+        cache = StateCache(node)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get(7)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert node.reads == [7]
+        assert len(results) == 8 and all(state is results[0] for state in results)
+
+    def test_invalidated_by_confirmation(self):
+        """apps share the cache and confirmations of app calls drop it"""
+        first, second = App(self.node, 5), App(self.node, 5)
+        assert first.state_cache is second.state_cache
+
+        first.get_state()
+        second.get_state()
+        assert self.node.reads == [5]
+
+        record = {"confirmed-round": 3, "txn": {"txn": {"type": "appl", "apid": 5}}}
+        first._confirmed(Confirmation(record, "TX", 1, 0.0))  # pylint: disable=protected-access
+        second.get_state()
+        assert self.node.reads == [5, 5]
+
+    def test_delta_applied(self):
+        """own confirmations update the cached state without a read"""
+        app = App(self.node, 6)
+        app.state_cache.observe_round(20)
+        app.get_state()
+
+        key = base64.b64encode(b"yes_tokens_reserves").decode()
+        delta = [{"key": key, "value": {"action": 2, "uint": 99}}]
+        record = {"confirmed-round": 21, "global-state-delta": delta,
+                  "txn": {"txn": {"type": "appl", "apid": 6}}}
+        app._confirmed(Confirmation(record, "TX", 1, 0.0))  # pylint: disable=protected-access
+
+        assert app.get_state().yes_tokens_reserves == 99
+        assert self.node.reads == [6]
+
+    def test_delta_current(self):
+        """a delta for the round after the read makes the entry current"""
+        self.cache.observe_round(20)
+        self.cache.get(1)
+        key = base64.b64encode(b"yes_tokens_reserves").decode()
+        delta = [{"key": key, "value": {"action": 2, "uint": 99}}]
+
+        self.cache.observe_round(21)
+        assert self.cache.apply_delta(1, 21, delta)
+        assert self.cache.get(1).yes_tokens_reserves == 99
+        assert self.cache.round == 21
+        assert self.node.reads == [1]
+
+        assert self.cache.apply_delta(1, 21, [])
+        assert self.cache.get(1).yes_tokens_reserves == 99
+        assert self.node.reads == [1]
+
+    def test_delta_without_round(self):
+        """a read before any round was observed still takes deltas"""
+        self.node.last_round = 30
+        self.cache.get(1)
+        assert self.cache.round == 30
+        key = base64.b64encode(b"yes_tokens_reserves").decode()
+
+        assert self.cache.apply_delta(1, 31, [{"key": key, "value": {"action": 2, "uint": 7}}])
+        assert self.cache.get(1).yes_tokens_reserves == 7
+        assert self.node.reads == [1]
+
+    def test_delta_gap(self):
+        """a delta after missed rounds forces a refetch"""
+        self.cache.observe_round(20)
+        before = self.cache.get(1)
+        key = base64.b64encode(b"yes_tokens_reserves").decode()
+        delta = [{"key": key, "value": {"action": 2, "uint": 99}}]
+
+        assert self.cache.apply_delta(1, 21, delta)
+        assert before.yes_tokens_reserves == 1
+        assert not self.cache.apply_delta(1, 23, delta)
+        self.cache.observe_round(23)
+        assert self.cache.get(1).yes_tokens_reserves == 1
+        assert self.node.reads == [1, 1]
+
+    def test_client_released(self):
+        """the shared cache does not keep its client alive"""
+        cache = state_cache(self.node)
+        cache.get(1)
+        node = weakref.ref(self.node)
+        del self.node
+        gc.collect()
+        assert node() is None
+        cache.invalidate()
+        with self.assertRaises(ReferenceError):
+            cache.get(1)
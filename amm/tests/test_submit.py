@@ -0,0 +1,93 @@
+"""tests for non-blocking app operations"""
+from unittest import TestCase
+import base64
+import threading
+
+from algosdk import account
+from algosdk.transaction import SuggestedParams
+
+from amm.amm_app import App
+from amm.transactions import MIN_BALANCE_REQUIREMENT, wait_all
+from amm.utils.account import Account
+from amm.testing.chain import GENESIS_HASH, Chain
+
+
+class PipelineChain(Chain):
+    """chain confirming every sent group in its own block"""
+
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+        self.new_block = threading.Condition()
+
+    def status_after_block(self, round_number):
+        """blocks until a later round exists, like algod"""
+        with self.new_block:
+            self.new_block.wait_for(lambda: self.last_round > round_number, timeout=5)
+        return super().status_after_block(round_number)
+
+    def suggested_params(self):
+        """params for the current round"""
+        return SuggestedParams(1000, self.last_round, self.last_round + 1000,
+                               base64.b64encode(GENESIS_HASH).decode(),
+                               "testnet-v1.0", False, min_fee=1000)
+
+    def account_info(self, address):
+        """an app account not funded yet"""
+        return {"address": address, "amount": 0,
+                "min-balance": MIN_BALANCE_REQUIREMENT}
+
+    def send_transactions(self, signed):
+        """queues a group"""
+        self.sent.append(signed)
+        return signed[0].get_txid()
+
+    def send_transaction(self, signed):
+        """queues a single transaction"""
+        return self.send_transactions([signed])
+
+    def produce_block(self):
+        """confirms everything sent so far in one block"""
+        with self.new_block:
+            self.add_block([txn for group in self.sent for txn in group])
+            self.sent = []
+            self.new_block.notify_all()
+
+
+class TestSubmit(TestCase):
+    """Class for testing pipelined submissions"""
+
+    def setUp(self):
+        self.chain = PipelineChain()
+        self.trader = Account(account.generate_account()[0])
+        self.app = App(self.chain, app_id=42)
+        self.app.stable_token, self.app.pool_token = 1, 2
+        self.app.yes_token, self.app.no_token = 3, 4
+
+    def tearDown(self):
+        self.app.tracker.stop()
+
+    def test_pipeline_into_one_round(self):
+        """many groups confirm in the same block"""
+        handles = [
+            self.app.submit_swap("yes", 1_000 + i, self.trader) for i in range(5)
+        ]
+        handles.append(self.app.submit_supply(5_000, self.trader))
+        handles.append(self.app.submit_set_result(self.trader, b"yes"))
+
+        assert len(self.chain.sent) == 7
+        assert len({handle.group_id for handle in handles}) == 7
+        self.chain.produce_block()
+
+        confirmations = wait_all(handles, timeout=5)
+
+        assert {confirmation.confirmed_round for confirmation in confirmations} == {2}
+        assert [c.tx_id for c in confirmations] == [h.tx_id for h in handles]
+
+    def test_invalid_option(self):
+        """swap and submit_swap reject unknown options"""
+        with self.assertRaises(ValueError):
+            self.app.submit_swap("maybe", 1_000, self.trader)
+        with self.assertRaises(ValueError):
+            self.app.swap("maybe", 1_000, self.trader)
+        assert not self.chain.sent
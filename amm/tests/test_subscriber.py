@@ -0,0 +1,194 @@
+"""tests for the block following market subscriber"""
+from unittest import IsolatedAsyncioTestCase, TestCase
+import base64
+import threading
+
+from algosdk import account, encoding
+from algosdk.transaction import ApplicationCallTxn, OnComplete, SuggestedParams
+
+from amm.subscriber import MarketSubscriber
+from amm.tests.test_state import algod_global_state
+from amm.testing.chain import GENESIS_HASH, Chain, payments
+from amm.simulator import MarketSimulator
+from amm.utils.state_cache import StateCache
+
+
+class MarketChain(Chain):
+    """chain holding markets driven by simulators"""
+
+    def __init__(self):
+        super().__init__()
+        self.private_key, self.address = account.generate_account()
+        self.markets = {}
+        self.state_reads = 0
+
+    def application_info(self, app_id):
+        """global state of a simulated market"""
+        self.state_reads += 1
+        return {"id": app_id, "params": {
+            "global-state": algod_global_state(self.markets[app_id].global_state())}}
+
+    def call(self, app_id, args, on_complete=OnComplete.NoOpOC):
+        """block entry of an app call with the delta of the simulated state"""
+        before = self.markets[app_id].global_state()
+        if args[0] == b"swap":
+            self.markets[app_id].swap(args[1][4:].decode(), 10_000)
+        elif args[0] == b"supply":
+            self.markets[app_id].supply(100_000)
+        after = self.markets[app_id].global_state()
+        delta = {name.encode(): {"at": 2, "ui": value}
+                 for name, value in after.items() if before.get(name) != value}
+
+        params = SuggestedParams(1000, 1, 1001, base64.b64encode(GENESIS_HASH).decode(),
+                                 "testnet-v1.0", False, min_fee=1000)
+        txn = ApplicationCallTxn(self.address, params, app_id, on_complete,
+                                 app_args=args).dictify()
+        del txn["gh"], txn["gen"]
+        return {"txn": txn, "sig": bytes(64), "hgi": True, "dt": {"gd": delta}}
+
+
+class FlakyChain(MarketChain):
+    """market chain whose first block read fails"""
+
+    def __init__(self):
+        super().__init__()
+        self.failures = 1
+
+    def block_info(self, round_number, response_format):
+        """fails with a connection error until failures are used up"""
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionResetError("connection reset")
+        return super().block_info(round_number, response_format)
+
+
+def market_chain(count):
+    """chain with set up and funded markets"""
+    chain = MarketChain()
+    for app_id in range(100, 100 + count):
+        sim = MarketSimulator(chain.address, 1, 1000)
+        sim.setup(pool_token=2, yes_token=3, no_token=4)
+        sim.supply(1_000_000)
+        chain.markets[app_id] = sim
+    return chain
+
+
+class TestSubscriber(TestCase):
+    """Class for testing live market state from blocks"""
+
+    def test_one_block_per_round(self):
+        """hundreds of markets cost one block fetch per round"""
+        chain = market_chain(300)
+        cache = StateCache(chain)
+        subscriber = MarketSubscriber(chain, chain.markets, cache=cache)
+        received = []
+        subscriber.subscribe(received.append)
+
+        chain.add_block(payments(3) + [
+            chain.call(app_id, [b"swap", b"buy_yes"]) for app_id in range(100, 400)])
+        chain.add_block([chain.call(105, [b"supply"]),
+                         chain.call(100, [b"swap", b"buy_no"])])
+        requests = chain.requests
+
+        events = subscriber.poll() + subscriber.poll()
+
+        assert chain.requests - requests == 4
+        assert chain.state_reads == 300
+        assert received == events and len(events) == 302
+        assert [event.method for event in events[-2:]] == ["supply", "swap"]
+        for app_id, sim in chain.markets.items():
+            assert subscriber.states[app_id] == sim.market_state()
+            assert cache.get(app_id) == sim.market_state()
+        assert chain.state_reads == 300
+
+        swap = events[0]
+        assert swap.sender == chain.address
+        assert swap.args == (b"swap", b"buy_yes")
+        assert swap.changes["yes_tokens_reserves"] == (
+            swap.previous.yes_tokens_reserves, swap.state.yes_tokens_reserves)
+        assert "pool_token_key" not in swap.changes
+
+    def test_failing_callback(self):
+        """a raising callback is logged and the others still get the event"""
+        chain = market_chain(1)
+        subscriber = MarketSubscriber(chain, [100])
+        received = []
+
+        def fail(event):
+            raise RuntimeError(event.tx_id)
+
+        subscriber.subscribe(fail)
+        subscriber.subscribe(received.append)
+        chain.add_block([chain.call(100, [b"swap", b"buy_yes"])])
+
+        with self.assertLogs("amm.subscriber", "ERROR"):
+            events = subscriber.poll()
+        assert received == events and len(events) == 1
+
+    def test_transport_error_retried(self):
+        """the polling thread reads the same round again after a failed read"""
+        chain = FlakyChain()
+        chain.markets = market_chain(1).markets
+        subscriber = MarketSubscriber(chain, [100], backoff=0)
+        received = threading.Event()
+        subscriber.subscribe(lambda event: received.set())
+        chain.add_block([chain.call(100, [b"swap", b"buy_yes"])])
+
+        with self.assertLogs("amm.subscriber", "WARNING"):
+            subscriber.start()
+            assert received.wait(5)
+        subscriber.stop()
+        assert chain.failures == 0
+
+    def test_undecodable_block(self):
+        """markets are read again after a block that cannot be decoded"""
+        chain = market_chain(2)
+        subscriber = MarketSubscriber(chain, chain.markets, backoff=0)
+        received = []
+        subscriber.subscribe(received.append)
+        malformed = chain.call(100, [b"swap", b"buy_yes"])
+        malformed["dt"]["gd"][b"yes_tokens_reserves"]["bs"] = 5
+        chain.add_block([chain.call(101, [b"swap", b"buy_no"]), malformed])
+        chain.add_block([chain.call(101, [b"swap", b"buy_yes"])])
+
+        with self.assertLogs("amm.subscriber", "ERROR"):
+            events = subscriber.poll()
+        assert [(event.method, event.round) for event in events] == [("resync", 2)] * 2
+        assert received == events and chain.state_reads == 4
+        for event in events:
+            assert event.state == chain.markets[event.app_id].market_state()
+            assert event.state != event.previous
+
+        assert [event.method for event in subscriber.poll()] == ["swap"]
+        assert subscriber.states[101] == chain.markets[101].market_state()
+
+    def test_unwatched_and_deleted(self):
+        """other apps are skipped and deleted markets dropped"""
+        chain = market_chain(2)
+        subscriber = MarketSubscriber(chain, [100])
+        chain.add_block([chain.call(101, [b"swap", b"buy_yes"]),
+                         chain.call(100, [b"delete"], OnComplete.DeleteApplicationOC)])
+
+        events = subscriber.poll()
+
+        assert [(event.app_id, event.method) for event in events] == [(100, "delete")]
+        assert not subscriber.states
+        assert encoding.is_valid_address(events[0].sender)
+
+
+class TestSubscriberStream(IsolatedAsyncioTestCase):
+    """Class for testing the async event stream"""
+
+    async def test_events(self):
+        """events are streamed in block order"""
+        chain = market_chain(2)
+        subscriber = MarketSubscriber(chain, chain.markets)
+        chain.add_block([chain.call(101, [b"swap", b"buy_no"]),
+                         chain.call(100, [b"swap", b"buy_yes"])])
+
+        stream = subscriber.events()
+        first = await stream.__anext__()
+        second = await stream.__anext__()
+        await stream.aclose()
+
+        assert (first.app_id, second.app_id) == (101, 100)
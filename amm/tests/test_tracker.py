@@ -0,0 +1,128 @@
+"""tests for the block following confirmation tracker"""
+from unittest import TestCase
+import base64
+import gc
+import weakref
+
+from amm.testing.chain import Chain, payments
+from amm.utils.confirmation import ConfirmationTimeout
+from amm.utils.tracker import ConfirmationTracker, confirmation_tracker
+
+
+class TestTracker(TestCase):
+    """Class for testing multiplexed confirmations"""
+
+    def test_cost_scales_with_rounds(self):
+        """hundreds of transactions cost two requests per round"""
+        chain = Chain()
+        tracker = ConfirmationTracker(chain)
+        signed = payments(300)
+        futures = [tracker.track(txn.get_txid()) for txn in signed]
+        chain.add_block(signed[:100])
+        chain.add_block(signed[100:])
+
+        assert tracker.poll() == 0
+        assert tracker.poll() == 100
+        assert tracker.poll() == 200
+
+        confirmation = futures[150].result(timeout=0)
+        assert confirmation.confirmed_round == 3
+        assert confirmation["txn"]["txn"]["amt"] == 150
+        assert len(tracker) == 0
+        assert chain.requests == 1 + 2 * 3
+
+    def test_algod_encoded_delta(self):
+        """state keys, values and logs algod sends as str keep their bytes"""
+        chain = Chain()
+        tracker = ConfirmationTracker(chain)
+        signed = payments(1)[0]
+        txn = signed.transaction.dictify()
+        del txn["gh"], txn["gen"]
+        future = tracker.track(signed.get_txid())
+        chain.add_block([{"txn": txn, "sig": base64.b64decode(signed.signature), "hgi": True,
+                          "dt": {"gd": {b"\xff\x01": {"at": 1, "bs": b"\xfe"},
+                                        b"pool": {"at": 2, "ui": 5}},
+                                 "lg": [b"\xff\xfe", b"ok"]}}])
+
+        tracker.poll()
+        tracker.poll()
+
+        confirmation = future.result(timeout=0)
+        assert confirmation["global-state-delta"] == [
+            {"key": "/wE=", "value": {"action": 1, "bytes": "/g==", "uint": 0}},
+            {"key": "cG9vbA==", "value": {"action": 2, "bytes": "", "uint": 5}}]
+        assert confirmation["logs"] == ["//4=", "b2s="]
+
+    def test_malformed_record(self):
+        """a confirmed entry that cannot be read fails its future"""
+        chain = Chain()
+        tracker = ConfirmationTracker(chain)
+        signed = payments(2)
+        futures = [tracker.track(txn.get_txid()) for txn in signed]
+        txn = signed[0].transaction.dictify()
+        del txn["gh"], txn["gen"]
+        chain.add_block([{"txn": txn, "sig": base64.b64decode(signed[0].signature),
+                          "hgi": True, "dt": {"gd": {b"pool": {"at": 1, "bs": 5}}}}, signed[1]])
+
+        tracker.poll()
+        assert tracker.poll() == 1
+
+        with self.assertRaises(TypeError):
+            futures[0].result(timeout=0)
+        assert futures[1].result(timeout=0).confirmed_round == 2
+        assert len(tracker) == 0
+
+    def test_timeout(self):
+        """unconfirmed transactions fail after the timeout"""
+        chain = Chain()
+        tracker = ConfirmationTracker(chain, timeout=2)
+        resolved = []
+        future = tracker.track("MISSING", callback=resolved.append)
+        chain.add_block([])
+        chain.add_block([])
+
+        tracker.poll()
+        tracker.poll()
+        tracker.poll()
+
+        assert resolved == [future]
+        with self.assertRaises(ConfirmationTimeout):
+            future.result(timeout=0)
+
+    def test_background_thread(self):
+        """the daemon thread resolves futures"""
+        chain = Chain()
+        signed = payments(3)
+        chain.add_block(signed)
+        tracker = ConfirmationTracker(chain)
+        tracker.follower.next_round = 1
+        futures = [tracker.track(txn.get_txid()) for txn in signed]
+
+        tracker.start()
+        try:
+            rounds = [future.result(timeout=5).confirmed_round for future in futures]
+        finally:
+            tracker.stop()
+
+        assert rounds == [2, 2, 2]
+
+    def test_idle_and_released(self):
+        """the thread exits once idle, the shared tracker releases its client"""
+        chain = Chain()
+        signed = payments(1)
+        tracker = confirmation_tracker(chain)
+        future = tracker.track(signed[0].get_txid())
+        chain.add_block(signed)
+        assert future.result(timeout=5).confirmed_round == 2
+
+        thread = tracker._thread  # pylint: disable=protected-access
+        if thread is not None:
+            thread.join(timeout=5)
+        assert tracker._thread is None  # pylint: disable=protected-access
+
+        client = weakref.ref(chain)
+        del chain
+        gc.collect()
+        assert client() is None
+        with self.assertRaises(ReferenceError):
+            tracker.track("GONE")
@@ -0,0 +1,126 @@
+"""tests for the sqlite trade index"""
+from unittest import TestCase
+import base64
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from amm.export import CHECKPOINT_FILE, export
+from amm.testing.indexer import LocalIndexer
+from amm.trade_index import TradeIndex
+
+
+def call(rnd, sender, method, app_id=7):
+    """app call with an inner asset transfer back to the sender"""
+    return {"id": f"CALL{rnd}{sender}", "confirmed-round": rnd, "round-time": rnd,
+            "tx-type": "appl", "sender": sender,
+            "application-transaction": {
+                "application-id": app_id,
+                "application-args": [base64.b64encode(method.encode()).decode()]},
+            "inner-txns": [{"tx-type": "axfer", "sender": "APP",
+                            "asset-transfer-transaction": {
+                                "asset-id": 3, "amount": rnd, "receiver": sender}}]}
+
+
+def transfer(rnd, sender, amount):
+    """asset transfer to the app"""
+    return {"id": f"AXFER{rnd}{sender}", "confirmed-round": rnd, "round-time": rnd,
+            "tx-type": "axfer", "sender": sender,
+            "asset-transfer-transaction": {"asset-id": 1, "amount": amount,
+                                           "receiver": "APP"}}
+
+
+class TestTradeIndex(TestCase):
+    """Class for testing ingestion, incremental refresh and queries"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.out = self.directory.name
+        self.indexer = LocalIndexer(
+            [call(rnd, "ALICE" if rnd % 2 else "BOB", "swap") for rnd in range(1, 21)]
+            + [call(4, "ALICE", "supply"), call(5, "BOB", "swap", app_id=8)],
+            max_limit=3)
+        self.index = TradeIndex(os.path.join(self.out, "trades.sqlite"))
+
+    def tearDown(self):
+        self.index.close()
+        self.directory.cleanup()
+
+    def test_ingest_export(self):
+        """only lines appended since the last ingestion are read"""
+        path = os.path.join(self.out, "app_7.jsonl")
+        export(self.indexer, "app_7", self.out, last_round=10, application_id=7)
+        assert self.index.ingest(path) == 22
+        assert self.index.ingest(path) == 0
+        assert self.index.last_round(path) == 10
+
+        export(self.indexer, "app_7", self.out, application_id=7)
+        with open(path, "a", encoding="utf8") as file:
+            file.write('{"id": "partial"')
+        assert self.index.ingest(path) == 20
+        assert self.index.last_round(path) == 20
+        assert len(self.index.transactions(app_id=7)) == 21
+        assert len(self.index.transactions(asset_id=3)) == 21
+
+    def test_replaced_export(self):
+        """a shorter or rewritten file is read again from the start"""
+        path = os.path.join(self.out, "app_7.jsonl")
+        export(self.indexer, "app_7", self.out, last_round=10, application_id=7)
+        self.index.ingest(path)
+
+        os.remove(path)
+        os.remove(os.path.join(self.out, CHECKPOINT_FILE))
+        export(self.indexer, "app_7", self.out, last_round=5, application_id=7)
+        assert self.index.ingest(path) == 0
+        assert self.index.last_round(path) == 5
+
+        with open(path, "r+b") as file:
+            lines = file.readlines()
+            file.seek(0)
+            file.writelines([lines[-1]] + lines[:-1])
+        export(self.indexer, "app_8", self.out, application_id=8)
+        with open(path, "ab") as file, open(os.path.join(self.out, "app_8.jsonl"), "rb") as other:
+            file.write(other.read())
+        assert self.index.ingest(path) == 2
+        assert self.index.last_round(path) == 5
+
+    def test_refresh(self):
+        """indexer queries resume after the last complete round"""
+        assert self.index.refresh(self.indexer, "app_7", last_round=4, application_id=7) == 10
+        assert self.index.last_round("app_7") == 4
+        self.indexer.add([call(21, "CAROL", "swap")])
+        assert self.index.refresh(self.indexer, "app_7", application_id=7) == 34
+        assert self.index.last_round("app_7") == 21
+        assert self.index.refresh(self.indexer, "app_7", application_id=7) == 0
+
+    def test_queries(self):
+        """filters combine and rows come back in round order"""
+        self.index.refresh(self.indexer, "all")
+        swaps = self.index.swaps(7, sender="ALICE", min_round=3, max_round=9)
+        assert [row["round"] for row in swaps] == [3, 5, 7, 9]
+        assert {row["method"] for row in self.index.transactions(sender="ALICE")} == {
+            "swap", "supply"}
+        assert len(self.index.swaps(8)) == 1
+        inner = self.index.transactions(sender="APP", max_round=1)
+        assert inner[0]["id"] == "CALL1ALICE/0" and inner[0]["receiver"] == "ALICE"
+
+    def test_volume(self):
+        """amounts are summed per round"""
+        path = os.path.join(self.out, "transfers.jsonl")
+        with open(path, "w", encoding="utf8") as file:
+            for txn in (transfer(1, "A", 5), transfer(1, "B", 6), transfer(3, "A", 1)):
+                file.write(json.dumps(txn) + "\n")
+        self.index.ingest(path)
+        assert self.index.volume(1) == [(1, 11), (3, 1)]
+        assert self.index.volume(1, min_round=2) == [(3, 1)]
+
+    def test_numpy_free(self):
+        """the index does not need the numpy extra"""
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        result = subprocess.run(
+            [sys.executable, "-c",
+             "import sys\nimport amm.trade_index\nprint('numpy' in sys.modules)"],
+            cwd=root, capture_output=True, text=True, check=True)
+        assert result.stdout.split()[-1] == "False"
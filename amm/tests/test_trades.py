@@ -0,0 +1,85 @@
+"""tests for the columnar trade store"""
+from unittest import TestCase
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from amm.trades import NO_GROUP, TX_TYPES, convert
+
+
+def transfer(rnd, sender, receiver, amount, asset_id=1, **fields):
+    """indexer record of an asset transfer"""
+    return {"id": f"{rnd}-{sender}-{amount}", "confirmed-round": rnd,
+            "round-time": 1_600_000_000 + rnd, "tx-type": "axfer", "sender": sender,
+            "asset-transfer-transaction": {"asset-id": asset_id, "amount": amount,
+                                           "receiver": receiver}, **fields}
+
+
+class TestTrades(TestCase):
+    """Class for testing conversion and vectorized queries"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        swap = {"id": "swap", "confirmed-round": 12, "round-time": 1_600_000_012,
+                "tx-type": "appl", "sender": "BOB", "group": "R1JPVVA=",
+                "application-transaction": {"application-id": 77},
+                "inner-txns": [{"tx-type": "axfer", "sender": "APP",
+                                "asset-transfer-transaction": {
+                                    "asset-id": 3, "amount": 40, "receiver": "BOB"}}]}
+        self.first = [transfer(10, "ALICE", "APP", 100), transfer(10, "BOB", "APP", 5),
+                      transfer(12, "BOB", "APP", 50, group="R1JPVVA="), swap]
+        self.second = [transfer(11, "APP", "ALICE", 7), transfer(11, "ALICE", "BOB", 9, 2)]
+        self.paths = []
+        for index, records in enumerate((self.first, self.second)):
+            path = os.path.join(self.directory.name, f"export_{index}.jsonl")
+            with open(path, "w", encoding="utf8") as file:
+                file.writelines(json.dumps(record) + "\n" for record in records)
+            self.paths.append(path)
+        self.store = convert(self.paths, os.path.join(self.directory.name, "store"), chunk=2)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_columns(self):
+        """rows are sorted by round with inner transactions flattened"""
+        store = self.store
+        assert len(store) == 7
+        assert isinstance(store["round"], np.memmap)
+        assert store["round"].tolist() == [10, 10, 11, 11, 12, 12, 12]
+        assert store.accounts[store["sender"][-1]] == "APP"
+        assert store["asset_id"][-1] == 3 and store["group"][-1] == 0
+        assert store["app_id"][-2] == 77
+        assert store["tx_type"][-2] == TX_TYPES.index("appl")
+        assert store["group"][0] == NO_GROUP
+        assert store.groups == ["R1JPVVA="]
+
+    def test_overlapping_exports(self):
+        """transactions repeated across exports are stored once"""
+        path = os.path.join(self.directory.name, "overlap.jsonl")
+        with open(path, "w", encoding="utf8") as file:
+            file.writelines(json.dumps(record) + "\n" for record in self.first[2:])
+        store = convert(self.paths + [path], os.path.join(self.directory.name, "overlap"))
+        assert len(store) == 7
+        assert store["round"].tolist() == self.store["round"].tolist()
+
+    def test_volume_per_round(self):
+        """volumes are summed per round"""
+        rounds, volumes = self.store.volume_per_round(1)
+        assert rounds.tolist() == [10, 11, 12]
+        assert volumes.tolist() == [105, 7, 50]
+
+        rounds, volumes = self.store.volume_per_round(1, min_round=11, max_round=11)
+        assert rounds.tolist() == [11] and volumes.tolist() == [7]
+        assert self.store.volume_per_round(9)[0].size == 0
+
+    def test_flows(self):
+        """per account totals match the scalar lookup"""
+        flows = self.store.flows(1)
+        app = self.store.account_index("APP")
+        assert flows.received[app] == 155 and flows.sent[app] == 7
+        assert self.store.account_flow("BOB", 1) == (55, 0)
+        assert self.store.account_flow("BOB", 3) == (0, 40)
+        assert self.store.account_flow("ALICE", 1, max_round=10) == (100, 0)
+        assert self.store.account_flow("CAROL", 1) == (0, 0)
@@ -0,0 +1,62 @@
+"""tests for the transaction group builders"""
+from unittest import TestCase
+import base64
+
+from algosdk import account
+from algosdk.logic import get_application_address
+from algosdk.transaction import (SuggestedParams, PaymentTxn, AssetTransferTxn,
+                                 ApplicationCallTxn)
+
+from amm.transactions import (INNER_TXN_FEE, swap_txns, withdraw_txns,
+                              redeem_txns, set_result_txns)
+from amm.testing.chain import GENESIS_HASH
+
+
+class Market:  # pylint: disable=too-few-public-methods
+    """token ids of a set up app"""
+    app_id = 100
+    app_addr = get_application_address(100)
+    stable_token, pool_token, yes_token, no_token = 1, 2, 3, 4
+
+
+class TestTransactions(TestCase):
+    """Class for testing compact fee pooled groups"""
+
+    def setUp(self):
+        self.sender = account.address_from_private_key(account.generate_account()[0])
+        self.sp = SuggestedParams(0, 1, 1001, base64.b64encode(GENESIS_HASH).decode(),
+                                  "testnet-v1.0", min_fee=1000)
+
+    def groups(self, compact):
+        """every group paying for inner transactions"""
+        market = Market()
+        return [
+            swap_txns(market, 'yes', 10, self.sender, self.sp, compact=compact),
+            withdraw_txns(market, 10, self.sender, self.sp, compact=compact),
+            redeem_txns(market, 3, 10, self.sender, 1, self.sp, compact=compact),
+        ]
+
+    def test_fee_payment(self):
+        """default groups fund the app account for inner fees"""
+        for group in self.groups(compact=False):
+            assert len(group) == 3
+            assert isinstance(group[0], PaymentTxn)
+            assert group[0].amt == INNER_TXN_FEE
+            assert group[-1].fee == self.sp.min_fee
+
+    def test_compact(self):
+        """compact groups drop the payment and pool the fee on the app call"""
+        for group in self.groups(compact=True):
+            assert len(group) == 2
+            assert isinstance(group[0], AssetTransferTxn)
+            assert isinstance(group[1], ApplicationCallTxn)
+            assert group[0].fee == self.sp.min_fee
+            assert group[1].fee == 2 * self.sp.min_fee
+            assert group[0].group == group[1].group
+        assert not self.sp.flat_fee
+
+    def test_compact_result(self):
+        """setting the result has no inner transaction to pay for"""
+        group = set_result_txns(Market(), self.sender, b"yes", self.sp, compact=True)
+        assert len(group) == 1
+        assert group[0].fee == self.sp.min_fee
@@ -0,0 +1,305 @@
+"""sqlite index of exported transactions for per account and per market queries"""
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+from algosdk.v2client.indexer import IndexerClient
+
+from amm.export import PAGE_SIZE, iter_transactions, keyed_records
+from amm.subscriber import METHODS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id TEXT PRIMARY KEY,
+    round INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    tx_type TEXT NOT NULL,
+    sender TEXT NOT NULL,
+    receiver TEXT,
+    asset_id INTEGER,
+    app_id INTEGER,
+    amount INTEGER NOT NULL,
+    group_id TEXT,
+    method TEXT
+);
+CREATE INDEX IF NOT EXISTS transactions_round ON transactions (round);
+CREATE INDEX IF NOT EXISTS transactions_app ON transactions (app_id, round);
+CREATE INDEX IF NOT EXISTS transactions_asset ON transactions (asset_id, round);
+CREATE INDEX IF NOT EXISTS transactions_sender ON transactions (sender, round);
+CREATE TABLE IF NOT EXISTS sources (
+    name TEXT PRIMARY KEY,
+    last_round INTEGER NOT NULL,
+    offset INTEGER NOT NULL DEFAULT 0,
+    fingerprint TEXT
+);
+"""
+
+# bytes before the ingested offset checked against the file, covering the
+# end of the last line read
+_FINGERPRINT_BYTES = 1024
+
+_COLUMNS = ("id", "round", "timestamp", "tx_type", "sender", "receiver",
+            "asset_id", "app_id", "amount", "group_id", "method")
+_INSERT = (f"INSERT OR IGNORE INTO transactions ({', '.join(_COLUMNS)}) "
+           f"VALUES ({', '.join('?' for _ in _COLUMNS)})")
+
+
+def _fingerprint(path: str, offset: int) -> str:
+    with open(path, "rb") as file:
+        file.seek(max(0, offset - _FINGERPRINT_BYTES))
+        return hashlib.sha256(file.read(offset - file.tell())).hexdigest()
+
+
+def _method(call: dict) -> Optional[str]:
+    if call.get("on-completion") == "delete":
+        return "delete"
+    args = call.get("application-args") or []
+    if args:
+        name = base64.b64decode(args[0])
+        if name in METHODS:
+            return name.decode()
+    return "call"
+
+
+def rows(txn: dict) -> Iterable[Tuple]:
+    """
+    Index rows of a transaction and its inner transactions, keyed as by
+    keyed_records.
+    Args:
+        txn: indexer transaction record
+    Returns: values in _COLUMNS order
+    """
+    for key, record in keyed_records(txn):
+        transfer = record.get("asset-transfer-transaction")
+        details = transfer or record.get("payment-transaction") or {}
+        call = record.get("application-transaction")
+        yield (
+            key,
+            record["confirmed-round"],
+            record.get("round-time", 0),
+            record.get("tx-type", ""),
+            record.get("sender", ""),
+            details.get("receiver"),
+            (transfer or record.get("asset-config-transaction")
+             or record.get("asset-freeze-transaction") or {}).get("asset-id"),
+            (call or {}).get("application-id") or record.get("created-application-index"),
+            details.get("amount", 0),
+            record.get("group"),
+            _method(call) if call is not None else None,
+        )
+
+
+class TradeIndex:
+    """
+    Exported transactions in an sqlite file, indexed by app id, asset id,
+    sender and round. Each source, an export file or an indexer query,
+    remembers where its last ingestion stopped, so refreshing only reads
+    what is new.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """closes the database"""
+        self._conn.close()
+
+    def __enter__(self) -> "TradeIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def last_round(self, name: str) -> Optional[int]:
+        """
+        Last round ingested from a source.
+        Args:
+            name: source name
+        Returns: round, None before the first ingestion
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_round FROM sources WHERE name = ?", (name,)).fetchone()
+        return None if row is None else row["last_round"]
+
+    def _source(self, name: str) -> Tuple[int, int, Optional[str]]:
+        row = self._conn.execute(
+            "SELECT last_round, offset, fingerprint FROM sources WHERE name = ?",
+            (name,)).fetchone()
+        return (-1, 0, None) if row is None else (
+            row["last_round"], row["offset"], row["fingerprint"])
+
+    def _save(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self, name: str, txns: Iterable[dict], last_round: int, offset: int,
+        fingerprint: Optional[str] = None
+    ) -> int:
+        before = self._conn.total_changes
+        for txn in txns:
+            self._conn.executemany(_INSERT, rows(txn))
+        added = self._conn.total_changes - before
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sources (name, last_round, offset, fingerprint) "
+            "VALUES (?, ?, ?, ?)", (name, last_round, offset, fingerprint))
+        return added
+
+    def ingest(self, path: str, batch: int = 10_000) -> int:
+        """
+        Adds the lines appended to an export file since the last call.
+        The file is read from the byte offset where the previous ingestion
+        stopped; a partly written last line is left for the next call.
+        When the file is now shorter than that offset or the bytes before
+        it changed, e.g. it was exported again, it is read from the start.
+        Args:
+            path: jsonl file written by amm.export, also the source name
+            batch: lines committed per transaction
+        Returns: number of rows added
+        """
+        total = 0
+        with self._lock, open(path, "rb") as file:
+            last_round, offset, fingerprint = self._source(path)
+            if offset and (offset > os.path.getsize(path)
+                           or _fingerprint(path, offset) != fingerprint):
+                last_round, offset = -1, 0
+            file.seek(offset)
+            txns: List[dict] = []
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                if line.strip():
+                    txns.append(json.loads(line))
+                    last_round = max(last_round, txns[-1]["confirmed-round"])
+                if len(txns) >= batch:
+                    with self._conn:
+                        total += self._save(path, txns, last_round, offset,
+                                            _fingerprint(path, offset))
+                    txns = []
+            with self._conn:
+                total += self._save(path, txns, last_round, offset,
+                                    _fingerprint(path, offset))
+        return total
+
+    def refresh(
+        self, indexer: IndexerClient, name: str, page_size: int = PAGE_SIZE,
+        last_round: Optional[int] = None, **filters
+    ) -> int:
+        """
+        Adds transactions confirmed after the last round of a source,
+        querying the indexer directly. Pages are committed as they arrive,
+        an interrupted refresh resumes from the last complete round.
+        Args:
+            indexer: indexer client
+            name: source name
+            page_size: transactions per request
+            last_round: last round to read, defaults to the indexer round
+            filters: search_transactions filters, e.g. application_id
+        Returns: number of rows added
+        """
+        if last_round is None:
+            last_round = indexer.health()["round"]
+        added = 0
+        with self._lock:
+            ingested = self._source(name)[0]
+            if ingested >= last_round:
+                return 0
+            page: List[dict] = []
+            for txn in iter_transactions(indexer, page_size, min_round=ingested + 1,
+                                         max_round=last_round, **filters):
+                page.append(txn)
+                if len(page) >= page_size:
+                    # the last round of the page may continue on the next one
+                    ingested = max(ingested, page[-1]["confirmed-round"] - 1)
+                    with self._conn:
+                        added += self._save(name, page, ingested, 0)
+                    page = []
+            with self._conn:
+                # every round up to last_round has been read, even if empty
+                added += self._save(name, page, last_round, 0)
+        return added
+
+    def transactions(  # pylint: disable=too-many-arguments
+        self, *, app_id: Optional[int] = None, asset_id: Optional[int] = None,
+        sender: Optional[str] = None, method: Optional[str] = None,
+        tx_type: Optional[str] = None, min_round: Optional[int] = None,
+        max_round: Optional[int] = None, limit: Optional[int] = None
+    ) -> List[dict]:
+        """
+        Indexed transactions matching every given filter.
+        Args:
+            app_id: called application
+            asset_id: transferred, configured or frozen asset
+            sender: sender address
+            method: approval_program branch of app calls, e.g. swap
+            tx_type: pay, axfer, appl...
+            min_round: first round
+            max_round: last round, included
+            limit: maximum number of rows
+        Returns: rows in round order
+        """
+        clauses, params = [], []
+        for column, value in (("app_id", app_id), ("asset_id", asset_id),
+                              ("sender", sender), ("method", method),
+                              ("tx_type", tx_type)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if min_round is not None:
+            clauses.append("round >= ?")
+            params.append(min_round)
+        if max_round is not None:
+            clauses.append("round <= ?")
+            params.append(max_round)
+        query = "SELECT * FROM transactions"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY round, id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(query, params)]
+
+    def swaps(
+        self, app_id: int, sender: Optional[str] = None,
+        min_round: Optional[int] = None, max_round: Optional[int] = None
+    ) -> List[dict]:
+        """
+        Swap calls to a market.
+        Args:
+            app_id: market application id
+            sender: trader, every trader when None
+            min_round: first round
+            max_round: last round, included
+        Returns: app call rows in round order
+        """
+        return self.transactions(app_id=app_id, sender=sender, method="swap",
+                                 min_round=min_round, max_round=max_round)
+
+    def volume(
+        self, asset_id: int, min_round: Optional[int] = None,
+        max_round: Optional[int] = None
+    ) -> List[Tuple[int, int]]:
+        """
+        Transferred amount of an asset per round.
+        Args:
+            asset_id: asset
+            min_round: first round
+            max_round: last round, included
+        Returns: (round, amount) pairs in round order
+        """
+        query = ("SELECT round, SUM(amount) FROM transactions "
+                 "WHERE asset_id = ? AND tx_type = 'axfer' AND round BETWEEN ? AND ? "
+                 "GROUP BY round ORDER BY round")
+        params = (asset_id, -1 if min_round is None else min_round,
+                  2 ** 63 - 1 if max_round is None else max_round)
+        with self._lock:
+            return [tuple(row) for row in self._conn.execute(query, params)]
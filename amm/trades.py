@@ -0,0 +1,303 @@
+"""columnar, memory mapped store of exported indexer transactions"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+from typing import (Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence,
+                    Tuple)
+
+import numpy as np
+
+from amm.export import keyed_records
+
+TX_TYPES = ("pay", "axfer", "appl", "acfg", "afrz", "keyreg", "stpf")
+
+COLUMNS = {
+    "round": np.uint64,
+    "timestamp": np.int64,
+    "sender": np.uint32,
+    "receiver": np.uint32,
+    "asset_id": np.uint64,
+    "app_id": np.uint64,
+    "amount": np.uint64,
+    "tx_type": np.uint8,
+    "group": np.int32,
+}
+
+ACCOUNTS_FILE = "accounts.json"
+GROUPS_FILE = "groups.json"
+NO_ACCOUNT = 0
+NO_GROUP = -1
+
+
+def iter_jsonl(paths: Iterable[str]) -> Iterator[dict]:
+    """
+    Reads exported transactions one line at a time.
+    Args:
+        paths: jsonl files written by amm.export
+    Returns: indexer transaction records
+    """
+    for path in paths:
+        with open(path, encoding="utf8") as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class _Columns:  # pylint: disable=too-few-public-methods
+    """raw column files growing chunk by chunk"""
+
+    def __init__(self, directory: str, chunk: int):
+        self.directory = directory
+        self.chunk = chunk
+        self.length = 0
+        self.accounts: Dict[str, int] = {"": NO_ACCOUNT}
+        self.groups: Dict[str, int] = {}
+        self.buffers: Dict[str, list] = {name: [] for name in COLUMNS}
+        self.files = {name: open(os.path.join(directory, f"{name}.bin"), "wb")  # pylint: disable=consider-using-with
+                      for name in COLUMNS}
+
+    def _account(self, address: Optional[str]) -> int:
+        return self.accounts.setdefault(address or "", len(self.accounts))
+
+    def add(self, txn: dict) -> None:
+        """buffers one record"""
+        tx_type = txn.get("tx-type", "")
+        transfer = txn.get("asset-transfer-transaction")
+        payment = txn.get("payment-transaction")
+        details = transfer or payment or {}
+        group = txn.get("group")
+        row = {
+            "round": txn["confirmed-round"],
+            "timestamp": txn.get("round-time", 0),
+            "sender": self._account(txn.get("sender")),
+            "receiver": self._account(details.get("receiver")),
+            "asset_id": (transfer or txn.get("asset-config-transaction")
+                         or txn.get("asset-freeze-transaction") or {}).get("asset-id", 0),
+            "app_id": (txn.get("application-transaction") or {}).get("application-id", 0)
+            or txn.get("created-application-index", 0),
+            "amount": details.get("amount", 0),
+            "tx_type": TX_TYPES.index(tx_type) if tx_type in TX_TYPES else 255,
+            "group": NO_GROUP if not group else self.groups.setdefault(group, len(self.groups)),
+        }
+        for name, value in row.items():
+            self.buffers[name].append(value)
+        self.length += 1
+        if len(self.buffers["round"]) >= self.chunk:
+            self.flush()
+
+    def flush(self) -> None:
+        """writes buffered rows"""
+        for name, dtype in COLUMNS.items():
+            self.files[name].write(np.asarray(self.buffers[name], dtype=dtype).tobytes())
+            self.buffers[name] = []
+
+    def close(self) -> None:
+        """flushes and closes the column files"""
+        self.flush()
+        for file in self.files.values():
+            file.close()
+
+
+def _unique_records(paths: Iterable[str]) -> Iterator[dict]:
+    # overlapping exports repeat transactions
+    seen = set()
+    for txn in iter_jsonl(paths):
+        for key, record in keyed_records(txn):
+            if key not in seen:
+                seen.add(key)
+                yield record
+
+
+def convert(
+    paths: Iterable[str], directory: str, chunk: int = 100_000
+) -> "TradeStore":
+    """
+    Converts exported jsonl files into a columnar store.
+    Rows are written chunk by chunk while reading the export, skipping
+    transactions already read, as keyed by keyed_records; only those keys
+    are held for the whole read. Exports in round order are then stored as
+    they are; otherwise rows are sorted by round at the end, which holds
+    the round column, the sort order and one other column in memory at a
+    time.
+    Args:
+        paths: jsonl files written by amm.export
+        directory: store directory, replaced if it exists
+        chunk: rows buffered before writing
+    Returns: the store
+    """
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=parent)
+    try:
+        columns = _Columns(staging, chunk)
+        try:
+            for record in _unique_records(paths):
+                columns.add(record)
+        finally:
+            columns.close()
+
+        rounds = np.fromfile(os.path.join(staging, "round.bin"), dtype=np.uint64)
+        order = None if np.all(rounds[:-1] <= rounds[1:]) else np.argsort(rounds, kind="stable")
+        for name, dtype in COLUMNS.items():
+            raw = os.path.join(staging, f"{name}.bin")
+            values = np.memmap(raw, dtype=dtype, mode="r") if columns.length else \
+                np.empty(0, dtype=dtype)
+            np.save(os.path.join(staging, f"{name}.npy"),
+                    values if order is None else values[order])
+            del values
+            os.remove(raw)
+
+        with open(os.path.join(staging, ACCOUNTS_FILE), "w", encoding="utf8") as file:
+            json.dump(sorted(columns.accounts, key=columns.accounts.get), file)
+        with open(os.path.join(staging, GROUPS_FILE), "w", encoding="utf8") as file:
+            json.dump(sorted(columns.groups, key=columns.groups.get), file)
+
+        if os.path.exists(directory):
+            shutil.rmtree(directory)
+        os.replace(staging, directory)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return TradeStore(directory)
+
+
+class Flows(NamedTuple):
+    """per account totals of one asset"""
+    accounts: List[str]
+    sent: np.ndarray
+    received: np.ndarray
+
+
+class TradeStore:
+    """
+    Memory mapped columns of a converted export.
+    Rows are sorted by round; sender and receiver index the accounts
+    list, group indexes the groups list or is -1.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.columns = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+                        for name in COLUMNS}
+        with open(os.path.join(directory, ACCOUNTS_FILE), encoding="utf8") as file:
+            self.accounts: List[str] = json.load(file)
+        with open(os.path.join(directory, GROUPS_FILE), encoding="utf8") as file:
+            self.groups: List[str] = json.load(file)
+        self._account_index = {address: index for index, address in enumerate(self.accounts)}
+
+    def __len__(self) -> int:
+        return len(self.columns["round"])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def account_index(self, address: str) -> int:
+        """
+        Index of an account in the sender and receiver columns.
+        Args:
+            address: account address
+        Returns: index, -1 when the account never appears
+        """
+        return self._account_index.get(address, -1)
+
+    def rows(self, min_round: Optional[int] = None, max_round: Optional[int] = None) -> slice:
+        """
+        Rows of a round range, found by binary search on the sorted rounds.
+        Args:
+            min_round: first round
+            max_round: last round, included
+        Returns: slice of the columns
+        """
+        rounds = self.columns["round"]
+        start = 0 if min_round is None else int(np.searchsorted(rounds, min_round, "left"))
+        stop = len(rounds) if max_round is None else int(
+            np.searchsorted(rounds, max_round, "right"))
+        return slice(start, stop)
+
+    def _transfers(self, asset_id: int, rows: slice) -> np.ndarray:
+        return ((self.columns["asset_id"][rows] == asset_id)
+                & (self.columns["tx_type"][rows] == TX_TYPES.index("axfer")))
+
+    def volume_per_round(
+        self, asset_id: int, min_round: Optional[int] = None,
+        max_round: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Transferred amount of an asset in every round it moved.
+        Args:
+            asset_id: asset
+            min_round: first round
+            max_round: last round, included
+        Returns: rounds and volumes
+        """
+        rows = self.rows(min_round, max_round)
+        mask = self._transfers(asset_id, rows)
+        rounds = self.columns["round"][rows][mask]
+        amounts = self.columns["amount"][rows][mask]
+        if rounds.size == 0:
+            return rounds, amounts
+        starts = np.flatnonzero(np.r_[True, rounds[1:] != rounds[:-1]])
+        return rounds[starts], np.add.reduceat(amounts, starts)
+
+    def flows(
+        self, asset_id: int, min_round: Optional[int] = None,
+        max_round: Optional[int] = None
+    ) -> Flows:
+        """
+        Amount of an asset sent and received by every account.
+        Args:
+            asset_id: asset
+            min_round: first round
+            max_round: last round, included
+        Returns: totals indexed like accounts
+        """
+        rows = self.rows(min_round, max_round)
+        mask = self._transfers(asset_id, rows)
+        amounts = self.columns["amount"][rows][mask]
+        sent = np.zeros(len(self.accounts), dtype=np.uint64)
+        received = np.zeros(len(self.accounts), dtype=np.uint64)
+        np.add.at(sent, self.columns["sender"][rows][mask], amounts)
+        np.add.at(received, self.columns["receiver"][rows][mask], amounts)
+        return Flows(self.accounts, sent, received)
+
+    def account_flow(
+        self, address: str, asset_id: int, min_round: Optional[int] = None,
+        max_round: Optional[int] = None
+    ) -> Tuple[int, int]:
+        """
+        Amount of an asset one account sent and received.
+        Args:
+            address: account address
+            asset_id: asset
+            min_round: first round
+            max_round: last round, included
+        Returns: sent and received totals
+        """
+        index = self.account_index(address)
+        if index < 0:
+            return 0, 0
+        rows = self.rows(min_round, max_round)
+        mask = self._transfers(asset_id, rows)
+        amounts = self.columns["amount"][rows]
+        sent = amounts[mask & (self.columns["sender"][rows] == index)].sum(dtype=np.uint64)
+        received = amounts[mask & (self.columns["receiver"][rows] == index)].sum(
+            dtype=np.uint64)
+        return int(sent), int(received)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """command line entry point"""
+    parser = argparse.ArgumentParser(
+        description="Converts exported jsonl transactions to a columnar store.")
+    parser.add_argument("store", help="store directory")
+    parser.add_argument("exports", nargs="+", help="jsonl files written by amm.export")
+    args = parser.parse_args(argv)
+
+    store = convert(args.exports, args.store)
+    print(f"{args.store}: {len(store)} rows, {len(store.accounts) - 1} accounts")
+
+
+if __name__ == "__main__":
+    main()
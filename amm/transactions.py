@@ -0,0 +1,397 @@
+"""transaction groups for the amm operations"""
+import base64
+import copy
+from concurrent.futures import Future
+from typing import Iterable, List, Optional
+
+from algosdk import constants, encoding
+from algosdk.transaction import (StateSchema, ApplicationCreateTxn,
+                                 OnComplete, PaymentTxn, ApplicationCallTxn,
+                                 AssetOptInTxn, AssetTransferTxn, ApplicationDeleteTxn,
+                                 SuggestedParams, Transaction, SignedTransaction,
+                                 assign_group_id)
+
+from amm.utils.account import Account
+from amm.utils.confirmation import Confirmation
+
+MIN_BALANCE_REQUIREMENT = (
+    # min account balance
+    110_000
+    # additional min balance for 4 assets
+    + 100_000 * 4
+)
+
+INNER_TXN_FEE = 2_000
+
+
+def pooled_params(sp: SuggestedParams, inner_txns: int) -> SuggestedParams:
+    """
+    Params of an app call paying for its own inner transactions.
+    AVM v6 inner transactions take their fee from the group's fee credit
+    before the app account balance, so overpaying the outer call replaces
+    the separate fee payment.
+    Args:
+        sp: suggested params
+        inner_txns: number of inner transactions the call submits
+    Returns: params with a flat fee covering the call and its inner transactions
+    """
+    pooled = copy.copy(sp)
+    pooled.flat_fee = True
+    pooled.fee = (sp.min_fee or constants.MIN_TXN_FEE) * (1 + inner_txns)
+    return pooled
+
+
+def create_txns(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    approval: bytes, clear: bytes, token: int, min_increment: int,
+    sender: str, sp: SuggestedParams
+) -> List[Transaction]:
+    """
+    Creates the amm application.
+    Args:
+        approval: approval program bytecode
+        clear: clear state program bytecode
+        token: the id of liquidity token in the liquidity pool
+        min_increment: min int to fund the pool
+        sender: deployer address
+        sp: suggested params
+    Returns: single transaction list
+    """
+    global_schema = StateSchema(
+        num_uints=13, num_byte_slices=1)
+    local_schema = StateSchema(num_uints=0, num_byte_slices=0)
+
+    app_args = [
+        encoding.decode_address(sender),
+        token.to_bytes(8, "big"),
+        min_increment.to_bytes(8, "big"),
+    ]
+
+    return [ApplicationCreateTxn(
+        sender=sender,
+        on_complete=OnComplete.NoOpOC,
+        approval_program=approval,
+        clear_program=clear,
+        global_schema=global_schema,
+        local_schema=local_schema,
+        app_args=app_args,
+        sp=sp,
+    )]
+
+
+def setup_txns(market, sender: str, sp: SuggestedParams) -> List[Transaction]:
+    """
+    Group funding the app account and creating the pool, yes and no tokens.
+    Args:
+        market: app with its token ids
+        sender: funder address
+        sp: suggested params
+    Returns: grouped transactions
+    """
+    fund_app_tx = PaymentTxn(
+        sender=sender,
+        receiver=market.app_addr,
+        amt=MIN_BALANCE_REQUIREMENT,
+        sp=sp,
+    )
+
+    setup_tx = ApplicationCallTxn(
+        sender=sender,
+        index=market.app_id,
+        on_complete=OnComplete.NoOpOC,
+        app_args=[b"setup"],
+        foreign_assets=[market.stable_token],
+        sp=sp,
+    )
+
+    return assign_group_id([fund_app_tx, setup_tx])
+
+
+def opt_in_txns(asset_id: int, sender: str, sp: SuggestedParams) -> List[Transaction]:
+    """
+    Opts an account into an asset.
+    Args:
+        asset_id: asset
+        sender: account opting in
+        sp: suggested params
+    Returns: single transaction list
+    """
+    return [AssetOptInTxn(sender=sender, index=asset_id, sp=sp)]
+
+
+def supply_txns(
+    market, quantity: int, sender: str, sp: SuggestedParams,
+    *, funding: int = MIN_BALANCE_REQUIREMENT
+) -> List[Transaction]:
+    """
+    Group supplying liquidity to the pool.
+    Args:
+        market: app with its token ids
+        quantity: stablecoin amount
+        sender: supplier address
+        sp: suggested params
+        funding: microalgos paid to the app account, no payment when 0
+    Returns: grouped transactions
+    """
+    fee_txns = [PaymentTxn(
+        sender=sender,
+        receiver=market.app_addr,
+        amt=funding,
+        sp=sp,
+    )] if funding else []
+
+    token_tx = AssetTransferTxn(
+        sender=sender,
+        receiver=market.app_addr,
+        index=market.stable_token,
+        amt=quantity,
+        sp=sp,
+    )
+
+    app_call_tx = ApplicationCallTxn(
+        sender=sender,
+        index=market.app_id,
+        on_complete=OnComplete.NoOpOC,
+        app_args=[b"supply"],
+        foreign_assets=[market.stable_token, market.pool_token,
+                        market.yes_token, market.no_token],
+        sp=sp,
+    )
+
+    return assign_group_id(fee_txns + [token_tx, app_call_tx])
+
+
+def swap_txns(  # pylint: disable=too-many-arguments
+    market, option: str, quantity: int, sender: str, sp: SuggestedParams,
+    *, compact: bool = False
+) -> List[Transaction]:
+    """
+    Group swapping stable for an AMM option.
+    Args:
+        market: app with its token ids
+        option: string either yes or no option
+        quantity: token amount
+        sender: buyer address
+        sp: suggested params
+        compact: pool the inner transaction fee on the app call
+    Returns: grouped transactions
+    """
+    if option == 'yes':
+        second_argument = b"buy_yes"
+    elif option == 'no':
+        second_argument = b"buy_no"
+    else:
+        raise ValueError(f"unknown option {option!r}")
+
+    fee_txns = [] if compact else [PaymentTxn(
+        sender=sender,
+        receiver=market.app_addr,
+        amt=INNER_TXN_FEE,
+        sp=sp,
+    )]
+
+    token_tx = AssetTransferTxn(
+        sender=sender,
+        receiver=market.app_addr,
+        index=market.stable_token,
+        amt=quantity,
+        sp=sp,
+    )
+
+    app_call_tx = ApplicationCallTxn(
+        sender=sender,
+        index=market.app_id,
+        on_complete=OnComplete.NoOpOC,
+        app_args=[b"swap", second_argument],
+        foreign_assets=[market.stable_token, market.pool_token,
+                        market.yes_token, market.no_token],
+        sp=pooled_params(sp, 1) if compact else sp,
+    )
+
+    return assign_group_id(fee_txns + [token_tx, app_call_tx])
+
+
+def withdraw_txns(
+    market, pool_token_amount: int, sender: str, sp: SuggestedParams,
+    *, compact: bool = False
+) -> List[Transaction]:
+    """
+    Group withdrawing liquidity from the pool.
+    Args:
+        market: app with its token ids
+        pool_token_amount: token amount
+        sender: withdrawal address
+        sp: suggested params
+        compact: pool the inner transaction fee on the app call
+    Returns: grouped transactions
+    """
+    fee_txns = [] if compact else [PaymentTxn(
+        sender=sender,
+        receiver=market.app_addr,
+        amt=INNER_TXN_FEE,
+        sp=sp,
+    )]
+
+    pool_token_tx = AssetTransferTxn(
+        sender=sender,
+        receiver=market.app_addr,
+        index=market.pool_token,
+        amt=pool_token_amount,
+        sp=sp,
+    )
+
+    app_call_tx = ApplicationCallTxn(
+        sender=sender,
+        index=market.app_id,
+        on_complete=OnComplete.NoOpOC,
+        app_args=[b"withdraw"],
+        foreign_assets=[market.stable_token, market.pool_token],
+        sp=pooled_params(sp, 1) if compact else sp,
+    )
+
+    return assign_group_id(fee_txns + [pool_token_tx, app_call_tx])
+
+
+def redeem_txns(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    market, token_in: int, token_amount: int, sender: str, token_out: int,
+    sp: SuggestedParams, *, compact: bool = False
+) -> List[Transaction]:
+    """
+    Group redeeming winning token for stablecoin.
+    Args:
+        market: app with its token ids
+        token_in: should be a winning token
+        token_amount: token amount
+        sender: withdrawal address
+        token_out: stablecoin
+        sp: suggested params
+        compact: pool the inner transaction fee on the app call
+    Returns: grouped transactions
+    """
+    fee_txns = [] if compact else [PaymentTxn(
+        sender=sender,
+        receiver=market.app_addr,
+        amt=INNER_TXN_FEE,
+        sp=sp,
+    )]
+
+    token_tx = AssetTransferTxn(
+        sender=sender,
+        receiver=market.app_addr,
+        index=token_in,
+        amt=token_amount,
+        sp=sp,
+    )
+
+    app_call_tx = ApplicationCallTxn(
+        sender=sender,
+        index=market.app_id,
+        on_complete=OnComplete.NoOpOC,
+        app_args=[b"redeem"],
+        foreign_assets=[token_out, token_in],
+        sp=pooled_params(sp, 1) if compact else sp,
+    )
+
+    return assign_group_id(fee_txns + [token_tx, app_call_tx])
+
+
+def set_result_txns(
+    market, sender: str, second_argument: bytes, sp: SuggestedParams,
+    *, compact: bool = False
+) -> List[Transaction]:
+    """
+    Group setting the result of the event.
+    Args:
+        market: app with its token ids
+        sender: creator of the amm
+        second_argument: result
+        sp: suggested params
+        compact: leave out the fee payment, the call has no inner transactions
+    Returns: grouped transactions
+    """
+    fee_txns = [] if compact else [PaymentTxn(
+        sender=sender,
+        receiver=market.app_addr,
+        amt=INNER_TXN_FEE,
+        sp=sp,
+    )]
+
+    call_tx = ApplicationCallTxn(
+        sender=sender,
+        index=market.app_id,
+        on_complete=OnComplete.NoOpOC,
+        app_args=[b"result", second_argument],
+        sp=sp,
+    )
+
+    return assign_group_id(fee_txns + [call_tx])
+
+
+def close_txns(market, sender: str, sp: SuggestedParams) -> List[Transaction]:
+    """
+    Deletes the amm application.
+    Args:
+        market: app with its token ids
+        sender: creator of the amm
+        sp: suggested params
+    Returns: single transaction list
+    """
+    return [ApplicationDeleteTxn(sender=sender, index=market.app_id, sp=sp)]
+
+
+def sign_group(txns: Iterable[Transaction], account: Account) -> List[SignedTransaction]:
+    """
+    Signs every transaction of a group with one account.
+    Args:
+        txns: transactions
+        account: signer
+    Returns: signed transactions
+    """
+    return [txn.sign(account.private_key) for txn in txns]
+
+
+class PendingGroup:
+    """
+    Handle of a sent group.
+    tx_id is the last transaction of the group, the one the app
+    operations wait on.
+    """
+
+    __slots__ = ("tx_ids", "group_id", "future")
+
+    def __init__(self, signed: List[SignedTransaction], future: Future):
+        self.tx_ids = [txn.get_txid() for txn in signed]
+        group = signed[-1].transaction.group
+        self.group_id: Optional[str] = (
+            None if group is None else base64.b64encode(group).decode())
+        self.future = future
+
+    @property
+    def tx_id(self) -> str:
+        """id of the transaction confirming the operation"""
+        return self.tx_ids[-1]
+
+    def done(self) -> bool:
+        """whether the group is confirmed or failed"""
+        return self.future.done()
+
+    def result(self, timeout: Optional[float] = None) -> Confirmation:
+        """
+        Waits for the confirmation.
+        Args:
+            timeout: seconds to wait
+        Returns: confirmation
+        """
+        return self.future.result(timeout)
+
+
+def wait_all(
+    handles: Iterable[PendingGroup], timeout: Optional[float] = None
+) -> List[Confirmation]:
+    """
+    Waits for many pending groups.
+    Args:
+        handles: pending groups
+        timeout: seconds to wait for each
+    Returns: confirmations in the same order
+    """
+    return [handle.result(timeout) for handle in handles]
@@ -0,0 +1,122 @@
+"""algod compiled contract bytecode shipped inside the package, loaded without pyteal"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from typing import Dict, Optional, Sequence, Tuple
+
+from algosdk.v2client.algod import AlgodClient
+
+ARTIFACTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "compiled")
+MANIFEST = "manifest.json"
+
+# bumped when the manifest layout changes, older manifests are ignored
+FORMAT_VERSION = 2
+
+
+class ArtifactError(ValueError):
+    """a shipped program does not match the hash in the manifest"""
+
+
+def read_manifest(directory: Optional[str] = None) -> dict:
+    """
+    Reads the artifact manifest.
+    Args:
+        directory: artifact directory, defaults to ARTIFACTS_DIR
+    Returns: manifest, empty without one or in an unknown format
+    """
+    directory = ARTIFACTS_DIR if directory is None else directory
+    try:
+        with open(os.path.join(directory, MANIFEST), encoding="utf8") as file:
+            manifest = json.load(file)
+    except FileNotFoundError:
+        return {}
+    return manifest if manifest.get("format") == FORMAT_VERSION else {}
+
+
+def load_artifact(
+    name: str, fingerprint: str, directory: Optional[str] = None
+) -> Optional[bytes]:
+    """
+    Shipped bytecode of a program generated from the current sources.
+    Only programs compiled by algod are served.
+    Args:
+        name: program name, e.g. approval_low_cost
+        fingerprint: source fingerprint of the program
+        directory: artifact directory, defaults to ARTIFACTS_DIR
+    Returns: bytecode, or None when the program is not shipped, was not
+        compiled by algod or its sources changed
+    """
+    directory = ARTIFACTS_DIR if directory is None else directory
+    manifest = read_manifest(directory)
+    if not manifest.get("compiler", "").startswith("algod:"):
+        return None
+    entry = manifest.get("programs", {}).get(name)
+    if entry is None or entry["fingerprint"] != fingerprint:
+        return None
+    with open(os.path.join(directory, entry["file"]), "rb") as file:
+        bytecode = file.read()
+    if hashlib.sha256(bytecode).hexdigest() != entry["sha256"]:
+        raise ArtifactError(f"{entry['file']} does not match its sha256")
+    return bytecode
+
+
+def write_artifacts(
+    programs: Dict[str, Tuple[bytes, str]], versions: Dict[str, str],
+    directory: Optional[str] = None
+) -> dict:
+    """
+    Stores programs and their manifest.
+    Args:
+        programs: name to bytecode and source fingerprint
+        versions: teal, generator and compiler versions recorded in the manifest
+        directory: artifact directory, defaults to ARTIFACTS_DIR
+    Returns: manifest
+    """
+    directory = ARTIFACTS_DIR if directory is None else directory
+    os.makedirs(directory, exist_ok=True)
+    manifest: dict = {"format": FORMAT_VERSION, **versions, "programs": {}}
+    for name, (bytecode, fingerprint) in sorted(programs.items()):
+        file_name = f"{name}.teal{versions['teal']}.bin"
+        with open(os.path.join(directory, file_name), "wb") as file:
+            file.write(bytecode)
+        manifest["programs"][name] = {
+            "file": file_name,
+            "size": len(bytecode),
+            "sha256": hashlib.sha256(bytecode).hexdigest(),
+            "fingerprint": fingerprint,
+        }
+    with open(os.path.join(directory, MANIFEST), "w", encoding="utf8") as file:
+        json.dump(manifest, file, indent=2)
+        file.write("\n")
+    return manifest
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """command line entry point"""
+    parser = argparse.ArgumentParser(
+        description="Regenerates the shipped approval and clear programs with pyteal "
+                    "and the compile endpoint of an algod node.")
+    parser.add_argument("--algod-address", required=True, help="algod url")
+    parser.add_argument("--algod-token", default=os.getenv("algod_token", ""),
+                        help="algod api token, defaults to $algod_token")
+    parser.add_argument("--api-key", help="X-API-Key header, e.g. for purestake")
+    parser.add_argument("--directory", default=ARTIFACTS_DIR, help="artifact directory")
+    args = parser.parse_args(argv)
+
+    headers = {"X-API-Key": args.api_key} if args.api_key else None
+    client = AlgodClient(args.algod_token, args.algod_address, headers)
+    # pylint: disable-next=import-outside-toplevel,cyclic-import
+    from amm.amm_app import build_programs
+    programs, versions = build_programs(client)
+    manifest = write_artifacts(programs, versions, args.directory)
+    print(f"compiled by {manifest['compiler']}")
+    for name, entry in manifest["programs"].items():
+        print(f"{name:<28}{entry['size']:>6} bytes  {entry['sha256']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
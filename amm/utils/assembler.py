@@ -0,0 +1,373 @@
+"""offline teal assembler producing the bytecode of the algod compile endpoint"""
+import base64
+import hashlib
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from algosdk import encoding
+
+# programs are assembled under the rules of this teal version only
+TEAL_VERSION = 6
+
+NAMED_INTS = {
+    "NoOp": 0, "OptIn": 1, "CloseOut": 2, "ClearState": 3,
+    "UpdateApplication": 4, "DeleteApplication": 5,
+    "unknown": 0, "pay": 1, "keyreg": 2, "acfg": 3, "axfer": 4, "afrz": 5, "appl": 6,
+}
+
+TXN_FIELDS = {name: index for index, name in enumerate((
+    "Sender", "Fee", "FirstValid", "FirstValidTime", "LastValid", "Note", "Lease",
+    "Receiver", "Amount", "CloseRemainderTo", "VotePK", "SelectionPK", "VoteFirst",
+    "VoteLast", "VoteKeyDilution", "Type", "TypeEnum", "XferAsset", "AssetAmount",
+    "AssetSender", "AssetReceiver", "AssetCloseTo", "GroupIndex", "TxID",
+    "ApplicationID", "OnCompletion", "ApplicationArgs", "NumAppArgs", "Accounts",
+    "NumAccounts", "ApprovalProgram", "ClearStateProgram", "RekeyTo", "ConfigAsset",
+    "ConfigAssetTotal", "ConfigAssetDecimals", "ConfigAssetDefaultFrozen",
+    "ConfigAssetUnitName", "ConfigAssetName", "ConfigAssetURL", "ConfigAssetMetadataHash",
+    "ConfigAssetManager", "ConfigAssetReserve", "ConfigAssetFreeze", "ConfigAssetClawback",
+    "FreezeAsset", "FreezeAssetAccount", "FreezeAssetFrozen", "Assets", "NumAssets",
+    "Applications", "NumApplications", "GlobalNumUint", "GlobalNumByteSlice",
+    "LocalNumUint", "LocalNumByteSlice", "ExtraProgramPages", "Nonparticipation", "Logs",
+    "NumLogs", "CreatedAssetID", "CreatedApplicationID", "LastLog", "StateProofPK",
+))}
+
+GLOBAL_FIELDS = {name: index for index, name in enumerate((
+    "MinTxnFee", "MinBalance", "MaxTxnLife", "ZeroAddress", "GroupSize",
+    "LogicSigVersion", "Round", "LatestTimestamp", "CurrentApplicationID",
+    "CreatorAddress", "CurrentApplicationAddress", "GroupID", "OpcodeBudget",
+    "CallerApplicationID", "CallerApplicationAddress",
+))}
+
+ASSET_HOLDING_FIELDS = {"AssetBalance": 0, "AssetFrozen": 1}
+
+ASSET_PARAMS_FIELDS = {name: index for index, name in enumerate((
+    "AssetTotal", "AssetDecimals", "AssetDefaultFrozen", "AssetUnitName", "AssetName",
+    "AssetURL", "AssetMetadataHash", "AssetManager", "AssetReserve", "AssetFreeze",
+    "AssetClawback", "AssetCreator",
+))}
+
+APP_PARAMS_FIELDS = {name: index for index, name in enumerate((
+    "AppApprovalProgram", "AppClearStateProgram", "AppGlobalNumUint",
+    "AppGlobalNumByteSlice", "AppLocalNumUint", "AppLocalNumByteSlice",
+    "AppExtraProgramPages", "AppCreator", "AppAddress",
+))}
+
+ACCT_PARAMS_FIELDS = {"AcctBalance": 0, "AcctMinBalance": 1, "AcctAuthAddr": 2}
+
+CURVES = {"Secp256k1": 0}
+
+# immediate arguments: a byte, a field of one of the tables, or a branch target
+_FIELD_TABLES: Dict[str, Dict[str, int]] = {
+    "txn": TXN_FIELDS, "global": GLOBAL_FIELDS, "holding": ASSET_HOLDING_FIELDS,
+    "asset": ASSET_PARAMS_FIELDS, "app": APP_PARAMS_FIELDS, "acct": ACCT_PARAMS_FIELDS,
+    "curve": CURVES,
+}
+_BYTE = "byte"
+_LABEL = "label"
+
+# opcode and immediates of every teal v6 op
+OPCODES: Dict[str, Tuple[int, Tuple[str, ...]]] = {
+    "err": (0x00, ()), "sha256": (0x01, ()), "keccak256": (0x02, ()),
+    "sha512_256": (0x03, ()), "ed25519verify": (0x04, ()),
+    "ecdsa_verify": (0x05, ("curve",)), "ecdsa_pk_decompress": (0x06, ("curve",)),
+    "ecdsa_pk_recover": (0x07, ("curve",)),
+    "+": (0x08, ()), "-": (0x09, ()), "/": (0x0a, ()), "*": (0x0b, ()),
+    "<": (0x0c, ()), ">": (0x0d, ()), "<=": (0x0e, ()), ">=": (0x0f, ()),
+    "&&": (0x10, ()), "||": (0x11, ()), "==": (0x12, ()), "!=": (0x13, ()),
+    "!": (0x14, ()), "len": (0x15, ()), "itob": (0x16, ()), "btoi": (0x17, ()),
+    "%": (0x18, ()), "|": (0x19, ()), "&": (0x1a, ()), "^": (0x1b, ()), "~": (0x1c, ()),
+    "mulw": (0x1d, ()), "addw": (0x1e, ()), "divmodw": (0x1f, ()),
+    "intc": (0x21, (_BYTE,)), "intc_0": (0x22, ()), "intc_1": (0x23, ()),
+    "intc_2": (0x24, ()), "intc_3": (0x25, ()),
+    "bytec": (0x27, (_BYTE,)), "bytec_0": (0x28, ()), "bytec_1": (0x29, ()),
+    "bytec_2": (0x2a, ()), "bytec_3": (0x2b, ()),
+    "arg": (0x2c, (_BYTE,)), "arg_0": (0x2d, ()), "arg_1": (0x2e, ()),
+    "arg_2": (0x2f, ()), "arg_3": (0x30, ()),
+    "txn": (0x31, ("txn",)), "global": (0x32, ("global",)),
+    "gtxn": (0x33, (_BYTE, "txn")), "load": (0x34, (_BYTE,)), "store": (0x35, (_BYTE,)),
+    "txna": (0x36, ("txn", _BYTE)), "gtxna": (0x37, (_BYTE, "txn", _BYTE)),
+    "gtxns": (0x38, ("txn",)), "gtxnsa": (0x39, ("txn", _BYTE)),
+    "gload": (0x3a, (_BYTE, _BYTE)), "gloads": (0x3b, (_BYTE,)),
+    "gaid": (0x3c, (_BYTE,)), "gaids": (0x3d, ()), "loads": (0x3e, ()), "stores": (0x3f, ()),
+    "bnz": (0x40, (_LABEL,)), "bz": (0x41, (_LABEL,)), "b": (0x42, (_LABEL,)),
+    "return": (0x43, ()), "assert": (0x44, ()),
+    "pop": (0x48, ()), "dup": (0x49, ()), "dup2": (0x4a, ()), "dig": (0x4b, (_BYTE,)),
+    "swap": (0x4c, ()), "select": (0x4d, ()), "cover": (0x4e, (_BYTE,)),
+    "uncover": (0x4f, (_BYTE,)), "concat": (0x50, ()),
+    "substring": (0x51, (_BYTE, _BYTE)), "substring3": (0x52, ()),
+    "getbit": (0x53, ()), "setbit": (0x54, ()), "getbyte": (0x55, ()), "setbyte": (0x56, ()),
+    "extract": (0x57, (_BYTE, _BYTE)), "extract3": (0x58, ()),
+    "extract_uint16": (0x59, ()), "extract_uint32": (0x5a, ()), "extract_uint64": (0x5b, ()),
+    "balance": (0x60, ()), "app_opted_in": (0x61, ()), "app_local_get": (0x62, ()),
+    "app_local_get_ex": (0x63, ()), "app_global_get": (0x64, ()),
+    "app_global_get_ex": (0x65, ()), "app_local_put": (0x66, ()),
+    "app_global_put": (0x67, ()), "app_local_del": (0x68, ()), "app_global_del": (0x69, ()),
+    "asset_holding_get": (0x70, ("holding",)), "asset_params_get": (0x71, ("asset",)),
+    "app_params_get": (0x72, ("app",)), "acct_params_get": (0x73, ("acct",)),
+    "min_balance": (0x78, ()),
+    "callsub": (0x88, (_LABEL,)), "retsub": (0x89, ()),
+    "shl": (0x90, ()), "shr": (0x91, ()), "sqrt": (0x92, ()), "bitlen": (0x93, ()),
+    "exp": (0x94, ()), "expw": (0x95, ()), "bsqrt": (0x96, ()), "divw": (0x97, ()),
+    "b+": (0xa0, ()), "b-": (0xa1, ()), "b/": (0xa2, ()), "b*": (0xa3, ()),
+    "b<": (0xa4, ()), "b>": (0xa5, ()), "b<=": (0xa6, ()), "b>=": (0xa7, ()),
+    "b==": (0xa8, ()), "b!=": (0xa9, ()), "b%": (0xaa, ()), "b|": (0xab, ()),
+    "b&": (0xac, ()), "b^": (0xad, ()), "b~": (0xae, ()), "bzero": (0xaf, ()),
+    "log": (0xb0, ()), "itxn_begin": (0xb1, ()), "itxn_field": (0xb2, ("txn",)),
+    "itxn_submit": (0xb3, ()), "itxn": (0xb4, ("txn",)), "itxna": (0xb5, ("txn", _BYTE)),
+    "itxn_next": (0xb6, ()), "gitxn": (0xb7, (_BYTE, "txn")),
+    "gitxna": (0xb8, (_BYTE, "txn", _BYTE)),
+    "txnas": (0xc0, ("txn",)), "gtxnas": (0xc1, (_BYTE, "txn")), "gtxnsas": (0xc2, ("txn",)),
+    "args": (0xc3, ()), "gloadss": (0xc4, ()), "itxnas": (0xc5, ("txn",)),
+    "gitxnas": (0xc6, (_BYTE, "txn")),
+}
+
+# field ops given an array index too assemble as their array form
+_ARRAY_FORMS = {"txn": "txna", "gtxn": "gtxna", "itxn": "itxna", "gitxn": "gitxna"}
+
+_PUSHBYTES = 0x80
+_PUSHINT = 0x81
+_INTCBLOCK = 0x20
+_BYTECBLOCK = 0x26
+
+Constant = Union[int, bytes]
+
+
+class AssemblerError(ValueError):
+    """the teal source cannot be assembled"""
+
+
+def _parse_string(literal: str) -> bytes:
+    out = bytearray()
+    index = 1
+    while index < len(literal) - 1:
+        char = literal[index]
+        if char == "\\":
+            escape = literal[index + 1]
+            if escape == "x":
+                out.append(int(literal[index + 2:index + 4], 16))
+                index += 4
+                continue
+            out += {"n": b"\n", "t": b"\t", "r": b"\r", "0": b"\0"}.get(
+                escape, escape.encode())
+            index += 2
+            continue
+        out += char.encode()
+        index += 1
+    return bytes(out)
+
+
+def _decode(encoded: str, base: int) -> bytes:
+    if base == 64:
+        return base64.b64decode(encoded + "=" * (-len(encoded) % 4))
+    return base64.b32decode(encoded + "=" * (-len(encoded) % 8))
+
+
+def parse_bytes(literal: str) -> bytes:
+    """
+    Decodes a byte constant of the teal assembler.
+    Args:
+        literal: "string", 0x hex, base64 / b64(...), base32 / b32(...)
+    Returns: bytes
+    """
+    literal = literal.strip()
+    if literal.startswith('"'):
+        return _parse_string(literal)
+    if literal.startswith("0x"):
+        return bytes.fromhex(literal[2:])
+    for prefix, base in (("base64", 64), ("b64", 64), ("base32", 32), ("b32", 32)):
+        if literal.startswith(prefix + " "):
+            return _decode(literal[len(prefix):].strip(), base)
+        if literal.startswith(prefix + "(") and literal.endswith(")"):
+            return _decode(literal[len(prefix) + 1:-1], base)
+    raise AssemblerError(f"unknown byte constant {literal}")
+
+
+def parse_int(literal: str) -> int:
+    """
+    Decodes an int constant, named constants included.
+    Args:
+        literal: decimal, 0x hex, 0 octal or a name like NoOp
+    Returns: integer
+    """
+    if literal in NAMED_INTS:
+        return NAMED_INTS[literal]
+    if len(literal) > 1 and literal.startswith("0") and literal.isdigit():
+        return int(literal, 8)
+    return int(literal, 0)
+
+
+def strip_comment(line: str) -> str:
+    """
+    Drops a // comment that is not inside a string.
+    Args:
+        line: one line of teal
+    Returns: line without the comment
+    """
+    quoted = False
+    for index, char in enumerate(line):
+        if char == '"' and (index == 0 or line[index - 1] != "\\"):
+            quoted = not quoted
+        elif not quoted and line.startswith("//", index):
+            return line[:index].strip()
+    return line
+
+
+def split_teal(teal: str) -> Tuple[Optional[int], List[Tuple[int, str, str]], Dict[str, int]]:
+    """
+    Splits teal source into its instructions and labels.
+    Args:
+        teal: teal source
+    Returns: pragma version, None without one, line number, op and arguments
+        of every instruction, and the instruction index of every label
+    """
+    version = None
+    statements: List[Tuple[int, str, str]] = []
+    labels: Dict[str, int] = {}
+    for number, raw in enumerate(teal.splitlines(), 1):
+        line = strip_comment(raw.strip())
+        if line.startswith("#pragma version"):
+            version = int(line.split()[-1])
+        elif line.endswith(":") and " " not in line:
+            if line[:-1] in labels:
+                raise AssemblerError(f"line {number}: duplicate label {line[:-1]}")
+            labels[line[:-1]] = len(statements)
+        elif line:
+            op, _, rest = line.partition(" ")
+            statements.append((number, op, rest.strip()))
+    return version, statements, labels
+
+
+def _uvarint(value: int) -> bytes:
+    out = bytearray()
+    while value >= 0x80:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+class _Op:  # pylint: disable=too-few-public-methods
+    """one assembled line: fixed bytes, a constant reference or a branch"""
+
+    def __init__(self, line: int, code: bytes = b"", constant: Optional[Constant] = None,
+                 label: Optional[str] = None):
+        self.line = line
+        self.code = code
+        self.constant = constant
+        self.label = label
+
+
+def _immediate(kind: str, token: str, line: int) -> bytes:
+    if kind in _FIELD_TABLES:
+        table = _FIELD_TABLES[kind]
+        value = table[token] if token in table else _small_int(token, line)
+    else:
+        value = _small_int(token, line)
+    if not 0 <= value <= 0xff:
+        raise AssemblerError(f"line {line}: immediate {token} out of range")
+    return bytes([value])
+
+
+def _small_int(token: str, line: int) -> int:
+    try:
+        return int(token, 0)
+    except ValueError:
+        raise AssemblerError(f"line {line}: unknown immediate {token}") from None
+
+
+def _parse_op(op: str, rest: str, line: int) -> _Op:
+    if op in ("int", "byte", "addr", "method"):
+        if op == "int":
+            constant: Constant = parse_int(rest)
+        elif op == "addr":
+            constant = encoding.decode_address(rest)
+        elif op == "method":
+            constant = hashlib.new("sha512_256", parse_bytes(rest)).digest()[:4]
+        else:
+            constant = parse_bytes(rest)
+        return _Op(line, constant=constant)
+    if op == "pushint":
+        return _Op(line, bytes([_PUSHINT]) + _uvarint(parse_int(rest)))
+    if op == "pushbytes":
+        value = parse_bytes(rest)
+        return _Op(line, bytes([_PUSHBYTES]) + _uvarint(len(value)) + value)
+    if op in ("intcblock", "bytecblock"):
+        raise AssemblerError(f"line {line}: {op} is not supported, use int and byte")
+
+    tokens = rest.split()
+    if op in _ARRAY_FORMS and len(tokens) == len(OPCODES[op][1]) + 1:
+        op = _ARRAY_FORMS[op]
+    if op not in OPCODES:
+        raise AssemblerError(f"line {line}: unknown opcode {op}")
+    opcode, kinds = OPCODES[op]
+    if len(tokens) != len(kinds):
+        raise AssemblerError(f"line {line}: {op} expects {len(kinds)} immediates")
+    if kinds == (_LABEL,):
+        return _Op(line, bytes([opcode]), label=tokens[0])
+    return _Op(line, bytes([opcode]) + b"".join(
+        _immediate(kind, token, line) for kind, token in zip(kinds, tokens)))
+
+
+def _constant_block(ops: Sequence[_Op], kind: type) -> List[Constant]:
+    # algod keeps constants referenced more than once in the block, most
+    # referenced first and ties in order of appearance, and pushes the rest
+    counts = Counter(op.constant for op in ops if isinstance(op.constant, kind))
+    ordered = sorted(counts, key=lambda value: -counts[value])
+    return [value for value in ordered if counts[value] > 1]
+
+
+def _constant_code(value: Constant, block: Sequence[Constant]) -> bytes:
+    is_int = isinstance(value, int)
+    if value in block:
+        index = block.index(value)
+        first, indexed = (0x22, 0x21) if is_int else (0x28, 0x27)
+        return bytes([first + index]) if index < 4 else bytes([indexed, index])
+    if is_int:
+        return bytes([_PUSHINT]) + _uvarint(value)
+    return bytes([_PUSHBYTES]) + _uvarint(len(value)) + value
+
+
+def _parse(teal: str) -> Tuple[List[_Op], Dict[str, int]]:
+    version, statements, labels = split_teal(teal)
+    if version != TEAL_VERSION:
+        raise AssemblerError(f"only #pragma version {TEAL_VERSION} programs are supported")
+    return [_parse_op(op, rest, number) for number, op, rest in statements], labels
+
+
+def assemble(teal: str) -> bytes:
+    """
+    Assembles teal into the bytecode algod's compile endpoint returns.
+    Args:
+        teal: teal source starting with #pragma version 6
+    Returns: bytecode
+    """
+    ops, labels = _parse(teal)
+    int_block = _constant_block(ops, int)
+    byte_block = _constant_block(ops, bytes)
+
+    codes = [_constant_code(op.constant, int_block if isinstance(op.constant, int)
+                            else byte_block) if op.constant is not None else op.code
+             for op in ops]
+    sizes = [len(code) + (2 if op.label is not None else 0) for op, code in zip(ops, codes)]
+    offsets = [0]
+    for size in sizes:
+        offsets.append(offsets[-1] + size)
+
+    program = bytearray(_uvarint(TEAL_VERSION))
+    if int_block:
+        program += bytes([_INTCBLOCK]) + _uvarint(len(int_block))
+        program += b"".join(_uvarint(value) for value in int_block)
+    if byte_block:
+        program += bytes([_BYTECBLOCK]) + _uvarint(len(byte_block))
+        program += b"".join(_uvarint(len(value)) + value for value in byte_block)
+    for index, (op, code) in enumerate(zip(ops, codes)):
+        program += code
+        if op.label is None:
+            continue
+        if op.label not in labels:
+            raise AssemblerError(f"line {op.line}: unknown label {op.label}")
+        jump = offsets[labels[op.label]] - offsets[index + 1]
+        if not -0x8000 <= jump <= 0x7fff:
+            raise AssemblerError(f"line {op.line}: branch to {op.label} too far")
+        program += jump.to_bytes(2, "big", signed=True)
+    return bytes(program)
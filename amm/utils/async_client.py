@@ -0,0 +1,406 @@
+"""asyncio algod client with a shared connection pool"""
+import asyncio
+import base64
+import copy
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+from algosdk import encoding
+from algosdk.error import AlgodHTTPError
+from algosdk.transaction import SignedTransaction, SuggestedParams
+
+from amm.state import MarketState
+from amm.utils.blocks import block_record, block_transactions, decode_block
+from amm.utils.confirmation import Confirmation, ConfirmationTimeout
+from amm.utils.funding import funding_shortfall
+from amm.utils.params import DEFAULT_TTL
+from amm.utils.state_cache import StateCache
+
+
+class AsyncAlgodClient:  # pylint: disable=too-many-instance-attributes
+    """
+    Non-blocking subset of the algod v2 api used by AsyncApp.
+    One aiohttp session, params provider, funding planner, state cache
+    and confirmation tracker are shared by every market driven through
+    the client.
+    """
+
+    def __init__(
+        self, algod_token: str, algod_address: str,
+        headers: Optional[Dict[str, str]] = None, limit: int = 100
+    ):
+        self.algod_token = algod_token
+        self.algod_address = algod_address.rstrip("/")
+        self.headers = {"X-Algo-API-Token": algod_token, **(headers or {})}
+        self.limit = limit
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.params = AsyncParamsProvider(self)
+        self.funding = AsyncFundingPlanner(self)
+        self.state_cache = AsyncStateCache(self)
+        self.tracker = AsyncConfirmationTracker(self)
+
+    async def __aenter__(self) -> "AsyncAlgodClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """closes the connection pool"""
+        self.tracker.stop()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def algod_request(
+        self, method: str, path: str, params: Optional[dict] = None,
+        data: Optional[bytes] = None, response_format: str = "json"
+    ):
+        """
+        Executes a request against /v2, or the unversioned /versions.
+        Args:
+            method: request method
+            path: path below /v2
+            params: query parameters
+            data: request body
+            response_format: json or msgpack
+        Returns: decoded json or raw bytes
+        """
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(limit=self.limit))
+        prefix = "" if path == "/versions" else "/v2"
+        async with self._session.request(
+            method, f"{self.algod_address}{prefix}{path}", params=params, data=data,
+            headers={"Content-Type": "application/x-binary"} if data else None,
+        ) as resp:
+            if resp.status >= 400:
+                try:
+                    message = (await resp.json(content_type=None))["message"]
+                except (ValueError, KeyError, TypeError):
+                    message = await resp.text()
+                raise AlgodHTTPError(message, resp.status)
+            if response_format == "json":
+                return await resp.json(content_type=None)
+            return await resp.read()
+
+    async def status(self) -> dict:
+        """node status"""
+        return await self.algod_request("GET", "/status")
+
+    async def status_after_block(self, round_number: int) -> dict:
+        """node status once a block after round_number exists"""
+        return await self.algod_request(
+            "GET", f"/status/wait-for-block-after/{round_number}")
+
+    async def block_info(self, round_number: int) -> dict:
+        """decoded block of a round"""
+        return decode_block(await self.block_raw(round_number))
+
+    async def block_raw(self, round_number: int) -> bytes:
+        """msgpack encoded block of a round"""
+        return await self.algod_request(
+            "GET", f"/blocks/{round_number}", {"format": "msgpack"},
+            response_format="msgpack")
+
+    async def pending_transaction_info(self, tx_id: str) -> dict:
+        """pending transaction record"""
+        return await self.algod_request("GET", f"/transactions/pending/{tx_id}")
+
+    async def application_info(self, app_id: int) -> dict:
+        """application params and global state"""
+        return await self.algod_request("GET", f"/applications/{app_id}")
+
+    async def account_info(self, address: str) -> dict:
+        """account balances and holdings"""
+        return await self.algod_request("GET", f"/accounts/{address}")
+
+    async def versions(self) -> dict:
+        """algod build and genesis"""
+        return await self.algod_request("GET", "/versions")
+
+    async def compile(self, teal: str) -> dict:
+        """assembles teal source"""
+        return await self.algod_request("POST", "/teal/compile", data=teal.encode())
+
+    async def suggested_params(self) -> SuggestedParams:
+        """suggested transaction parameters"""
+        res = await self.algod_request("GET", "/transactions/params")
+        return SuggestedParams(
+            res["fee"], res["last-round"], res["last-round"] + 1000,
+            res["genesis-hash"], res["genesis-id"], False,
+            res["consensus-version"], res["min-fee"],
+        )
+
+    async def send_transactions(self, signed: List[SignedTransaction]) -> str:
+        """
+        Sends a group.
+        Args:
+            signed: signed transactions
+        Returns: id of the first transaction
+        """
+        data = b"".join(base64.b64decode(encoding.msgpack_encode(txn))
+                        for txn in signed)
+        return (await self.algod_request("POST", "/transactions", data=data))["txId"]
+
+
+class AsyncParamsProvider:
+    """
+    Suggested params reused until the round advances or the ttl
+    expires; concurrent callers share one request.
+    """
+
+    def __init__(self, client: AsyncAlgodClient, ttl: float = DEFAULT_TTL):
+        self.client = client
+        self.ttl = ttl
+        self.requests = 0
+        self._params: Optional[SuggestedParams] = None
+        self._fetched_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def get(self) -> SuggestedParams:
+        """
+        Returns suggested params, fetching them when stale.
+        Returns: a copy of the cached params
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._params is None or time.monotonic() - self._fetched_at >= self.ttl:
+                self._params = await self.client.suggested_params()
+                self._fetched_at = time.monotonic()
+                self.requests += 1
+            return copy.copy(self._params)
+
+    def observe_round(self, round_number: int) -> None:
+        """
+        Drops the cached params once a newer round was seen.
+        Args:
+            round_number: round reported by algod
+        """
+        if self._params is not None and round_number > self._params.first:
+            self._params = None
+
+
+class AsyncFundingPlanner:
+    """
+    Account balances reused for the ttl so repeated supplies to a market
+    read its app account once. Sends through the app invalidate the
+    entry of the account they touch.
+    """
+
+    def __init__(self, client: AsyncAlgodClient, ttl: float = DEFAULT_TTL):
+        self.client = client
+        self.ttl = ttl
+        self.requests = 0
+        self._balances: Dict[str, tuple] = {}
+
+    async def balance(self, address: str) -> dict:
+        """
+        Reads the balance of an account, fetching it when stale.
+        Args:
+            address: account address
+        Returns: amount and min-balance in microalgos
+        """
+        entry = self._balances.get(address)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        info = await self.client.account_info(address)
+        balance = {"amount": info["amount"], "min-balance": info["min-balance"]}
+        self._balances[address] = (time.monotonic(), balance)
+        self.requests += 1
+        return balance
+
+    async def shortfall(self, address: str, spend: int = 0) -> int:
+        """
+        Plans the payment topping up an account.
+        Args:
+            address: account address
+            spend: microalgos the account pays out in the operation
+        Returns: microalgos to send, 0 when no payment is needed
+        """
+        return funding_shortfall(await self.balance(address), spend)
+
+    def invalidate(self, address: Optional[str] = None) -> None:
+        """
+        Drops cached balances.
+        Args:
+            address: account to drop, every account when None
+        """
+        if address is None:
+            self._balances.clear()
+        else:
+            self._balances.pop(address, None)
+
+
+class AsyncStateCache:
+    """
+    Market states kept in a StateCache, so they follow its rounds, ttl
+    and confirmation deltas, and read through the asyncio client.
+    Concurrent reads of the same app share one request.
+    """
+
+    def __init__(self, client: AsyncAlgodClient, ttl: float = DEFAULT_TTL):
+        self.client = client
+        self.cache = StateCache(client, ttl=ttl)
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    async def get(self, app_id: int) -> MarketState:
+        """
+        Returns the state of an app, reading it when stale.
+        Args:
+            app_id: application id
+        Returns: market state, shared with other readers
+        """
+        async with self._locks.setdefault(app_id, asyncio.Lock()):
+            state, read_round, generation = self.cache.lookup(app_id)
+            if state is not None:
+                return state
+            if read_round is None:
+                read_round = (await self.client.status())["last-round"]
+                self.cache.observe_round(read_round)
+            state = MarketState.from_application_info(
+                await self.client.application_info(app_id))
+            self.cache.store(app_id, state, read_round, generation)
+            return state
+
+    def observe_round(self, round_number: int) -> None:
+        """
+        Moves to a newer round, states read before become stale.
+        Args:
+            round_number: round reported by algod
+        """
+        self.cache.observe_round(round_number)
+
+    def confirmed(self, confirmation: Confirmation) -> None:
+        """
+        Brings the cached states up to date with a confirmed transaction.
+        Args:
+            confirmation: confirmed transaction
+        """
+        self.cache.confirmed(confirmation)
+
+
+class AsyncConfirmationTracker:
+    """
+    Follows blocks once per round in a task and resolves the futures of
+    every registered transaction found in them. Failed block reads are
+    retried with backoff; past the retries, or when a block cannot be
+    decoded, each transaction is looked up on its own and only those
+    whose lookup fails are failed. A record that cannot be built fails
+    its own future.
+    """
+
+    def __init__(
+        self, client: AsyncAlgodClient, timeout: int = 10,
+        retries: int = 5, backoff: float = 0.25
+    ):
+        self.client = client
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.next_round: Optional[int] = None
+        self._pending: Dict[str, tuple] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def track(self, tx_id: str, timeout: Optional[int] = None) -> Confirmation:
+        """
+        Waits for a transaction sent just before.
+        Args:
+            tx_id: transaction id
+            timeout: timeout in rounds, defaults to the tracker timeout
+        Returns: confirmation
+        """
+        if tx_id not in self._pending:
+            if not self._pending:
+                self.next_round = (await self.client.status())["last-round"]
+            deadline = self.next_round + (self.timeout if timeout is None else timeout)
+            future = asyncio.get_running_loop().create_future()
+            self._pending[tx_id] = (future, deadline, self.next_round, time.monotonic())
+            if self._task is None or self._task.done():
+                self._task = asyncio.ensure_future(self._run())
+        return await asyncio.shield(self._pending[tx_id][0])
+
+    def stop(self) -> None:
+        """cancels the follower task"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        failures = 0
+        while self._pending:
+            round_number = self.next_round
+            try:
+                await self.client.status_after_block(round_number - 1)
+                raw = await self.client.block_raw(round_number)
+            except Exception:  # pylint: disable=broad-exception-caught
+                failures += 1
+                if failures > self.retries:
+                    await self._lookup_pending()
+                    failures = 0
+                else:
+                    await asyncio.sleep(self.backoff * 2 ** (failures - 1))
+                continue
+            failures = 0
+            self.next_round = round_number + 1
+            self.client.params.observe_round(round_number)
+            self.client.state_cache.observe_round(round_number)
+            try:
+                transactions = list(block_transactions(decode_block(raw)))
+            except Exception:  # pylint: disable=broad-exception-caught
+                # refetching the same bytes will not help, the transactions
+                # confirmed in this round are looked up one by one instead
+                await self._lookup_pending()
+                transactions = []
+            self._resolve(round_number, transactions)
+
+    async def _lookup_pending(self) -> None:
+        tx_ids = list(self._pending)
+        records = await asyncio.gather(
+            *[self.client.pending_transaction_info(tx_id) for tx_id in tx_ids],
+            return_exceptions=True)
+        for tx_id, record in zip(tx_ids, records):
+            if tx_id not in self._pending:
+                continue
+            if isinstance(record, BaseException):
+                error = record
+            elif record.get("confirmed-round", 0) > 0:
+                future, _, registered, started = self._pending.pop(tx_id)
+                future.set_result(Confirmation(
+                    record, tx_id, record["confirmed-round"] - registered,
+                    time.monotonic() - started))
+                continue
+            elif record.get("pool-error"):
+                error = RuntimeError(f"Pool error: {record['pool-error']}")
+            else:
+                continue
+            future = self._pending.pop(tx_id)[0]
+            if not future.done():
+                future.set_exception(error)
+
+    def _resolve(self, round_number: int, transactions: List[tuple]) -> None:
+        for tx_id, txn, stib in transactions:
+            entry = self._pending.pop(tx_id, None)
+            if entry is None:
+                continue
+            future, _, registered, started = entry
+            try:
+                confirmation = Confirmation(
+                    block_record(txn, stib, round_number), tx_id,
+                    round_number - registered, time.monotonic() - started)
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                future.set_exception(err)
+                continue
+            future.set_result(confirmation)
+        for tx_id in [tx_id for tx_id, entry in self._pending.items()
+                      if entry[1] <= round_number]:
+            future, deadline, registered, _ = self._pending.pop(tx_id)
+            future.set_exception(ConfirmationTimeout(
+                f"Transaction {tx_id} not confirmed after "
+                f"{deadline - registered} rounds"))
@@ -0,0 +1,146 @@
+"""follows algod blocks round by round"""
+import base64
+from typing import Iterator, Optional, Tuple, Union
+
+import msgpack
+from algosdk import constants, encoding
+from algosdk.v2client.algod import AlgodClient
+
+
+def decode_block(raw: bytes) -> dict:
+    """
+    Decodes a msgpack block response.
+    algod encodes state keys, byte values and logs as msgpack str whatever
+    their content, so str is decoded with surrogateescape and _bytes
+    restores the original bytes.
+    Args:
+        raw: body of /v2/blocks/{round}?format=msgpack
+    Returns: block header with its transactions
+    """
+    return msgpack.unpackb(raw, raw=False, strict_map_key=False,
+                           unicode_errors="surrogateescape")["block"]
+
+
+def _bytes(value: Union[str, bytes]) -> bytes:
+    if isinstance(value, str):
+        return value.encode("utf-8", "surrogateescape")
+    return value
+
+
+def block_txn(stib: dict, block: dict) -> dict:
+    """
+    Restores the genesis fields stripped from a transaction in a block.
+    Args:
+        stib: signed transaction in block
+        block: block it was taken from
+    Returns: transaction fields
+    """
+    txn = dict(stib["txn"])
+    if stib.get("hgi"):
+        txn["gen"] = block["gen"]
+    if stib.get("hgh", True):
+        txn["gh"] = block["gh"]
+    return txn
+
+
+def transaction_id(txn: dict) -> str:
+    """
+    Computes the id of a transaction.
+    Args:
+        txn: transaction fields as msgpack decoded
+    Returns: transaction id
+    """
+    to_sign = constants.txid_prefix + base64.b64decode(encoding.msgpack_encode(txn))
+    txid = base64.b32encode(encoding.checksum(to_sign)).decode()
+    return txid.rstrip("=")
+
+
+def block_transactions(block: dict) -> Iterator[Tuple[str, dict, dict]]:
+    """
+    Iterates over the top level transactions of a block.
+    Args:
+        block: decoded block
+    Returns: transaction id, transaction fields and signed transaction in block
+    """
+    for stib in block.get("txns") or []:
+        txn = block_txn(stib, block)
+        yield transaction_id(txn), txn, stib
+
+
+def _state_delta(delta: dict) -> list:
+    return [
+        {
+            "key": base64.b64encode(_bytes(key)).decode(),
+            "value": {
+                "action": value.get("at", 0),
+                "bytes": base64.b64encode(_bytes(value.get("bs", b""))).decode(),
+                "uint": value.get("ui", 0),
+            },
+        }
+        for key, value in delta.items()
+    ]
+
+
+def block_record(txn: dict, stib: dict, round_number: int) -> dict:
+    """
+    Pending transaction style record built from a block entry.
+    Args:
+        txn: transaction fields
+        stib: signed transaction in block
+        round_number: round of the block
+    Returns: record with confirmed-round, created ids and state deltas
+    """
+    record = {"confirmed-round": round_number, "pool-error": "",
+              "txn": {"txn": txn}}
+    if stib.get("apid"):
+        record["application-index"] = stib["apid"]
+    if stib.get("caid"):
+        record["asset-index"] = stib["caid"]
+    eval_delta = stib.get("dt") or {}
+    if eval_delta.get("gd"):
+        record["global-state-delta"] = _state_delta(eval_delta["gd"])
+    if eval_delta.get("lg"):
+        record["logs"] = [base64.b64encode(_bytes(log)).decode()
+                          for log in eval_delta["lg"]]
+    return record
+
+
+class BlockFollower:
+    """
+    Fetches every block once, in order.
+    Costs one status_after_block and one block request per round.
+    """
+
+    def __init__(self, client: AlgodClient, start_round: Optional[int] = None):
+        self.client = client
+        self.next_round = start_round
+
+    def sync(self) -> int:
+        """
+        Restarts following from the current round.
+        Returns: the round that will be fetched next
+        """
+        self.next_round = self.client.status()["last-round"]
+        return self.next_round
+
+    def next_block(self) -> Tuple[int, dict]:
+        """
+        Blocks until the next round is available and fetches it.
+        Returns: round and decoded block
+        """
+        round_number, raw = self.next_raw()
+        return round_number, decode_block(raw)
+
+    def next_raw(self) -> Tuple[int, bytes]:
+        """
+        Blocks until the next round is available and fetches it undecoded.
+        The round is passed once fetched, whether it decodes or not.
+        Returns: round and msgpack encoded block
+        """
+        if self.next_round is None:
+            self.sync()
+        round_number = self.next_round
+        self.client.status_after_block(round_number - 1)
+        raw = self.client.block_info(round_number, response_format="msgpack")
+        self.next_round = round_number + 1
+        return round_number, raw
@@ -0,0 +1,114 @@
+"""waits for transaction confirmation block by block"""
+import time
+from typing import Any, Callable, Optional
+
+from algosdk.error import AlgodHTTPError
+from algosdk.v2client.algod import AlgodClient
+
+
+class ConfirmationTimeout(RuntimeError):
+    """transaction not confirmed within the timeout"""
+
+
+class Confirmation:
+    """
+    Confirmed pending transaction record with timing data.
+    Item access reads the record, so it can be used like the dict
+    returned by pending_transaction_info.
+    """
+
+    __slots__ = ("txn", "tx_id", "confirmed_round",
+                 "rounds_waited", "elapsed")
+
+    def __init__(self, txn: dict, tx_id: str, rounds_waited: int, elapsed: float):
+        self.txn = txn
+        self.tx_id = tx_id
+        self.confirmed_round: int = txn["confirmed-round"]
+        self.rounds_waited = rounds_waited
+        self.elapsed = elapsed
+
+    def __getitem__(self, key: str) -> Any:
+        return self.txn[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """dict.get on the record"""
+        return self.txn.get(key, default)
+
+    @property
+    def app_id(self) -> Optional[int]:
+        """application created or called, None for other transactions"""
+        return (self.txn.get("application-index")
+                or self.txn.get("txn", {}).get("txn", {}).get("apid"))
+
+    def __repr__(self) -> str:
+        return (f"Confirmation({self.tx_id}, round={self.confirmed_round}, "
+                f"rounds_waited={self.rounds_waited}, elapsed={self.elapsed:.3f})")
+
+
+def _is_transient(err: AlgodHTTPError) -> bool:
+    return err.code is None or err.code == 429 or err.code >= 500
+
+
+def wait_for_confirmation(  # pylint: disable=too-many-arguments
+    client: AlgodClient,
+    tx_id: str,
+    timeout: int = 10,
+    *,
+    backoff: float = 0.25,
+    max_backoff: float = 4.0,
+    retries: int = 5,
+    on_round: Optional[Callable[[int], None]] = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Confirmation:
+    """
+    Monitors transaction completion.
+    Checks the pending record once per round and blocks on
+    status_after_block in between. Transient algod errors are retried
+    with exponential backoff.
+    Args:
+        client: algorand client
+        tx_id: transaction id
+        timeout: timeout in rounds
+        backoff: first delay before retrying a failed request, in seconds
+        max_backoff: upper bound of the retry delay
+        retries: failed requests tolerated in a row
+        on_round: called with every new round observed
+        sleep: sleep function
+    Returns: confirmation
+    """
+    started = time.monotonic()
+
+    def call(request, *args):
+        delay = backoff
+        for attempt in range(retries + 1):
+            try:
+                return request(*args)
+            except AlgodHTTPError as err:
+                if attempt == retries or not _is_transient(err):
+                    raise
+                sleep(delay)
+                delay = min(delay * 2, max_backoff)
+        raise AssertionError("unreachable")
+
+    start_round = call(client.status)["last-round"]
+    last_round = start_round
+
+    while True:
+        pending_txn = call(client.pending_transaction_info, tx_id)
+
+        if pending_txn.get("confirmed-round", 0) > 0:
+            return Confirmation(pending_txn, tx_id, last_round - start_round,
+                                time.monotonic() - started)
+
+        if pending_txn.get("pool-error"):
+            raise RuntimeError(f"Pool error: {pending_txn['pool-error']}")
+
+        if last_round >= start_round + timeout:
+            raise ConfirmationTimeout(
+                f"Transaction {tx_id} not confirmed after {timeout} rounds"
+            )
+
+        status = call(client.status_after_block, last_round)
+        last_round = max(status["last-round"], last_round + 1)
+        if on_round is not None:
+            on_round(last_round)
@@ -0,0 +1,94 @@
+"""tops up app accounts only by what they are missing"""
+import threading
+import time
+import weakref
+from typing import Callable, Dict, Optional, Tuple
+
+from algosdk.v2client.algod import AlgodClient
+
+from amm.utils.params import DEFAULT_TTL, ClientReader
+
+
+def funding_shortfall(info: dict, spend: int = 0) -> int:
+    """
+    Amount an account needs to stay above its min balance.
+    Args:
+        info: account_info of the account
+        spend: microalgos the account pays out, e.g. inner transaction fees
+    Returns: microalgos to send, 0 when the account is funded
+    """
+    return max(0, info["min-balance"] + spend - info["amount"])
+
+
+class FundingPlanner(ClientReader):
+    """
+    Caches account balances and min balances for the ttl so repeated
+    operations on a market read its app account once. Sends through
+    the app invalidate the entry of the account they touch.
+    """
+
+    def __init__(
+        self, client: AlgodClient, ttl: float = DEFAULT_TTL,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        super().__init__(client, ttl, clock)
+        self._balances: Dict[str, Tuple[float, dict]] = {}
+
+    def balance(self, address: str) -> dict:
+        """
+        Reads the balance of an account, fetching it when stale.
+        Args:
+            address: account address
+        Returns: amount and min-balance in microalgos
+        """
+        with self._lock:
+            entry = self._balances.get(address)
+            if entry is not None and self.clock() - entry[0] < self.ttl:
+                return entry[1]
+        info = self.client.account_info(address)
+        balance = {"amount": info["amount"], "min-balance": info["min-balance"]}
+        with self._lock:
+            self._balances[address] = (self.clock(), balance)
+            self.requests += 1
+        return balance
+
+    def shortfall(self, address: str, spend: int = 0) -> int:
+        """
+        Plans the payment topping up an account.
+        Args:
+            address: account address
+            spend: microalgos the account pays out in the operation
+        Returns: microalgos to send, 0 when no payment is needed
+        """
+        return funding_shortfall(self.balance(address), spend)
+
+    def invalidate(self, address: Optional[str] = None) -> None:
+        """
+        Drops cached balances.
+        Args:
+            address: account to drop, every account when None
+        """
+        with self._lock:
+            if address is None:
+                self._balances.clear()
+            else:
+                self._balances.pop(address, None)
+
+
+_PLANNERS: "weakref.WeakKeyDictionary[AlgodClient, FundingPlanner]" = (
+    weakref.WeakKeyDictionary())
+_PLANNERS_LOCK = threading.Lock()
+
+
+def funding_planner(client: AlgodClient) -> FundingPlanner:
+    """
+    Funding planner shared by every user of the client.
+    Args:
+        client: algorand client
+    Returns: funding planner
+    """
+    with _PLANNERS_LOCK:
+        planner = _PLANNERS.get(client)
+        if planner is None:
+            planner = _PLANNERS[client] = FundingPlanner(client)
+        return planner
@@ -0,0 +1,93 @@
+"""suggested params shared by every app on a client"""
+import copy
+import threading
+import time
+import weakref
+from typing import Callable, Optional
+
+from algosdk.transaction import SuggestedParams
+from algosdk.v2client.algod import AlgodClient
+
+from amm.utils.weak import WeakClient
+
+DEFAULT_TTL = 5.0
+
+
+class ClientReader:  # pylint: disable=too-few-public-methods
+    """
+    Base of the helpers reusing reads of one algod client for a ttl.
+    The client is held weakly, the helpers are shared per client.
+    """
+
+    client = WeakClient()
+
+    def __init__(
+        self, client: AlgodClient, ttl: float = DEFAULT_TTL,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.client = client
+        self.ttl = ttl
+        self.clock = clock
+        self.requests = 0
+        self._lock = threading.Lock()
+
+
+class ParamsProvider(ClientReader):
+    """
+    Fetches suggested params once and reuses them until the round
+    advances or the ttl expires.
+    """
+
+    def __init__(
+        self, client: AlgodClient, ttl: float = DEFAULT_TTL,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        super().__init__(client, ttl, clock)
+        self._params: Optional[SuggestedParams] = None
+        self._fetched_at = 0.0
+
+    def get(self) -> SuggestedParams:
+        """
+        Returns suggested params, fetching them when stale.
+        Returns: a copy of the cached params
+        """
+        with self._lock:
+            if self._params is None or self.clock() - self._fetched_at >= self.ttl:
+                self._params = self.client.suggested_params()
+                self._fetched_at = self.clock()
+                self.requests += 1
+            return copy.copy(self._params)
+
+    def observe_round(self, round_number: int) -> None:
+        """
+        Drops the cached params once a newer round was seen.
+        Args:
+            round_number: round reported by algod
+        """
+        with self._lock:
+            if self._params is not None and round_number > self._params.first:
+                self._params = None
+
+    def invalidate(self) -> None:
+        """drops the cached params"""
+        with self._lock:
+            self._params = None
+
+
+_PROVIDERS: "weakref.WeakKeyDictionary[AlgodClient, ParamsProvider]" = (
+    weakref.WeakKeyDictionary())
+_PROVIDERS_LOCK = threading.Lock()
+
+
+def params_provider(client: AlgodClient) -> ParamsProvider:
+    """
+    Params provider shared by every user of the client.
+    Args:
+        client: algorand client
+    Returns: params provider
+    """
+    with _PROVIDERS_LOCK:
+        provider = _PROVIDERS.get(client)
+        if provider is None:
+            provider = _PROVIDERS[client] = ParamsProvider(client)
+        return provider
@@ -0,0 +1,221 @@
+"""content-addressed cache of compiled teal programs"""
+import hashlib
+import os
+import threading
+from typing import Callable, Dict, Iterable, NamedTuple, Optional
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "algo_amm", "programs")
+
+
+class CompiledProgram(NamedTuple):
+    """teal source together with its bytecode"""
+    teal: str
+    bytecode: bytes
+
+
+def program_key(
+    teal: str, teal_version: int, compiler_version: str, compiler_id: str = ""
+) -> str:
+    """
+    Content address of a teal program.
+    Args:
+        teal: generated teal source
+        teal_version: teal version the source was generated for
+        compiler_version: version of the teal generator (pyteal)
+        compiler_id: identity of the assembler that produced the bytecode
+    Returns: hex digest
+    """
+    digest = hashlib.sha256()
+    digest.update(
+        f"teal={teal_version};pyteal={compiler_version};compiler={compiler_id}\n".encode())
+    digest.update(teal.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def source_fingerprint(paths: Iterable[str], *extra: str) -> str:
+    """
+    Fingerprint of the files a program is generated from.
+    Args:
+        paths: source files of the contract
+        extra: additional strings, e.g. program name and versions
+    Returns: hex digest
+    """
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        with open(path, "rb") as source:
+            digest.update(source.read())
+    for item in extra:
+        digest.update(item.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+class ProgramCache:
+    """
+    Two layer (in-process and on-disk) cache of compiled programs.
+    Programs are addressed by the hash of their teal source and versions,
+    source fingerprints point to those addresses so that a warm cache
+    skips both teal generation and the algod compile endpoint.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._programs: Dict[str, CompiledProgram] = {}
+        self._sources: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(os.path.join(directory, "sources"), exist_ok=True)
+
+    def get(self, key: str) -> Optional[CompiledProgram]:
+        """
+        Looks up a program by its content address.
+        Args:
+            key: program key
+        Returns: compiled program or None
+        """
+        program = self._programs.get(key)
+        if program is not None or self.directory is None:
+            return program
+
+        base = os.path.join(self.directory, key)
+        try:
+            with open(base + ".teal", "r", encoding="utf-8") as file:
+                teal = file.read()
+            with open(base + ".bin", "rb") as file:
+                bytecode = file.read()
+        except FileNotFoundError:
+            return None
+
+        program = CompiledProgram(teal, bytecode)
+        with self._lock:
+            self.disk_hits += 1
+            self._programs[key] = program
+        return program
+
+    def put(self, key: str, program: CompiledProgram, persist: bool = True) -> None:
+        """
+        Stores a program under its content address.
+        Args:
+            key: program key
+            program: compiled program
+            persist: also write it to disk
+        """
+        with self._lock:
+            self._programs[key] = program
+        if persist and self.directory is not None:
+            base = os.path.join(self.directory, key)
+            _write_atomic(base + ".bin", program.bytecode)
+            _write_atomic(base + ".teal", program.teal.encode("utf-8"))
+
+    def resolve(self, fingerprint: str) -> Optional[str]:
+        """
+        Resolves a source fingerprint to a program key.
+        Args:
+            fingerprint: source fingerprint
+        Returns: program key or None
+        """
+        key = self._sources.get(fingerprint)
+        if key is not None or self.directory is None:
+            return key
+        try:
+            with open(os.path.join(self.directory, "sources", fingerprint),
+                      "r", encoding="utf-8") as file:
+                key = file.read().strip()
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._sources[fingerprint] = key
+        return key
+
+    def link(self, fingerprint: str, key: str, persist: bool = True) -> None:
+        """
+        Points a source fingerprint at a program key.
+        Args:
+            fingerprint: source fingerprint
+            key: program key
+            persist: also write the link to disk
+        """
+        with self._lock:
+            self._sources[fingerprint] = key
+        if persist and self.directory is not None:
+            _write_atomic(os.path.join(self.directory, "sources", fingerprint),
+                          key.encode("utf-8"))
+
+    def get_or_compile(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        generate: Callable[[], str],
+        assemble: Callable[[str], bytes],
+        teal_version: int,
+        compiler_version: str,
+        fingerprint: Optional[str] = None,
+        compiler_id: str = "",
+        persist: bool = True,
+    ) -> CompiledProgram:
+        """
+        Returns a cached program or generates and assembles it.
+        Args:
+            generate: produces teal source
+            assemble: turns teal source into bytecode
+            teal_version: teal version
+            compiler_version: version of the teal generator
+            fingerprint: optional source fingerprint, skips generate on a hit
+            compiler_id: identity of the assembler, part of the program key
+            persist: write a newly assembled program to disk, False keeps
+                it in this process only
+        Returns: compiled program
+        """
+        if fingerprint is not None:
+            key = self.resolve(fingerprint)
+            program = self.get(key) if key is not None else None
+            if program is not None:
+                with self._lock:
+                    self.hits += 1
+                return program
+
+        teal = generate()
+        key = program_key(teal, teal_version, compiler_version, compiler_id)
+        program = self.get(key)
+        if program is not None:
+            with self._lock:
+                self.hits += 1
+        else:
+            program = CompiledProgram(teal, assemble(teal))
+            with self._lock:
+                self.misses += 1
+            self.put(key, program, persist)
+
+        if fingerprint is not None:
+            self.link(fingerprint, key, persist)
+        return program
+
+    def clear(self) -> None:
+        """drops the in-process layer and resets counters"""
+        with self._lock:
+            self._programs.clear()
+            self._sources.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+
+_DEFAULT_CACHE: Optional[ProgramCache] = None
+
+
+def default_program_cache() -> ProgramCache:
+    """
+    Process wide cache stored in ALGO_AMM_CACHE_DIR or ~/.cache/algo_amm.
+    Returns: program cache
+    """
+    global _DEFAULT_CACHE  # pylint: disable=global-statement
+    if _DEFAULT_CACHE is None:
+        _DEFAULT_CACHE = ProgramCache(
+            os.environ.get("ALGO_AMM_CACHE_DIR", DEFAULT_CACHE_DIR))
+    return _DEFAULT_CACHE
@@ -1,36 +1,40 @@
 """algod client"""
 from algosdk.v2client import algod
-from algosdk.transaction import AssetConfigTxn
+from algosdk.transaction import AssetConfigTxn, SuggestedParams
+
+from amm.utils.confirmation import wait_for_confirmation
+from amm.utils.params import params_provider
 
 
 class AlgoClient:
     """algod client"""
     ALGOD_ADDRESS = "https://testnet-algorand.api.purestake.io/ps2"
 
-    def __init__(self, algod_token):
+    def __init__(self, algod_token, client=None):
         self.algod_token = algod_token
         self.headers = {
             "X-API-Key": algod_token,
         }
-        self.client = algod.AlgodClient(
+        self.client = client if client is not None else algod.AlgodClient(
             self.algod_token, self.ALGOD_ADDRESS, self.headers)
-        self.params = self.client.suggested_params()
+        self.params_provider = params_provider(self.client)
+
+    @property
+    def params(self) -> SuggestedParams:
+        """suggested params shared with every app on this client"""
+        return self.params_provider.get()
 
-    def wait_for_confirmation(self, tx_id):
+    def wait_for_confirmation(self, tx_id, timeout=10):
         """
         Utility to monitor transaction confirmation.
         Args:
             tx_id: transaction id
+            timeout: timeout in rounds
         """
-        last_round = self.client.status().get("last-round")
-        tx_info = self.client.pending_transaction_info(tx_id)
-        while not (tx_info.get("confirmed-round") and tx_info.get("confirmed-round") > 0):
-            print("Waiting for confirmation...")
-            last_round += 1
-            self.client.status_after_block(last_round)
-            tx_info = self.client.pending_transaction_info(tx_id)
-        confirmed_round = tx_info.get("confirmed-round")
-        print(f"Transaction {tx_id} confirmed in round {confirmed_round}.")
+        tx_info = wait_for_confirmation(
+            self.client, tx_id, timeout,
+            on_round=self.params_provider.observe_round)
+        print(f"Transaction {tx_id} confirmed in round {tx_info.confirmed_round}.")
         return tx_info
 
     def create_asset(self, account):
@@ -0,0 +1,250 @@
+"""global state reads shared by every app on a client"""
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from algosdk.v2client.algod import AlgodClient
+
+from amm.state import MarketState
+from amm.utils.confirmation import Confirmation
+from amm.utils.params import DEFAULT_TTL
+from amm.utils.weak import WeakClient
+
+DEFAULT_MAXSIZE = 1024
+
+
+class _Entry(NamedTuple):
+    round: Optional[int]
+    fetched_at: float
+    state: MarketState
+
+
+class StateCache:  # pylint: disable=too-many-instance-attributes
+    """
+    Market states keyed by app id, valid for the round they were read in.
+    An entry is dropped once a newer round is observed, the ttl expires
+    or a confirmed transaction touched the app. Concurrent reads of the
+    same app share one application_info request, and the least recently
+    used entries are evicted past maxsize.
+    The returned states are shared, do not modify them.
+    """
+
+    client = WeakClient()
+
+    def __init__(
+        self, client: AlgodClient, maxsize: int = DEFAULT_MAXSIZE,
+        ttl: float = DEFAULT_TTL, clock: Callable[[], float] = time.monotonic
+    ):
+        self.client = client
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.round: Optional[int] = None
+        self.requests = 0
+        self.hits = 0
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._inflight: Dict[int, Future] = {}
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _fresh(self, entry: _Entry) -> bool:
+        return entry.round == self.round and self.clock() - entry.fetched_at < self.ttl
+
+    def get(self, app_id: int) -> MarketState:
+        """
+        Returns the state of an app, reading it when stale.
+        Args:
+            app_id: application id
+        Returns: market state
+        """
+        with self._lock:
+            state, read_round, generation = self._lookup(app_id)
+            if state is not None:
+                return state
+            future = self._inflight.get(app_id)
+            if future is not None:
+                owner = False
+            else:
+                owner = True
+                future = self._inflight[app_id] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            if read_round is None:
+                # without a round the entry could never take a delta
+                read_round = self.client.status()["last-round"]
+                self.observe_round(read_round)
+            state = MarketState.from_application_info(
+                self.client.application_info(app_id))
+        except Exception as err:
+            with self._lock:
+                del self._inflight[app_id]
+            future.set_exception(err)
+            raise
+        with self._lock:
+            del self._inflight[app_id]
+            self._stored(app_id, state, read_round, generation)
+        future.set_result(state)
+        return state
+
+    def lookup(self, app_id: int) -> Tuple[Optional[MarketState], Optional[int], int]:
+        """
+        Returns the cached state of an app, for readers making the request
+        themselves, e.g. through an asyncio client.
+        Args:
+            app_id: application id
+        Returns: the fresh state or None, the round and generation to
+            store a new read with
+        """
+        with self._lock:
+            return self._lookup(app_id)
+
+    def store(
+        self, app_id: int, state: MarketState, read_round: int, generation: int
+    ) -> None:
+        """
+        Stores a state read after lookup missed.
+        Args:
+            app_id: application id
+            state: market state read
+            read_round: round returned by lookup, or read before the state
+            generation: generation returned by lookup
+        """
+        with self._lock:
+            self._stored(app_id, state, read_round, generation)
+
+    def _lookup(self, app_id: int) -> Tuple[Optional[MarketState], Optional[int], int]:
+        # called with the lock held
+        entry = self._entries.get(app_id)
+        if entry is not None and self._fresh(entry):
+            self._entries.move_to_end(app_id)
+            self.hits += 1
+            return entry.state, entry.round, self._generations.get(app_id, 0)
+        return None, self.round, self._generations.get(app_id, 0)
+
+    def _stored(
+        self, app_id: int, state: MarketState, read_round: int, generation: int
+    ) -> None:
+        # called with the lock held
+        self.requests += 1
+        # a transaction confirmed during the read may not be reflected
+        if self._generations.get(app_id, 0) == generation:
+            self._store(app_id, _Entry(read_round, self.clock(), state))
+
+    def put(self, app_id: int, state: MarketState) -> None:
+        """
+        Stores a state known to be current, e.g. derived from a confirmation.
+        Args:
+            app_id: application id
+            state: market state
+        """
+        with self._lock:
+            self._store(app_id, _Entry(self.round, self.clock(), state))
+
+    def apply_delta(self, app_id: int, round_number: int, delta: List[dict]) -> bool:
+        """
+        Brings a cached state up to date with a confirmed app call.
+        When the entry is missing or was read before the previous round,
+        calls by other accounts may have been missed: the entry is dropped
+        and the next read refetches it. Otherwise no other round lies
+        between the read and the call, the values are patched and the
+        entry becomes current for the confirmation round.
+        Args:
+            app_id: application id
+            round_number: round the call was confirmed in
+            delta: global-state-delta of the confirmation
+        Returns: whether the delta was applied
+        """
+        with self._lock:
+            self._generations[app_id] = self._generations.get(app_id, 0) + 1
+            entry = self._entries.get(app_id)
+            if entry is None or entry.round is None or round_number > entry.round + 1:
+                self._entries.pop(app_id, None)
+                return False
+            if round_number <= entry.round:
+                # the read already reflects the call
+                self._store(app_id, entry)
+                return True
+            if self.round is None or round_number > self.round:
+                self.round = round_number
+            self._store(app_id, _Entry(
+                round_number, self.clock(), entry.state.apply_delta(delta)))
+            return True
+
+    def confirmed(self, confirmation: Confirmation) -> None:
+        """
+        Brings the cache up to date with a confirmed transaction: the delta
+        of an app call is applied, an app call without one drops the app.
+        Args:
+            confirmation: confirmed transaction
+        """
+        # found on the first check, the confirmation observed no round itself
+        self.observe_round(confirmation.confirmed_round)
+        app_id = confirmation.app_id
+        if not app_id:
+            return
+        delta = confirmation.get("global-state-delta")
+        if delta is None:
+            self.invalidate(app_id)
+        else:
+            self.apply_delta(app_id, confirmation.confirmed_round, delta)
+
+    def _store(self, app_id: int, entry: _Entry) -> None:
+        self._entries[app_id] = entry
+        self._entries.move_to_end(app_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def observe_round(self, round_number: int) -> None:
+        """
+        Moves to a newer round, entries read before become stale.
+        Args:
+            round_number: round reported by algod
+        """
+        with self._lock:
+            if self.round is None or round_number > self.round:
+                self.round = round_number
+
+    def invalidate(self, app_id: Optional[int] = None) -> None:
+        """
+        Drops cached states, call it when a transaction touching the app
+        is confirmed.
+        Args:
+            app_id: app to drop, every app when None
+        """
+        with self._lock:
+            if app_id is None:
+                app_ids = list(self._entries) + list(self._inflight)
+                self._entries.clear()
+            else:
+                app_ids = [app_id]
+                self._entries.pop(app_id, None)
+            for dropped in app_ids:
+                self._generations[dropped] = self._generations.get(dropped, 0) + 1
+
+
+_CACHES: "weakref.WeakKeyDictionary[AlgodClient, StateCache]" = (
+    weakref.WeakKeyDictionary())
+_CACHES_LOCK = threading.Lock()
+
+
+def state_cache(client: AlgodClient) -> StateCache:
+    """
+    State cache shared by every user of the client.
+    Args:
+        client: algorand client
+    Returns: state cache
+    """
+    with _CACHES_LOCK:
+        cache = _CACHES.get(client)
+        if cache is None:
+            cache = _CACHES[client] = StateCache(client)
+        return cache
@@ -0,0 +1,202 @@
+"""tracks many in-flight transactions with one block follower"""
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+from algosdk.v2client.algod import AlgodClient
+
+from amm.utils.blocks import BlockFollower, block_record, block_transactions
+from amm.utils.confirmation import Confirmation, ConfirmationTimeout
+from amm.utils.weak import WeakClient
+
+
+class _Pending:  # pylint: disable=too-few-public-methods
+    __slots__ = ("future", "deadline", "registered_round", "started")
+
+    def __init__(self, future: Future, deadline: int, registered_round: int):
+        self.future = future
+        self.deadline = deadline
+        self.registered_round = registered_round
+        self.started = time.monotonic()
+
+
+class _WeakFollower(BlockFollower):
+    """block follower that lets its client be garbage collected"""
+
+    client = WeakClient()
+
+
+class ConfirmationTracker:  # pylint: disable=too-many-instance-attributes
+    """
+    Resolves futures of registered transactions from the blocks they are
+    confirmed in. Every block is fetched once whatever the number of
+    tracked transactions, so the cost scales with rounds.
+    The client is held weakly, the tracker is shared per client.
+    """
+
+    client = WeakClient()
+
+    def __init__(
+        self, client: AlgodClient, timeout: int = 10,
+        retries: int = 5, backoff: float = 0.25
+    ):
+        self.client = client
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.follower = _WeakFollower(client)
+        self._pending: Dict[str, _Pending] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._following = False
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def track(
+        self, tx_id: str, callback: Optional[Callable[[Future], None]] = None,
+        timeout: Optional[int] = None
+    ) -> Future:
+        """
+        Registers a transaction. Register right after sending it.
+        Args:
+            tx_id: transaction id
+            callback: called with the future once it is resolved
+            timeout: timeout in rounds, defaults to the tracker timeout
+        Returns: future of the Confirmation
+        """
+        with self._lock:
+            resync = tx_id not in self._pending and (
+                not self._pending or self.follower.next_round is None)
+        if resync:
+            # a network round trip, other callers must not wait for it
+            self.follower.sync()
+        with self._lock:
+            pending = self._pending.get(tx_id)
+            if pending is None:
+                current = self.follower.next_round
+                deadline = current + (self.timeout if timeout is None else timeout)
+                pending = self._pending[tx_id] = _Pending(Future(), deadline, current)
+                self._spawn()
+        if callback is not None:
+            pending.future.add_done_callback(callback)
+        return pending.future
+
+    def poll(self) -> int:
+        """
+        Processes the next round.
+        Returns: number of transactions resolved
+        """
+        round_number, block = self.follower.next_block()
+        # decoded before anything is popped, a bad block leaves every
+        # entry registered
+        transactions = list(block_transactions(block))
+        resolved = 0
+
+        with self._lock:
+            if not self._pending:
+                return 0
+            matched = []
+            for tx_id, txn, stib in transactions:
+                pending = self._pending.pop(tx_id, None)
+                if pending is not None:
+                    matched.append((tx_id, txn, stib, pending))
+            expired = [tx_id for tx_id, pending in self._pending.items()
+                       if pending.deadline <= round_number]
+            expired = [(tx_id, self._pending.pop(tx_id)) for tx_id in expired]
+
+        for tx_id, txn, stib, pending in matched:
+            try:
+                confirmation = Confirmation(
+                    block_record(txn, stib, round_number), tx_id,
+                    round_number - pending.registered_round,
+                    time.monotonic() - pending.started,
+                )
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                # popped already, the future must not be left waiting
+                pending.future.set_exception(err)
+                continue
+            pending.future.set_result(confirmation)
+            resolved += 1
+        for tx_id, pending in expired:
+            pending.future.set_exception(ConfirmationTimeout(
+                f"Transaction {tx_id} not confirmed after "
+                f"{pending.deadline - pending.registered_round} rounds"
+            ))
+        return resolved
+
+    def start(self) -> "ConfirmationTracker":
+        """
+        Follows blocks in a daemon thread whenever transactions are pending.
+        The thread exits once none are left or the client is gone, and the
+        next tracked transaction starts a new one.
+        Returns: the tracker
+        """
+        with self._lock:
+            self._following = True
+            self._spawn()
+        return self
+
+    def stop(self) -> None:
+        """stops following blocks in the background"""
+        with self._lock:
+            self._following = False
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def _spawn(self) -> None:
+        # called with the lock held
+        if self._following and self._pending and self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="confirmation-tracker", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        failures = 0
+        while True:
+            with self._lock:
+                if not self._following or not self._pending:
+                    self._thread = None
+                    return
+            try:
+                self.poll()
+                failures = 0
+            except ReferenceError as err:
+                # the client was garbage collected, nothing can confirm
+                self._fail_all(err)
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                failures += 1
+                if failures > self.retries:
+                    self._fail_all(err)
+                    failures = 0
+                else:
+                    time.sleep(self.backoff * 2 ** (failures - 1))
+
+    def _fail_all(self, err: Exception) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for entry in pending.values():
+            entry.future.set_exception(err)
+
+
+_TRACKERS: "weakref.WeakKeyDictionary[AlgodClient, ConfirmationTracker]" = (
+    weakref.WeakKeyDictionary())
+_TRACKERS_LOCK = threading.Lock()
+
+
+def confirmation_tracker(client: AlgodClient) -> ConfirmationTracker:
+    """
+    Running tracker shared by every user of the client.
+    Args:
+        client: algorand client
+    Returns: confirmation tracker
+    """
+    with _TRACKERS_LOCK:
+        tracker = _TRACKERS.get(client)
+        if tracker is None:
+            tracker = _TRACKERS[client] = ConfirmationTracker(client).start()
+        return tracker
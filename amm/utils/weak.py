@@ -0,0 +1,28 @@
+"""weak reference to the algod client of a helper shared per client"""
+import weakref
+from typing import Any, Optional
+
+
+class WeakClient:
+    """
+    Attribute holding each instance's client weakly. Helpers shared per
+    client live in WeakKeyDictionary registries keyed by the client, a
+    strong reference back from the helper would keep the client alive.
+    """
+
+    def __init__(self):
+        self.name = "_client_ref"
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = f"_{name}_ref"
+
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> Any:
+        if instance is None:
+            return self
+        client = getattr(instance, self.name)()
+        if client is None:
+            raise ReferenceError("the algod client was garbage collected")
+        return client
+
+    def __set__(self, instance: Any, client: Any) -> None:
+        setattr(instance, self.name, weakref.ref(client))
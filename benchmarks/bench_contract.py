@@ -0,0 +1,26 @@
+"""pyteal generation and compileTeal of the amm programs"""
+from pyteal import Mode, compileTeal
+
+from amm.amm_app import TEAL_VERSION
+from amm.contracts.amm import approval_program, clear_program
+
+APPROVAL = approval_program()
+
+
+def test_generate_approval(benchmark):
+    """builds the pyteal expression tree"""
+    program = benchmark(approval_program)
+    assert program is not None
+
+
+def test_compile_approval(benchmark):
+    """compiles the expression tree to teal"""
+    teal = benchmark(compileTeal, APPROVAL, mode=Mode.Application, version=TEAL_VERSION)
+    assert teal.startswith(f"#pragma version {TEAL_VERSION}")
+
+
+def test_compile_clear(benchmark):
+    """generates and compiles the clear state program"""
+    teal = benchmark(lambda: compileTeal(
+        clear_program(), mode=Mode.Application, version=TEAL_VERSION))
+    assert teal.startswith(f"#pragma version {TEAL_VERSION}")
@@ -0,0 +1,51 @@
+"""construction and signing of the transaction group of each app operation"""
+from types import SimpleNamespace
+
+import pytest
+from algosdk import account
+from algosdk.logic import get_application_address
+from algosdk.transaction import SuggestedParams
+
+from amm.transactions import (close_txns, create_txns, opt_in_txns, redeem_txns,
+                              set_result_txns, setup_txns, sign_group, supply_txns,
+                              swap_txns, withdraw_txns)
+from amm.utils.account import Account
+
+ACCOUNT = Account(account.generate_account()[0])
+SENDER = ACCOUNT.public_key
+PARAMS = SuggestedParams(fee=1000, first=1000, last=2000, gh="A" * 44, min_fee=1000,
+                         flat_fee=True)
+MARKET = SimpleNamespace(app_id=1005, app_addr=get_application_address(1005),
+                         stable_token=1000, pool_token=1006, yes_token=1007,
+                         no_token=1008)
+PROGRAM = bytes(800)
+
+OPERATIONS = {
+    "create": lambda: create_txns(PROGRAM, PROGRAM, 1000, 1000, SENDER, PARAMS),
+    "setup": lambda: setup_txns(MARKET, SENDER, PARAMS),
+    "opt_in": lambda: opt_in_txns(MARKET.yes_token, SENDER, PARAMS),
+    "supply": lambda: supply_txns(MARKET, 2_000_000, SENDER, PARAMS),
+    "swap": lambda: swap_txns(MARKET, "yes", 100_000, SENDER, PARAMS),
+    "swap_compact": lambda: swap_txns(MARKET, "yes", 100_000, SENDER, PARAMS,
+                                      compact=True),
+    "withdraw": lambda: withdraw_txns(MARKET, 100_000, SENDER, PARAMS),
+    "redeem": lambda: redeem_txns(MARKET, MARKET.yes_token, 100_000, SENDER,
+                                  MARKET.stable_token, PARAMS),
+    "set_result": lambda: set_result_txns(MARKET, SENDER, b"yes", PARAMS),
+    "close": lambda: close_txns(MARKET, SENDER, PARAMS),
+}
+
+
+@pytest.mark.parametrize("operation", sorted(OPERATIONS))
+def test_build(benchmark, operation):
+    """builds and groups the transactions"""
+    txns = benchmark(OPERATIONS[operation])
+    assert txns
+
+
+@pytest.mark.parametrize("operation", sorted(OPERATIONS))
+def test_build_and_sign(benchmark, operation):
+    """builds the group and signs every transaction"""
+    build = OPERATIONS[operation]
+    signed = benchmark(lambda: sign_group(build(), ACCOUNT))
+    assert all(stxn.signature for stxn in signed)
@@ -0,0 +1,27 @@
+"""cold import time of the client, measured in a fresh interpreter per round"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(code):
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+
+
+def test_import_app(benchmark):
+    """import amm.amm_app, as a worker trading against existing markets does"""
+    benchmark.pedantic(_run, args=("import amm.amm_app",), rounds=10, warmup_rounds=1)
+
+
+def test_import_and_load_contracts(benchmark):
+    """import and load the approval and clear programs, from amm/compiled when shipped"""
+    benchmark.pedantic(
+        _run, args=("from amm.amm_app import get_contracts\nget_contracts(None)",),
+        rounds=10, warmup_rounds=1)
+
+
+def test_import_pyteal_contract(benchmark):
+    """import the pyteal contract, what regenerating the programs starts with"""
+    benchmark.pedantic(_run, args=("import amm.contracts.amm",), rounds=10, warmup_rounds=1)
@@ -0,0 +1,35 @@
+"""batched quote engine against the scalar swap path"""
+import numpy as np
+
+from amm.quote import quote_markets
+from amm.simulator import swap_out
+
+MARKETS = 200
+AMOUNTS = 100
+
+rng = np.random.default_rng(0)
+YES_RESERVES = rng.integers(1, 2 ** 32, MARKETS, dtype=np.uint64)
+NO_RESERVES = rng.integers(1, 2 ** 32, MARKETS, dtype=np.uint64)
+CANDIDATES = rng.integers(1, 2 ** 20, AMOUNTS, dtype=np.uint64)
+
+
+def scalar_quotes():
+    """quotes one market and amount at a time"""
+    amounts = [int(amount) for amount in CANDIDATES]
+    return [
+        [swap_out(no, yes, amount) for amount in amounts]
+        for yes, no in zip(YES_RESERVES.tolist(), NO_RESERVES.tolist())
+    ]
+
+
+def test_quote_vectorized(benchmark):
+    """one vectorized pass over every market and amount"""
+    quotes = benchmark(quote_markets, YES_RESERVES,
+                       NO_RESERVES, CANDIDATES, "yes")
+    assert quotes.tokens_out.shape == (MARKETS, AMOUNTS)
+
+
+def test_quote_scalar(benchmark):
+    """reference scalar path"""
+    quotes = benchmark(scalar_quotes)
+    assert len(quotes) == MARKETS
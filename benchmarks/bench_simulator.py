@@ -0,0 +1,49 @@
+"""supply and swap throughput of the reference simulator"""
+from algosdk import account
+
+from amm.simulator import MarketSimulator
+from amm.state import MarketState
+from amm.tests.test_state import algod_global_state
+
+TRADES = 1_000
+
+_SIM = MarketSimulator(
+    account.address_from_private_key(account.generate_account()[0]), 1, 1000)
+_SIM.setup(pool_token=2, yes_token=3, no_token=4)
+_SIM.supply(2_000_000)
+ENTRIES = algod_global_state(_SIM.global_state())
+
+
+def swaps():
+    """alternating yes and no swaps on a copy of the market"""
+    sim = _SIM.copy()
+    for index in range(TRADES):
+        sim.swap("yes" if index % 2 else "no", 1_000 + index)
+    return sim
+
+
+def supplies():
+    """repeated supplies on a copy of the market"""
+    sim = _SIM.copy()
+    for index in range(TRADES):
+        sim.supply(1_000 + index)
+    return sim
+
+
+def test_swap_throughput(benchmark):
+    """swaps per run"""
+    sim = benchmark(swaps)
+    assert sim.yes_tokens_outstanding_key > 0
+
+
+def test_supply_throughput(benchmark):
+    """supplies per run"""
+    sim = benchmark(supplies)
+    assert sim.pool_tokens_outstanding_key > 2_000_000
+
+
+def test_resume_from_global_state(benchmark):
+    """decodes algod global state and rebuilds a simulator from it"""
+    sim = benchmark(lambda: MarketSimulator.from_global_state(
+        MarketState.from_global_state(ENTRIES), _SIM.funding_balance))
+    assert sim.pool_funding_reserves == _SIM.pool_funding_reserves
@@ -0,0 +1,43 @@
+"""typed global state decoding against the per key b64decode loop"""
+from base64 import b64decode
+
+from algosdk import account
+
+from amm.simulator import MarketSimulator
+from amm.state import MarketState
+from amm.tests.test_state import algod_global_state
+
+MARKETS = 1_000
+
+_SIM = MarketSimulator(
+    account.address_from_private_key(account.generate_account()[0]), 1, 1000)
+_SIM.setup(pool_token=2, yes_token=3, no_token=4)
+_SIM.supply(2_000_000)
+STATES = [algod_global_state(_SIM.global_state()) for _ in range(MARKETS)]
+
+
+def dict_decode():
+    """decodes like the former hand written loops"""
+    decoded = []
+    for glob_state in STATES:
+        ids = {}
+        for entry in glob_state:
+            key = b64decode(entry['key']).decode("utf-8")
+            if entry['value']['uint'] != 0:
+                ids[key] = entry['value']['uint']
+            else:
+                ids[key] = entry['value']['bytes']
+        decoded.append(ids)
+    return decoded
+
+
+def test_decode_market_state(benchmark):
+    """precomputed base64 keys into slots"""
+    states = benchmark(lambda: [MarketState.from_global_state(s) for s in STATES])
+    assert states[0].pool_token_key == 2
+
+
+def test_decode_dict(benchmark):
+    """reference per key decoding"""
+    states = benchmark(dict_decode)
+    assert states[0]["pool_token_key"] == 2
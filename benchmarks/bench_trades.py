@@ -0,0 +1,45 @@
+"""per round volume from the columnar store against re-parsing the jsonl export"""
+import json
+import os
+import tempfile
+from collections import defaultdict
+
+from amm.trades import convert
+
+ROWS = 100_000
+ASSET = 1
+
+_DIR = tempfile.mkdtemp()
+EXPORT = os.path.join(_DIR, "export.jsonl")
+with open(EXPORT, "w", encoding="utf8") as _file:
+    for _index in range(ROWS):
+        _file.write(json.dumps({
+            "id": str(_index), "confirmed-round": _index // 10, "round-time": _index,
+            "tx-type": "axfer", "sender": f"A{_index % 97}",
+            "asset-transfer-transaction": {"asset-id": ASSET + _index % 2, "amount": _index,
+                                           "receiver": f"A{_index % 89}"}}) + "\n")
+STORE = convert([EXPORT], os.path.join(_DIR, "store"))
+
+
+def json_volume():
+    """reads every line back to sum one asset per round"""
+    volumes = defaultdict(int)
+    with open(EXPORT, encoding="utf8") as file:
+        for line in file:
+            txn = json.loads(line)
+            transfer = txn.get("asset-transfer-transaction") or {}
+            if transfer.get("asset-id") == ASSET:
+                volumes[txn["confirmed-round"]] += transfer["amount"]
+    return volumes
+
+
+def test_volume_memmap(benchmark):
+    """vectorized scan of the mapped columns"""
+    rounds, volumes = benchmark(STORE.volume_per_round, ASSET)
+    assert len(rounds) == len(volumes) == ROWS // 10
+
+
+def test_volume_json(benchmark):
+    """reference json re-parse"""
+    volumes = benchmark(json_volume)
+    assert len(volumes) == ROWS // 10
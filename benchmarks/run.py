@@ -0,0 +1,41 @@
+"""runs every benchmark and stores the results as json for release over release comparison"""
+import argparse
+import glob
+import os
+import sys
+from typing import Optional, Sequence
+
+import pytest
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+RESULTS = os.path.join(BENCHMARKS, "results")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """command line entry point"""
+    parser = argparse.ArgumentParser(
+        description="Runs the bench_*.py files and saves the results as json. "
+                    "The default pytest run does not collect them.")
+    parser.add_argument("--name", help="result name, e.g. the release, "
+                                       "defaults to a counter and the commit")
+    parser.add_argument("--storage", default=RESULTS, help="results directory")
+    parser.add_argument("--compare", action="store_true",
+                        help="compare against the latest saved result")
+    parser.add_argument("--fail", default=None,
+                        help="regression threshold with --compare, e.g. mean:20%%")
+    args, extra = parser.parse_known_args(argv)
+
+    options = [f"--benchmark-storage=file://{args.storage}",
+               f"--benchmark-save={args.name}" if args.name else "--benchmark-autosave"]
+    if args.compare:
+        options.append("--benchmark-compare")
+        if args.fail:
+            options.append(f"--benchmark-compare-fail={args.fail}")
+    files = sorted(glob.glob(os.path.join(BENCHMARKS, "bench_*.py")))
+    # run from the repository so amm imports without installing
+    sys.path.insert(0, os.path.dirname(BENCHMARKS))
+    return pytest.main(["-q", "-p", "no:cacheprovider", *options, *extra, *files])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,14 @@
-""" example of the contract lifetime """
+""" exports the transactions of the amm tokens """
 import os
-import json
 from dotenv import load_dotenv
 from algosdk.v2client.indexer import IndexerClient
 
-from amm.utils.account import Account
-from amm.utils.purestake_client import AlgoClient
+from amm.export import export
+from amm.trade_index import TradeIndex
 
 load_dotenv()
 
 algod_token = os.getenv('algod_token')
-deployer = Account(os.getenv('key'))
 TOKENS = [170350514, 170350518, 170350516]
 
 algod_header = {
@@ -26,14 +24,11 @@ algod_indexer = IndexerClient(
     algod_header
 )
 
-AlgoClient = AlgoClient(algod_token).client
-last_round = AlgoClient.status()['last-round']
+last_round = algod_indexer.health()['round']
 
-
-for token_id in TOKENS:
-    data = algod_indexer.search_transactions(
-        asset_id=token_id, limit=10000)
-    file = json.dumps(data['transactions'])
-
-    with open(f'json_data_{token_id}.json', 'w', encoding="utf8") as outfile:
-        outfile.write(file)
+with TradeIndex('trades.sqlite') as index:
+    for token_id in TOKENS:
+        count = export(algod_indexer, f'json_data_{token_id}', '.',
+                       last_round=last_round, asset_id=token_id)
+        indexed = index.ingest(f'json_data_{token_id}.jsonl')
+        print(f'json_data_{token_id}.jsonl: {count} new transactions, {indexed} indexed')
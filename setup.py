@@ -15,10 +15,14 @@ setuptools.setup(
     url="https://github.com/dspytdao/Algo_AMM",
     packages=setuptools.find_packages(),
     install_requires=['pyteal', 'py-algorand-sdk'],
+    extras_require={
+        'quote': ['numpy'],
+        'async': ['aiohttp'],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    python_requires='>=3.6',
+    python_requires='>=3.9',
 )